@@ -0,0 +1,223 @@
+"""
+Bulk teacher and parent account provisioning.
+
+Reads accounts from a CSV with the columns
+
+  role (teacher or parent; optional when a default role is given),
+  username, email, full_name, phone, address (parents only)
+
+and for the whole batch:
+
+  * validates every row and rejects usernames/emails repeated in the file;
+  * checks username and email uniqueness against users in one query;
+  * generates a password per account and hashes them in a process pool,
+    since generate_password_hash is deliberately CPU-expensive;
+  * inserts the User rows (with RETURNING for their ids) and the Teacher /
+    Parent profiles with executemany, one transaction per chunk.
+
+The result is a report (with throughput) and one credentials row per input
+line: the generated password for created accounts, the error otherwise.
+"""
+import csv
+import io
+import os
+import secrets
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Teacher, Parent
+
+ROLES = ('teacher', 'parent')
+DEFAULT_CHUNK_SIZE = 500
+CREDENTIAL_COLUMNS = ('line', 'role', 'username', 'email', 'full_name', 'user_id', 'profile_id', 'password', 'error')
+
+_LIMITS = {'username': 50, 'email': 100, 'full_name': 100, 'phone': 15}
+
+
+def generate_secure_password(length=12):
+    """Generate a secure random password"""
+    characters = string.ascii_letters + string.digits + "!@#$%^&*"
+    return ''.join(secrets.choice(characters) for _ in range(length))
+
+
+def hash_passwords(passwords, workers=None):
+    """generate_password_hash() of each password, spread over `workers` processes (default: one per CPU)."""
+    workers = min(workers or os.cpu_count() or 1, len(passwords))
+    if workers <= 1:
+        return [generate_password_hash(p) for p in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(generate_password_hash, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def iter_account_rows(stream):
+    """Yield (line_number, row_dict) pairs from a CSV text stream."""
+    reader = csv.DictReader(stream)
+    for line_number, row in enumerate(reader, start=2):  # line 1 is the header
+        yield line_number, {k.strip(): (v or '').strip() for k, v in row.items() if k}
+
+
+def validate_account(row, default_role=None):
+    """Return (account_values, errors) for one input row."""
+    errors = []
+    role = (row.get('role') or default_role or '').lower()
+    if role not in ROLES:
+        errors.append(f"role must be one of: {', '.join(ROLES)}")
+    for field in ('username', 'email', 'full_name'):
+        if not row.get(field):
+            errors.append(f'{field} is required')
+    for field, limit in _LIMITS.items():
+        if len(row.get(field) or '') > limit:
+            errors.append(f'{field} is longer than {limit} characters')
+    if row.get('email') and '@' not in row['email']:
+        errors.append('email is not a valid address')
+    if errors:
+        return None, errors
+    return {
+        'role': role,
+        'username': row['username'],
+        'email': row['email'],
+        'full_name': row['full_name'],
+        'phone': row.get('phone') or '',
+        'address': row.get('address') or '',
+    }, []
+
+
+def _taken(usernames, emails):
+    """(usernames, lowercased emails) among the given ones that users already has, in one query."""
+    rows = db.session.execute(
+        select(User.username, User.email).where(
+            or_(User.username.in_(usernames), func.lower(User.email).in_(emails))
+        )
+    ).all()
+    return {username for username, _ in rows}, {email.lower() for _, email in rows if email}
+
+
+class AccountProvisioner:
+    """Provisions accounts chunk by chunk and collects the credentials and report."""
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.credentials = []
+        self.report = {'total_rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+
+    def _fail(self, line_number, account, errors):
+        self.report['failed'] += 1
+        self.report['errors'].append({'row': line_number, 'errors': errors})
+        self.credentials.append(dict(account or {}, line=line_number, error='; '.join(errors)))
+
+    def _validate(self, rows, default_role):
+        accounts, seen_usernames, seen_emails = [], set(), set()
+        for line_number, row in rows:
+            self.report['total_rows'] += 1
+            account, errors = validate_account(row, default_role)
+            if not errors:
+                if account['username'] in seen_usernames:
+                    errors.append('username is repeated in the file')
+                if account['email'].lower() in seen_emails:
+                    errors.append('email is repeated in the file')
+            if errors:
+                self._fail(line_number, account or {k: row.get(k) for k in ('role', 'username', 'email')}, errors)
+                continue
+            seen_usernames.add(account['username'])
+            seen_emails.add(account['email'].lower())
+            accounts.append((line_number, account))
+        return accounts
+
+    def _insert_chunk(self, chunk):
+        users = [{
+            'username': account['username'], 'email': account['email'], 'role': account['role'],
+            'password_hash': password_hash,
+        } for _, account, _, password_hash in chunk]
+        try:
+            user_ids = db.session.execute(
+                insert(User).returning(User.user_id, sort_by_parameter_order=True), users
+            ).scalars().all()
+            teachers, parents = [], []
+            for user_id, (_, account, _, _) in zip(user_ids, chunk):
+                if account['role'] == 'teacher':
+                    teachers.append({'user_id': user_id, 'full_name': account['full_name'],
+                                     'email': account['email'], 'phone': account['phone']})
+                else:
+                    parents.append({'user_id': user_id, 'full_name': account['full_name'],
+                                    'phone': account['phone'], 'address': account['address']})
+            profile_ids = {}
+            for model, key, rows in ((Teacher, Teacher.teacher_id, teachers), (Parent, Parent.parent_id, parents)):
+                if rows:
+                    created = db.session.execute(
+                        insert(model).returning(model.user_id, key, sort_by_parameter_order=True), rows
+                    ).all()
+                    profile_ids.update(dict(created))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            message = f'Database error: {getattr(e, "orig", None) or e}'
+            for line_number, account, _, _ in chunk:
+                self._fail(line_number, account, [message])
+            return
+        for user_id, (line_number, account, password, _) in zip(user_ids, chunk):
+            self.credentials.append(dict(account, line=line_number, user_id=user_id,
+                                         profile_id=profile_ids.get(user_id), password=password))
+        self.report['created'] += len(chunk)
+
+    def run(self, rows, default_role=None):
+        started = time.perf_counter()
+        accounts = self._validate(rows, default_role)
+
+        if accounts:
+            taken_usernames, taken_emails = _taken(
+                [a['username'] for _, a in accounts], [a['email'].lower() for _, a in accounts]
+            )
+            available = []
+            for line_number, account in accounts:
+                errors = []
+                if account['username'] in taken_usernames:
+                    errors.append('Username already exists')
+                if account['email'].lower() in taken_emails:
+                    errors.append('Email already exists')
+                if errors:
+                    self._fail(line_number, account, errors)
+                else:
+                    available.append((line_number, account))
+            accounts = available
+
+        passwords = [generate_secure_password() for _ in accounts]
+        hashing_started = time.perf_counter()
+        hashes = hash_passwords(passwords, self.workers) if passwords else []
+        self.report['hashing_ms'] = round((time.perf_counter() - hashing_started) * 1000, 1)
+
+        prepared = [(line_number, account, password, password_hash) for (line_number, account), password, password_hash
+                    in zip(accounts, passwords, hashes)]
+        for start in range(0, len(prepared), self.chunk_size):
+            self._insert_chunk(prepared[start:start + self.chunk_size])
+
+        self.credentials.sort(key=lambda c: c['line'])
+        elapsed = time.perf_counter() - started
+        self.report['elapsed_ms'] = round(elapsed * 1000, 1)
+        self.report['accounts_per_second'] = round(self.report['created'] / elapsed, 1) if elapsed else None
+        return self.report
+
+
+def provision_accounts(stream, default_role=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """Provision the accounts of a CSV text or binary stream; returns (report, credentials)."""
+    if default_role is not None and default_role not in ROLES:
+        raise ValueError(f"Unsupported role '{default_role}'. Use one of: {', '.join(ROLES)}")
+    if not isinstance(stream, io.TextIOBase):
+        if isinstance(stream, io.RawIOBase):
+            stream = io.BufferedReader(stream)
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    provisioner = AccountProvisioner(chunk_size=chunk_size, workers=workers)
+    report = provisioner.run(iter_account_rows(stream), default_role)
+    return report, provisioner.credentials
+
+
+def write_credentials(credentials, stream):
+    """Write credentials rows as CSV (CREDENTIAL_COLUMNS) to a text stream."""
+    writer = csv.DictWriter(stream, fieldnames=CREDENTIAL_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(credentials)
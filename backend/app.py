@@ -3,16 +3,14 @@ from config import Config
 from models import db
 from routes.students import students_bp
 from routes.attendance import attendance_bp
-# dev
 from routes.teacher_assignments import teacher_assignments_bp
-from routes.assessments import assessments_bp   
-from routes.behavioral import behavioral_bp
-from routes.assessments import assessments_bp  
-from routes.Behavioral import behavioral_bp
-
 from routes.assessments import assessments_bp
-from routes.participation import participation_bp 
-# main
+from routes.behavioral import behavioral_bp
+from routes.participation import participation_bp
+from routes.dashboard import dashboard_bp
+from routes.admin import admin_bp
+from routes.parent import parents_bp
+from routes.teacher_bp import teacher_bp
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -20,14 +18,15 @@ db.init_app(app)
 
 # Register blueprints
 app.register_blueprint(students_bp, url_prefix='/students')
-app.register_blueprint(attendance_bp, url_prefix='/attendance') 
-# dev
+app.register_blueprint(attendance_bp, url_prefix='/attendance')
 app.register_blueprint(teacher_assignments_bp, url_prefix='/api/teacher-assignments')
 app.register_blueprint(assessments_bp, url_prefix='/api/assessments')
 app.register_blueprint(behavioral_bp, url_prefix='/api/behavioral')
-
 app.register_blueprint(participation_bp, url_prefix='/api/participation')
-# main
+app.register_blueprint(dashboard_bp)
+app.register_blueprint(admin_bp, url_prefix='/admin')
+app.register_blueprint(parents_bp, url_prefix='/api/parent')
+app.register_blueprint(teacher_bp, url_prefix='/api/teacher')
 
 # Simple home route to avoid 404 on "/"
 @app.route('/')
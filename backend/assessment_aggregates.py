@@ -0,0 +1,133 @@
+"""
+Per student, subject, academic year and term assessment aggregates.
+
+assessment_aggregates keeps, for every (student_id, subject_id,
+academic_year, term), the number of assessments, the sum and sum of squares of their
+percentages and the last date taken, so averages (and spreads) are read
+in O(1) per student instead of re-averaging raw assessment rows.
+Assessments with max_score <= 0 have no percentage and are not counted.
+
+The assessment write paths call refresh_assessment_aggregates() with the
+keys they touched, in the same transaction. rebuild_assessment_aggregates()
+recomputes the table and check_assessment_aggregates() reports rows that
+disagree with the raw table.
+"""
+from sqlalchemy import delete, exists, func, select, true, tuple_
+
+from models import db, Assessment, AssessmentAggregate
+from db_helpers import upsert_from_select
+
+KEY_COLUMNS = ['student_id', 'subject_id', 'academic_year', 'term']
+VALUE_COLUMNS = ['assessment_count', 'percentage_sum', 'percentage_sq_sum', 'last_date']
+
+# Floating point sums may differ in the last bits depending on row order
+TOLERANCE = 1e-6
+
+
+def _key_part(column):
+    # NULL years and terms are stored as '' so they can be part of the primary key
+    return func.coalesce(column, '')
+
+
+def _raw_key():
+    return (Assessment.student_id, Assessment.subject_id,
+            _key_part(Assessment.academic_year), _key_part(Assessment.term))
+
+
+def _percentage():
+    return Assessment.score * 100.0 / Assessment.max_score
+
+
+def _grouped(where):
+    pct = _percentage()
+    return select(
+        *_raw_key(),
+        func.count(Assessment.assessment_id),
+        func.sum(pct),
+        func.sum(pct * pct),
+        func.max(Assessment.date_taken)
+    ).where(
+        Assessment.max_score > 0, where
+    ).group_by(*_raw_key())
+
+
+def assessment_key(assessment):
+    """The aggregate key of an Assessment (or of a dict of its column values)."""
+    get = assessment.get if isinstance(assessment, dict) else lambda name: getattr(assessment, name)
+    return get('student_id'), get('subject_id'), get('academic_year') or '', get('term') or ''
+
+
+def _refresh(keys=None):
+    raw_key = tuple_(*_raw_key())
+    aggregate_key = tuple_(*(getattr(AssessmentAggregate, c) for c in KEY_COLUMNS))
+    where, stale = true(), true()
+    if keys is not None:
+        where, stale = raw_key.in_(keys), aggregate_key.in_(keys)
+
+    # Drop keys that no longer have any counted assessment
+    db.session.execute(delete(AssessmentAggregate).where(stale, ~exists().where(
+        Assessment.student_id == AssessmentAggregate.student_id,
+        Assessment.subject_id == AssessmentAggregate.subject_id,
+        _key_part(Assessment.academic_year) == AssessmentAggregate.academic_year,
+        _key_part(Assessment.term) == AssessmentAggregate.term,
+        Assessment.max_score > 0
+    )).execution_options(synchronize_session=False))
+    upsert_from_select(AssessmentAggregate, KEY_COLUMNS + VALUE_COLUMNS, KEY_COLUMNS, _grouped(where))
+
+
+def refresh_assessment_aggregates(keys):
+    """
+    Bring the aggregates up to date for touched (student_id, subject_id, academic_year, term) keys.
+
+    Include both the old and new key when an assessment moved. Runs in the
+    caller's transaction.
+    """
+    keys = sorted({
+        (student_id, subject_id, academic_year or '', term or '')
+        for student_id, subject_id, academic_year, term in keys
+    })
+    if keys:
+        _refresh(keys)
+
+
+def rebuild_assessment_aggregates():
+    """Recompute the aggregate table from the raw assessments table."""
+    db.session.execute(delete(AssessmentAggregate))
+    _refresh()
+    db.session.commit()
+
+
+def check_assessment_aggregates():
+    """
+    Compare the aggregate table with the raw assessments.
+
+    Returns a list of {key, expected, actual} for every key that is
+    missing, stale or extra (expected/actual None when absent).
+    """
+    size = len(KEY_COLUMNS)
+    expected = {tuple(row[:size]): tuple(row[size:]) for row in db.session.execute(_grouped(true()))}
+    actual = {
+        tuple(row[:size]): tuple(row[size:]) for row in db.session.execute(select(
+            *(getattr(AssessmentAggregate, c) for c in KEY_COLUMNS + VALUE_COLUMNS)
+        ))
+    }
+
+    def _same(a, b):
+        if a is None or b is None:
+            return a is b
+        count_a, sum_a, sq_a, last_a = a
+        count_b, sum_b, sq_b, last_b = b
+        return (count_a == count_b and last_a == last_b
+                and abs(sum_a - sum_b) <= TOLERANCE * max(1.0, abs(sum_a))
+                and abs(sq_a - sq_b) <= TOLERANCE * max(1.0, abs(sq_a)))
+
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys()):
+        if not _same(expected.get(key), actual.get(key)):
+            mismatches.append({'key': key, 'expected': expected.get(key), 'actual': actual.get(key)})
+    return mismatches
+
+
+def average_percentage():
+    """Average percentage over the aggregate rows being grouped (NULL when there are none)."""
+    return func.sum(AssessmentAggregate.percentage_sum) / func.nullif(func.sum(AssessmentAggregate.assessment_count), 0)
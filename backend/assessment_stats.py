@@ -0,0 +1,146 @@
+"""
+SQL-side assessment statistics.
+
+One grouped query returns count, average, min/max, standard deviation,
+median and any requested percentiles of the assessment percentage (and
+the raw score extremes) per group, without loading Assessment rows.
+
+Percentiles use percentile_cont on PostgreSQL. Elsewhere (SQLite) the
+same linear interpolation is computed from row_number()/count() windows
+over the rows of each group.
+"""
+import math
+
+from sqlalchemy import Integer, and_, case, cast, false, func, literal, select
+
+from models import db, Assessment, Student
+from db_helpers import dialect_name
+from subjects import find_subject_id, subject_name
+
+GROUP_COLUMNS = {
+    'subject': Assessment.subject_id,
+    'term': Assessment.term,
+    'class': Student.class_id,
+    'assessment_type': Assessment.assessment_type,
+}
+
+DEFAULT_PERCENTILES = (25, 50, 75)
+
+
+def _percentage():
+    return case((Assessment.max_score > 0, Assessment.score * 100.0 / Assessment.max_score), else_=None)
+
+
+def _percentile_label(p):
+    return f"p{p:g}".replace('.', '_')
+
+
+def _base_query(filters, group_column):
+    columns = [
+        (group_column if group_column is not None else literal(None)).label('group_key'),
+        Assessment.score.label('score'),
+        _percentage().label('pct'),
+    ]
+    stmt = select(*columns)
+    if group_column is Student.class_id or filters.get('class_id') is not None:
+        stmt = stmt.join(Student, Student.student_id == Assessment.student_id)
+
+    conditions = []
+    if filters.get('student_id'):
+        conditions.append(Assessment.student_id == filters['student_id'])
+    if filters.get('subject_id') is not None:
+        conditions.append(Assessment.subject_id == filters['subject_id'])
+    if filters.get('subject'):
+        # Names resolve through the subject cache; an unknown subject matches nothing
+        subject_id = find_subject_id(filters['subject'])
+        conditions.append(Assessment.subject_id == subject_id if subject_id is not None else false())
+    if filters.get('term'):
+        conditions.append(Assessment.term == filters['term'])
+    if filters.get('academic_year'):
+        conditions.append(Assessment.academic_year == filters['academic_year'])
+    if filters.get('class_id') is not None:
+        conditions.append(Student.class_id == filters['class_id'])
+    return stmt.where(and_(*conditions)) if conditions else stmt
+
+
+def _interpolated_percentile(rows, fraction):
+    # position = 1 + p * (n - 1); interpolate between the rows either side of it
+    position = 1 + fraction * (rows.c.n - 1)
+    low = cast(position, Integer)  # position >= 1, so truncation is floor
+    low_value = func.max(case((rows.c.rn == low, rows.c.pct)))
+    high_value = func.max(case((rows.c.rn == low + 1, rows.c.pct)))
+    return low_value + func.coalesce(func.max(position - low) * (high_value - low_value), 0.0)
+
+
+def assessment_statistics(filters=None, group_by=None, percentiles=DEFAULT_PERCENTILES):
+    """
+    Compute assessment statistics in one query.
+
+    filters: student_id, subject (name), subject_id, term, academic_year, class_id.
+    group_by: None or a GROUP_COLUMNS key. percentiles: numbers in 0..100.
+    Returns a list of dicts, one per group (one element when ungrouped, none if nothing matched).
+    """
+    filters = filters or {}
+    group_column = GROUP_COLUMNS[group_by] if group_by else None
+    wanted = sorted(set(percentiles) | {50})
+    postgres = dialect_name() == 'postgresql'
+
+    base = _base_query(filters, group_column)
+    if postgres:
+        rows = base.subquery('scored')
+        distribution = [func.stddev_samp(rows.c.pct).label('stddev')] + [
+            func.percentile_cont(p / 100.0).within_group(rows.c.pct).label(_percentile_label(p)) for p in wanted
+        ]
+    else:
+        # Non-NULL percentages sort first, so rn 1..n are the ranked values
+        rows = base.add_columns(
+            func.row_number().over(partition_by=base.selected_columns.group_key,
+                                   order_by=(base.selected_columns.pct.is_(None), base.selected_columns.pct)).label('rn'),
+            func.count(base.selected_columns.pct).over(partition_by=base.selected_columns.group_key).label('n'),
+        ).subquery('scored')
+        mean = func.avg(rows.c.pct)
+        distribution = [
+            ((func.sum(rows.c.pct * rows.c.pct) - func.count(rows.c.pct) * mean * mean)
+             / func.nullif(func.count(rows.c.pct) - 1, 0)).label('variance')
+        ] + [_interpolated_percentile(rows, p / 100.0).label(_percentile_label(p)) for p in wanted]
+
+    stmt = select(
+        rows.c.group_key,
+        func.count().label('total_assessments'),
+        func.avg(rows.c.score).label('average_score'),
+        func.avg(rows.c.pct).label('average_percentage'),
+        func.max(rows.c.score).label('highest_score'),
+        func.min(rows.c.score).label('lowest_score'),
+        func.max(rows.c.pct).label('highest_percentage'),
+        func.min(rows.c.pct).label('lowest_percentage'),
+        *distribution
+    ).group_by(rows.c.group_key).order_by(rows.c.group_key)
+
+    results = []
+    for row in db.session.execute(stmt).mappings():
+        if postgres:
+            stddev = row['stddev']
+        else:
+            stddev = math.sqrt(max(row['variance'], 0.0)) if row['variance'] is not None else None
+        stats = {
+            'total_assessments': row['total_assessments'],
+            'average_score': _round(row['average_score']),
+            'average_percentage': _round(row['average_percentage']),
+            'highest_score': row['highest_score'],
+            'lowest_score': row['lowest_score'],
+            'highest_percentage': _round(row['highest_percentage']),
+            'lowest_percentage': _round(row['lowest_percentage']),
+            'stddev_percentage': _round(stddev),
+            'median_percentage': _round(row[_percentile_label(50)]),
+            'percentiles': {_percentile_label(p): _round(row[_percentile_label(p)]) for p in sorted(set(percentiles))},
+        }
+        if group_by == 'subject':
+            stats = {'subject': subject_name(row['group_key']), 'subject_id': row['group_key'], **stats}
+        elif group_by:
+            stats = {group_by: row['group_key'], **stats}
+        results.append(stats)
+    return results
+
+
+def _round(value):
+    return round(float(value), 2) if value is not None else None
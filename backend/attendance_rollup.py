@@ -0,0 +1,158 @@
+"""
+Attendance rollups.
+
+Two summary tables replace recounting the raw attendance table:
+
+  attendance_daily_rollup  - counts per class per day
+  attendance_term_rollup   - counts per student per academic term
+
+The attendance write paths call refresh_attendance_rollups() with the
+(student_id, class_id, date) keys they touched, in the same transaction;
+only the rollup rows for those keys are recomputed. rebuild_attendance_rollups()
+recomputes everything (backfills, or after writes made outside the API).
+"""
+import datetime
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import and_, case, delete, exists, func, literal, select, true, tuple_
+
+from models import db, Attendance, AttendanceDailyRollup, AttendanceTermRollup
+from db_helpers import upsert_from_select
+
+# (term name, (start month, day), (end month, day)); terms must cover the
+# whole year in order, starting with the first term of the academic year.
+# Override with app.config['ACADEMIC_TERMS'].
+DEFAULT_TERMS = [
+    ('Term 1', (9, 1), (12, 31)),
+    ('Term 2', (1, 1), (3, 31)),
+    ('Term 3', (4, 1), (8, 31)),
+]
+
+COUNTED_STATUSES = ('present', 'absent', 'late', 'excused')
+
+
+def _terms():
+    return current_app.config.get('ACADEMIC_TERMS', DEFAULT_TERMS)
+
+
+def _as_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(str(value), '%Y-%m-%d').date()
+
+
+def term_for_date(day):
+    """Return (academic_year, term, start_date, end_date) for the term containing day."""
+    day = _as_date(day)
+    terms = _terms()
+    first_month = terms[0][1][0]
+    start_year = day.year if day.month >= first_month else day.year - 1
+    academic_year = f'{start_year}-{start_year + 1}'
+    for name, (start_month, start_day), (end_month, end_day) in terms:
+        year = start_year if start_month >= first_month else start_year + 1
+        start = datetime.date(year, start_month, start_day)
+        end = datetime.date(year if end_month >= start_month else year + 1, end_month, end_day)
+        if start <= day <= end:
+            return academic_year, name, start, end
+    raise ValueError(f'No academic term configured for {day}')
+
+
+def _status_counts():
+    return [func.count(Attendance.attendance_id)] + [
+        func.sum(case((Attendance.status == status, 1), else_=0)) for status in COUNTED_STATUSES
+    ]
+
+
+def _upsert_from_select(model, key_columns, select_stmt):
+    columns = key_columns + ['total'] + list(COUNTED_STATUSES)
+    # start/end dates describe the term; the key is (student, year, term)
+    upsert_from_select(model, columns, [c for c in key_columns if c not in ('start_date', 'end_date')], select_stmt)
+
+
+def _refresh_daily(class_days=None):
+    """Recompute daily rows for the given (class_id, date) pairs, or all of them."""
+    raw_key = tuple_(Attendance.class_id, Attendance.date)
+    rollup_key = tuple_(AttendanceDailyRollup.class_id, AttendanceDailyRollup.date)
+
+    where = Attendance.class_id.isnot(None)
+    stale = true()
+    if class_days is not None:
+        where = and_(where, raw_key.in_(class_days))
+        stale = rollup_key.in_(class_days)
+
+    # Drop rows whose class/day no longer has any attendance
+    db.session.execute(delete(AttendanceDailyRollup).where(stale, ~exists().where(
+        Attendance.class_id == AttendanceDailyRollup.class_id,
+        Attendance.date == AttendanceDailyRollup.date
+    )).execution_options(synchronize_session=False))
+    _upsert_from_select(
+        AttendanceDailyRollup, ['class_id', 'date'],
+        select(Attendance.class_id, Attendance.date, *_status_counts())
+        .where(where).group_by(Attendance.class_id, Attendance.date)
+    )
+
+
+def _refresh_term(academic_year, term, start, end, student_ids=None):
+    """Recompute one term's rows for the given students, or all of them."""
+    where = and_(Attendance.date >= start, Attendance.date <= end)
+    stale = and_(AttendanceTermRollup.academic_year == academic_year, AttendanceTermRollup.term == term)
+    if student_ids is not None:
+        where = and_(where, Attendance.student_id.in_(student_ids))
+        stale = and_(stale, AttendanceTermRollup.student_id.in_(student_ids))
+
+    db.session.execute(delete(AttendanceTermRollup).where(stale, ~exists().where(
+        Attendance.student_id == AttendanceTermRollup.student_id,
+        Attendance.date >= start,
+        Attendance.date <= end
+    )).execution_options(synchronize_session=False))
+    _upsert_from_select(
+        AttendanceTermRollup, ['student_id', 'academic_year', 'term', 'start_date', 'end_date'],
+        select(
+            Attendance.student_id,
+            literal(academic_year, AttendanceTermRollup.academic_year.type),
+            literal(term, AttendanceTermRollup.term.type),
+            literal(start, AttendanceTermRollup.start_date.type),
+            literal(end, AttendanceTermRollup.end_date.type),
+            *_status_counts()
+        ).where(where).group_by(Attendance.student_id)
+    )
+
+
+def refresh_attendance_rollups(keys):
+    """
+    Bring the rollups up to date for touched attendance keys.
+
+    keys: iterable of (student_id, class_id, date) - include both the old
+    and new key when a record moved. Runs in the caller's transaction.
+    """
+    class_days = set()
+    students_by_term = defaultdict(set)
+    for student_id, class_id, day in keys:
+        day = _as_date(day)
+        if class_id is not None:
+            class_days.add((int(class_id), day))
+        if student_id is not None:
+            students_by_term[term_for_date(day)].add(student_id)
+
+    if class_days:
+        _refresh_daily(sorted(class_days))
+    for term_key, student_ids in students_by_term.items():
+        _refresh_term(*term_key, student_ids=sorted(student_ids))
+
+
+def rebuild_attendance_rollups():
+    """Recompute both rollup tables from the raw attendance table."""
+    db.session.execute(delete(AttendanceTermRollup))
+    db.session.execute(delete(AttendanceDailyRollup))
+    _refresh_daily()
+
+    first, last = db.session.query(func.min(Attendance.date), func.max(Attendance.date)).one()
+    if first is not None:
+        day = _as_date(first)
+        last = _as_date(last)
+        while day <= last:
+            academic_year, term, start, end = term_for_date(day)
+            _refresh_term(academic_year, term, start, end)
+            day = end + datetime.timedelta(days=1)
+    db.session.commit()
@@ -0,0 +1,107 @@
+"""
+Session-based authorization.
+
+login_user() stores the user's id, role, profile id (teacher_id or
+parent_id) and permissions_version in the signed session cookie, so a
+role check normally costs no database round trip.
+
+Changing a user's role or password, or deleting them, bumps
+users.permissions_version (revoke_permissions) and, once committed,
+publishes the new value in the permission_versions cache
+(publish_permissions). That cache is in-process, or shared between workers
+through Redis when CACHE_REDIS_URL is set. A session whose version differs
+from the published one is re-validated against the users table once.
+Sessions are also re-validated every AUTH_REVALIDATE_SECONDS, which bounds
+how long a worker that cannot see the published version keeps trusting a
+session.
+"""
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, session
+
+from models import db, User
+from cache import permission_versions
+
+DEFAULT_REVALIDATE_SECONDS = 300
+
+
+def _revalidate_seconds():
+    return current_app.config.get('AUTH_REVALIDATE_SECONDS', DEFAULT_REVALIDATE_SECONDS)
+
+
+def _remember(user):
+    session['user_id'] = user.user_id
+    session['username'] = user.username
+    session['role'] = user.role
+    session['permissions_version'] = user.permissions_version
+    session['auth_checked_at'] = time.time()
+
+
+def login_user(user, profile_id=None, remember=False):
+    """Start a session for user; profile_id is their teacher_id or parent_id for the portals."""
+    session.clear()
+    _remember(user)
+    if profile_id is not None:
+        session['profile_id'] = profile_id
+    session.permanent = remember
+    publish_permissions(user.user_id, user.permissions_version)
+
+
+def revoke_permissions(user):
+    """Invalidate user's existing sessions; call before a role/password change or deletion is committed."""
+    user.permissions_version = (user.permissions_version or 1) + 1
+    return user.permissions_version
+
+
+def publish_permissions(user_id, version):
+    """Make a committed permissions_version visible to the session checks."""
+    permission_versions.set(str(user_id), version)
+
+
+def _revalidate():
+    user = db.session.get(User, session['user_id'])
+    if user is None:
+        session.clear()
+        return False
+    profile_id = session.get('profile_id')
+    _remember(user)
+    if profile_id is not None:
+        session['profile_id'] = profile_id
+    publish_permissions(user.user_id, user.permissions_version)
+    return True
+
+
+def current_role():
+    """Role of the logged-in user, or None when there is no valid session."""
+    if 'user_id' not in session:
+        return None
+    published = permission_versions.get(str(session['user_id']))
+    stale = published is not None and published != session.get('permissions_version')
+    expired = time.time() - session.get('auth_checked_at', 0) > _revalidate_seconds()
+    if (stale or expired) and not _revalidate():
+        return None
+    return session['role']
+
+
+def current_profile_id():
+    """teacher_id or parent_id stored at portal login, or None."""
+    return session.get('profile_id')
+
+
+def require_role(*roles):
+    """Decorator: 401 without a valid session, 403 unless the user has one of roles (any role if none given)."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            role = current_role()
+            if role is None:
+                return jsonify({'error': 'Authentication required'}), 401
+            if roles and role not in roles:
+                return jsonify({'error': f"{' or '.join(r.capitalize() for r in roles)} access required"}), 403
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+admin_required = require_role('admin')
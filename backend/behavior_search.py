@@ -0,0 +1,40 @@
+"""
+Substring search over behaviour categories and notes.
+
+PostgreSQL answers ILIKE '%term%' from the pg_trgm GIN indexes on
+behavior.category and behavior.notes. SQLite has no trigram indexes, so
+the behavior_search FTS5 table (trigram tokenizer, kept in sync by
+triggers; see models.py) stands in: matching rowids come from its index
+and are matched back on behavior_id. Terms shorter than three characters
+have no trigram to look up and fall back to a scan on both databases.
+"""
+from sqlalchemy import column, or_, select, table
+
+from models import Behavioral
+from db_helpers import dialect_name
+
+SEARCH_COLUMNS = ('category', 'notes')
+MIN_INDEXED_LENGTH = 3
+
+_search_table = table('behavior_search', column('rowid'), column('behavior_search'))
+
+
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _fts_query(term, columns):
+    # A quoted phrase is matched as a substring by the trigram tokenizer
+    phrase = '"' + term.replace('"', '""') + '"'
+    return f"{{{' '.join(columns)}}} : {phrase}"
+
+
+def search_condition(term, columns=SEARCH_COLUMNS):
+    """WHERE clause for behaviour rows where any of `columns` contains `term`, ignoring case."""
+    if dialect_name() == 'sqlite' and len(term) >= MIN_INDEXED_LENGTH:
+        return Behavioral.behavior_id.in_(
+            select(_search_table.c.rowid).where(_search_table.c.behavior_search.match(_fts_query(term, columns)))
+        )
+    pattern = _like_pattern(term)
+    return or_(*(getattr(Behavioral, name).ilike(pattern, escape='\\') for name in columns))
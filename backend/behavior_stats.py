@@ -0,0 +1,112 @@
+"""
+Behaviour statistics for many students in one statement.
+
+For every requested student (a list of IDs or a whole class) one UNION
+ALL query returns:
+
+  * the last N incidents, picked with ROW_NUMBER() OVER (PARTITION BY
+    student_id ORDER BY date DESC, behavior_id DESC) on the
+    (student_id, date, behavior_id) index;
+  * counts grouped by behavior_type and category;
+  * one roster row, so students without records still get zero counts.
+
+The branches are told apart by a `kind` column and folded into one dict
+per student in Python.
+"""
+from sqlalchemy import Date, Integer, String, Text, cast, func, literal, null, select, union_all
+
+from models import db, Behavioral, Student
+
+DEFAULT_RECENT = 10
+MAX_RECENT = 50
+MAX_BATCH_STUDENTS = 1000
+
+
+def _typed_null(type_):
+    # Typed NULLs keep the UNION column types unambiguous on PostgreSQL
+    return cast(null(), type_)
+
+
+def _statement(students, recent, since):
+    ranked = select(
+        Behavioral.student_id, Behavioral.behavior_type, Behavioral.category,
+        Behavioral.behavior_id, Behavioral.date, Behavioral.notes, Behavioral.teacher_id,
+        func.row_number().over(
+            partition_by=Behavioral.student_id,
+            order_by=(Behavioral.date.desc(), Behavioral.behavior_id.desc())
+        ).label('position')
+    ).where(Behavioral.student_id.in_(students))
+    if since is not None:
+        ranked = ranked.where(Behavioral.date >= since)
+    ranked = ranked.subquery('ranked')
+
+    latest = select(
+        literal('recent').label('kind'), ranked.c.student_id, ranked.c.behavior_type, ranked.c.category,
+        _typed_null(Integer).label('n'), ranked.c.behavior_id, ranked.c.date, ranked.c.notes,
+        ranked.c.teacher_id, ranked.c.position
+    ).where(ranked.c.position <= recent)
+
+    counts = select(
+        literal('count'), Behavioral.student_id, Behavioral.behavior_type, Behavioral.category,
+        func.count(Behavioral.behavior_id), _typed_null(Integer), _typed_null(Date), _typed_null(Text),
+        _typed_null(String), _typed_null(Integer)
+    ).where(Behavioral.student_id.in_(students)).group_by(
+        Behavioral.student_id, Behavioral.behavior_type, Behavioral.category
+    )
+
+    roster = select(
+        literal('student'), Student.student_id, _typed_null(String), _typed_null(String),
+        _typed_null(Integer), _typed_null(Integer), _typed_null(Date), _typed_null(Text),
+        _typed_null(String), _typed_null(Integer)
+    ).where(Student.student_id.in_(students))
+
+    return union_all(latest, counts, roster)
+
+
+def behavior_statistics(student_ids=None, class_id=None, recent=DEFAULT_RECENT, since=None):
+    """
+    Return {student_id: stats} for the given students or every student in a class.
+
+    stats: total_records, behavior_counts ({behavior_type: n}),
+    category_counts ({category: n}) and recent_behaviors (the last `recent`
+    records, newest first, only those on or after `since` when given).
+    Unknown student IDs are left out.
+    """
+    if class_id is not None:
+        students = select(Student.student_id).where(Student.class_id == class_id).scalar_subquery()
+    else:
+        students = list(student_ids or [])
+        if not students:
+            return {}
+
+    stats = {}
+    rows = db.session.execute(_statement(students, recent, since)).all()
+    for row in rows:
+        if row.kind == 'student':
+            stats[row.student_id] = {
+                'student_id': row.student_id,
+                'total_records': 0,
+                'behavior_counts': {},
+                'category_counts': {},
+                'recent_behaviors': [],
+            }
+    for row in rows:
+        entry = stats.get(row.student_id)
+        if entry is None or row.kind == 'student':
+            continue
+        if row.kind == 'count':
+            entry['total_records'] += row.n
+            entry['behavior_counts'][row.behavior_type] = entry['behavior_counts'].get(row.behavior_type, 0) + row.n
+            entry['category_counts'][row.category] = entry['category_counts'].get(row.category, 0) + row.n
+        else:
+            entry['recent_behaviors'].append((row.position, {
+                'behavior_id': row.behavior_id,
+                'date': row.date.isoformat(),
+                'behavior_type': row.behavior_type,
+                'category': row.category,
+                'notes': row.notes,
+                'teacher_id': row.teacher_id,
+            }))
+    for entry in stats.values():
+        entry['recent_behaviors'] = [record for _, record in sorted(entry['recent_behaviors'], key=lambda r: r[0])]
+    return stats
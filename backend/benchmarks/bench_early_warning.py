@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dashboard alerts, per-student loop vs. set-based risk engine.
+
+Seeds a throwaway database with N students (10 assessments, 20 attendance
+rows and a sprinkling of behaviour incidents each) and reports query count
+and latency for both implementations.
+
+    python benchmarks/bench_early_warning.py --sizes 1000 10000 50000
+    python benchmarks/bench_early_warning.py --database-url postgresql://...
+
+The legacy loop issues four queries per student, so by default it is only
+run up to --legacy-max students.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import event, func, insert
+
+from models import db, Student, Class, Subject, Assessment, Attendance, Behavioral
+from early_warning import at_risk_students
+from attendance_rollup import rebuild_attendance_rollups
+from assessment_aggregates import rebuild_assessment_aggregates
+
+
+class QueryCounter:
+    """Counts statements sent to the database while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def create_app(database_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed(n_students, seed_value=42):
+    rng = random.Random(seed_value)
+    db.drop_all()
+    db.create_all()
+
+    db.session.execute(insert(Class), [
+        {'class_id': i, 'class_name': f'P{i}'} for i in range(1, 7)
+    ])
+    db.session.execute(insert(Subject), [{'subject_id': 1, 'name': 'Mathematics'}])
+
+    start = date(2024, 9, 1)
+    students, assessments, attendance, behaviors = [], [], [], []
+    for i in range(1, n_students + 1):
+        student_id = f'RW-{i:03d}'
+        students.append({'student_id': student_id, 'full_name': f'Student {i}', 'class_id': rng.randint(1, 6)})
+        ability = rng.uniform(0.3, 1.0)
+        for k in range(10):
+            assessments.append({
+                'student_id': student_id, 'subject_id': 1, 'subject_name': 'Mathematics',
+                'assessment_type': 'quiz', 'score': round(100 * min(1.0, max(0.0, rng.gauss(ability, 0.1))), 1),
+                'max_score': 100, 'date_taken': start + timedelta(days=k * 7), 'term': 'Term 1'
+            })
+        presence = rng.uniform(0.3, 1.0)
+        for d in range(20):
+            attendance.append({
+                'student_id': student_id, 'class_id': 1, 'date': start + timedelta(days=d),
+                'status': 'present' if rng.random() < presence else 'absent'
+            })
+        for _ in range(rng.choice([0, 0, 0, 1, 2, 4])):
+            behaviors.append({
+                'student_id': student_id, 'behavior_type': 'negative', 'category': 'lateness',
+                'date': start + timedelta(days=rng.randint(0, 60))
+            })
+
+    for model, rows in ((Student, students), (Assessment, assessments),
+                        (Attendance, attendance), (Behavioral, behaviors)):
+        for i in range(0, len(rows), 10000):
+            db.session.execute(insert(model), rows[i:i + 10000])
+    db.session.commit()
+    rebuild_attendance_rollups()
+    rebuild_assessment_aggregates()
+
+
+def legacy_alerts():
+    """The original per-student implementation of /api/dashboard/alerts."""
+    failing = []
+    for student in Student.query.all():
+        avg_score = db.session.query(
+            func.avg((Assessment.score / Assessment.max_score) * 100)
+        ).filter(Assessment.student_id == student.student_id).scalar() or 0
+        total = db.session.query(func.count(Attendance.attendance_id)).filter_by(student_id=student.student_id).scalar() or 0
+        present = db.session.query(func.count(Attendance.attendance_id)).filter_by(student_id=student.student_id, status='present').scalar() or 0
+        rate = (present / total * 100) if total else 0
+        misconduct = db.session.query(func.count(Behavioral.behavior_id)).filter_by(student_id=student.student_id).scalar()
+        if avg_score < 50 or rate < 50 or misconduct > 0:
+            failing.append(student.student_id)
+    return failing
+
+
+def measure(fn):
+    with QueryCounter(db.engine) as counter:
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+    db.session.rollback()
+    return counter.count, elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--legacy-max', type=int, default=1000)
+    parser.add_argument('--database-url')
+    args = parser.parse_args()
+
+    tmp = None
+    database_url = args.database_url
+    if not database_url:
+        tmp = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database_url = f'sqlite:///{tmp.name}'
+
+    app = create_app(database_url)
+    print(f'{"students":>9} {"impl":>8} {"queries":>8} {"ms":>10}')
+    with app.app_context():
+        for size in args.sizes:
+            seed(size)
+            if size <= args.legacy_max:
+                queries, ms = measure(legacy_alerts)
+                print(f'{size:>9} {"legacy":>8} {queries:>8} {ms:>10.1f}')
+            queries, ms = measure(lambda: at_risk_students(page=1, per_page=50))
+            print(f'{size:>9} {"engine":>8} {queries:>8} {ms:>10.1f}')
+        db.drop_all()
+
+    if tmp:
+        os.unlink(tmp.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN the queries behind the filtered list endpoints and flag sequential scans.
+
+Calls each endpoint in ENDPOINTS through the test client, captures the
+SELECT statements it sends, runs EXPLAIN (PostgreSQL) or EXPLAIN QUERY
+PLAN (SQLite) on each one and reports the ones that scan a whole table.
+With --timings it also times every endpoint with and without the index
+catalog (the ix_* indexes declared in models.py / migrations 0002).
+
+    python benchmarks/explain_queries.py --rows 1000000 --timings
+    python benchmarks/explain_queries.py --database-url postgresql://... --no-seed
+
+Without --no-seed the target database is dropped and re-seeded with
+--rows attendance rows (200 school days per student), so point it at a
+throwaway database. The exit status is 1 when a sequential scan is found.
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import event, insert
+
+from models import (db, Student, Class, Subject, Assessment, Attendance, Behavioral, Participation,
+                    PARTICIPATION_RATINGS, participation_rating)
+from attendance_rollup import rebuild_attendance_rollups
+from assessment_aggregates import rebuild_assessment_aggregates
+from routes.students import students_bp
+from routes.attendance import attendance_bp
+from routes.assessments import assessments_bp
+from routes.behavioral import behavioral_bp
+from routes.participation import participation_bp
+
+DAYS = 200
+FIRST_DAY = date(2024, 9, 2)
+SAMPLE_STUDENT = 'RW-042'
+SUBJECTS = ['Mathematics', 'English', 'Science', 'Kinyarwanda']
+SAMPLE_DAY = (FIRST_DAY + timedelta(days=30)).isoformat()
+
+ENDPOINTS = [
+    f'/attendance/?student_id={SAMPLE_STUDENT}',
+    '/attendance/?class_id=3',
+    f'/attendance/?class_id=3&date={SAMPLE_DAY}',
+    f'/attendance/?date={SAMPLE_DAY}',
+    '/api/assessments/statistics?subject=Mathematics&term=Term%201',
+    f'/api/behavioral/?student_id={SAMPLE_STUDENT}',
+    f'/api/behavioral/?student_id={SAMPLE_STUDENT}&limit=50&cursor={SAMPLE_DAY}_1000000',
+    '/api/behavioral/?q=partic&limit=50',
+    f'/api/behavioral/?limit=50&cursor={SAMPLE_DAY}_1000000',
+    f'/api/behavioral/?behavior_type=negative&start_date={SAMPLE_DAY}&end_date={SAMPLE_DAY}',
+    f'/api/behavioral/student/{SAMPLE_STUDENT}',
+    f'/api/behavioral/stats/{SAMPLE_STUDENT}',
+    '/api/behavioral/stats?class_id=3',
+    f'/api/participation/date/{SAMPLE_DAY}',
+    '/api/participation/average-rating?class_id=3&by=student,event,month',
+    '/students/?class_id=3',
+]
+
+# Tables small enough that a full scan is the right plan
+SMALL_TABLES = {'classes', 'id_sequences', 'subjects'}
+
+
+def create_app(database_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    app.register_blueprint(students_bp, url_prefix='/students')
+    app.register_blueprint(attendance_bp, url_prefix='/attendance')
+    app.register_blueprint(assessments_bp, url_prefix='/api/assessments')
+    app.register_blueprint(behavioral_bp, url_prefix='/api/behavioral')
+    app.register_blueprint(participation_bp, url_prefix='/api/participation')
+    return app
+
+
+def seed(n_rows, seed_value=42):
+    rng = random.Random(seed_value)
+    db.drop_all()
+    db.create_all()
+
+    n_students = max(1, n_rows // DAYS)
+    db.session.execute(insert(Class), [{'class_id': i, 'class_name': f'P{i}'} for i in range(1, 7)])
+    db.session.execute(insert(Subject), [{'subject_id': i + 1, 'name': name} for i, name in enumerate(SUBJECTS)])
+    db.session.execute(insert(Student), [
+        {'student_id': f'RW-{i:03d}', 'full_name': f'Student {i}', 'class_id': i % 6 + 1}
+        for i in range(1, n_students + 1)
+    ])
+
+    statuses = ['present'] * 8 + ['absent', 'late']
+    batch = []
+    for day in range(DAYS):
+        taken = FIRST_DAY + timedelta(days=day)
+        for i in range(1, n_students + 1):
+            batch.append({'student_id': f'RW-{i:03d}', 'class_id': i % 6 + 1, 'date': taken,
+                          'status': rng.choice(statuses)})
+            if len(batch) >= 50000:
+                db.session.execute(insert(Attendance), batch)
+                batch = []
+    if batch:
+        db.session.execute(insert(Attendance), batch)
+
+    assessments, behaviors, participation = [], [], []
+    for i in range(1, n_students + 1):
+        student_id = f'RW-{i:03d}'
+        for k in range(20):
+            assessments.append({
+                'student_id': student_id, 'subject_id': k % 4 + 1, 'subject_name': SUBJECTS[k % 4],
+                'assessment_type': 'quiz', 'score': rng.randint(20, 100), 'max_score': 100,
+                'date_taken': FIRST_DAY + timedelta(days=k * 7), 'term': f'Term {k % 3 + 1}'
+            })
+        for k in range(10):
+            taken = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+            behaviors.append({'student_id': student_id, 'behavior_type': rng.choice(['positive', 'negative']),
+                              'category': 'participation', 'date': taken})
+            status = rng.choice(list(PARTICIPATION_RATINGS))
+            participation.append({'student_id': student_id, 'class_id': i % 6 + 1, 'event_name': 'Debate',
+                                  'date': taken, 'status': status, 'rating': participation_rating(status)})
+    db.session.execute(insert(Assessment), assessments)
+    db.session.execute(insert(Behavioral), behaviors)
+    db.session.execute(insert(Participation), participation)
+    db.session.commit()
+    rebuild_attendance_rollups()
+    rebuild_assessment_aggregates()
+
+
+def catalog_indexes():
+    """The ix_* indexes from models.py, i.e. the ones added by the index catalog."""
+    return [index for table in db.metadata.sorted_tables for index in table.indexes
+            if index.name.startswith('ix_')]
+
+
+def capture_selects(client, url):
+    captured = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', _on_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _on_execute)
+    if response.status_code != 200:
+        raise RuntimeError(f'{url} returned {response.status_code}')
+    return captured
+
+
+def explain(statement, parameters):
+    """Return (plan lines, tables read with a full scan; derived subqueries are not tables)."""
+    conn = db.session.connection()
+    if db.engine.dialect.name == 'postgresql':
+        plan = [row[0] for row in conn.exec_driver_sql('EXPLAIN ' + statement, parameters)]
+        scans = {m.group(1) for line in plan for m in [re.search(r'Seq Scan on (\w+)', line)] if m}
+    else:
+        plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+        scans = {m.group(1) for line in plan for m in [re.match(r'SCAN (\w+)', line)]
+                 if m and 'INDEX' not in line}
+    return plan, (scans & set(db.metadata.tables)) - SMALL_TABLES
+
+
+def report_plans(client):
+    flagged = 0
+    for url in ENDPOINTS:
+        for statement, parameters in capture_selects(client, url):
+            plan, scans = explain(statement, parameters)
+            if scans:
+                flagged += 1
+            print(f"{'SEQ SCAN' if scans else 'ok':<9} {url}  {', '.join(sorted(scans))}", flush=True)
+            if scans:
+                for line in plan:
+                    print(f"          {line}")
+    return flagged
+
+
+def time_endpoints(client, repeat):
+    timings = {}
+    for url in ENDPOINTS:
+        client.get(url)  # warm up
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            client.get(url)
+            samples.append(time.perf_counter() - started)
+        timings[url] = statistics.median(samples) * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url')
+    parser.add_argument('--rows', type=int, default=100000, help='attendance rows to seed')
+    parser.add_argument('--no-seed', action='store_true', help='explain against the existing data')
+    parser.add_argument('--timings', action='store_true', help='time each endpoint with and without the catalog indexes')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'explain.db')}"
+    app = create_app(database_url)
+    client = app.test_client()
+
+    with app.app_context():
+        if not args.no_seed:
+            started = time.perf_counter()
+            seed(args.rows)
+            print(f"Seeded {args.rows} attendance rows in {time.perf_counter() - started:.1f}s", flush=True)
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(db.text('ANALYZE'))
+            db.session.commit()
+
+        if args.timings:
+            indexes = catalog_indexes()
+            for index in indexes:
+                index.drop(db.engine, checkfirst=True)
+            without = time_endpoints(client, args.repeat)
+            for index in indexes:
+                index.create(db.engine, checkfirst=True)
+            if db.engine.dialect.name == 'postgresql':
+                db.session.execute(db.text('ANALYZE'))
+                db.session.commit()
+            with_indexes = time_endpoints(client, args.repeat)
+
+            print(f"\n{'endpoint':<80} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+            for url in ENDPOINTS:
+                before, after = without[url], with_indexes[url]
+                print(f"{url:<80} {before:>10.1f} {after:>10.1f} {before / after:>7.1f}x")
+            print()
+
+        flagged = report_plans(client)
+        db.session.rollback()
+
+    print(f"\n{flagged} statement(s) with sequential scans")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == '__main__':
+    main()
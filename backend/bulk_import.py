@@ -0,0 +1,236 @@
+"""
+Streaming bulk student import.
+
+Reads students from a CSV or NDJSON stream, validates each row, creates
+missing classes once, allocates IDs in blocks and inserts students,
+guardians and emergency contacts with batched executemany statements,
+committing one chunk at a time.
+
+Row format (same keys as POST /students/):
+  full_name, class_id, gender, dateOfBirth (or date_of_birth), guardian_contact
+  guardians / emergencyContacts - lists of {firstName, lastName, relationship, contact}
+                                  in NDJSON; numbered columns in CSV, e.g.
+                                  guardian1_first_name, guardian1_last_name,
+                                  guardian1_relationship, guardian1_contact,
+                                  emergency1_first_name, ...
+"""
+import csv
+import datetime
+import io
+import json
+import time
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, Student, Class, Guardian, EmergencyContact
+from student_ids import reserve_student_ids
+
+DEFAULT_CHUNK_SIZE = 1000
+FORMATS = ('csv', 'ndjson')
+
+_CONTACT_FIELDS = (
+    ('first_name', 'firstName'),
+    ('last_name', 'lastName'),
+    ('relationship', 'relationship'),
+    ('contact', 'contact'),
+)
+
+
+def detect_format(filename=None, content_type=None):
+    """Guess the import format from a filename or content type (defaults to csv)."""
+    name = (filename or '').lower()
+    ctype = (content_type or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in ctype or 'jsonl' in ctype:
+        return 'ndjson'
+    return 'csv'
+
+
+def _csv_contacts(row, prefix):
+    contacts = []
+    n = 1
+    while any(f'{prefix}{n}_{col}' in row for col, _ in _CONTACT_FIELDS):
+        contact = {key: (row.get(f'{prefix}{n}_{col}') or '').strip() or None for col, key in _CONTACT_FIELDS}
+        if any(contact.values()):
+            contacts.append(contact)
+        n += 1
+    return contacts
+
+
+def iter_rows(stream, fmt):
+    """Yield (line_number, row_dict) pairs from a text stream without reading it all into memory."""
+    if fmt == 'ndjson':
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, {'__error__': f'Invalid JSON: {e}'}
+                continue
+            yield line_number, row if isinstance(row, dict) else {'__error__': 'Expected a JSON object'}
+    else:
+        reader = csv.DictReader(stream)
+        for line_number, row in enumerate(reader, start=2):  # line 1 is the header
+            row = {k.strip(): v for k, v in row.items() if k}
+            row['guardians'] = _csv_contacts(row, 'guardian')
+            row['emergencyContacts'] = _csv_contacts(row, 'emergency')
+            yield line_number, row
+
+
+def _validate_contacts(contacts, label, errors):
+    if contacts in (None, ''):
+        return []
+    if not isinstance(contacts, list):
+        errors.append(f'{label} must be a list')
+        return []
+    cleaned = []
+    for c in contacts:
+        if not isinstance(c, dict):
+            errors.append(f'{label} entries must be objects')
+            continue
+        if c.get('contact') and len(str(c['contact'])) > 15:
+            errors.append(f'{label} contact is longer than 15 characters')
+        cleaned.append({col: c.get(key) for col, key in _CONTACT_FIELDS})
+    return cleaned
+
+
+def validate_row(row):
+    """Return (student_values, guardians, emergency_contacts, errors) for one input row."""
+    if '__error__' in row:
+        return None, [], [], [row['__error__']]
+
+    errors = []
+    full_name = (row.get('full_name') or '').strip()
+    if not full_name:
+        errors.append('full_name is required')
+    elif len(full_name) > 100:
+        errors.append('full_name is longer than 100 characters')
+
+    class_id = row.get('class_id')
+    try:
+        class_id = int(class_id)
+    except (TypeError, ValueError):
+        errors.append('class_id is required and must be an integer')
+        class_id = None
+
+    dob = row.get('dateOfBirth') or row.get('date_of_birth')
+    if dob:
+        try:
+            dob = datetime.datetime.strptime(str(dob).strip(), '%Y-%m-%d').date()
+        except ValueError:
+            errors.append('Invalid date format for date of birth. Use YYYY-MM-DD')
+    else:
+        dob = None
+
+    gender = (row.get('gender') or '').strip() or None
+    if gender and len(gender) > 10:
+        errors.append('gender is longer than 10 characters')
+
+    guardian_contact = (str(row.get('guardian_contact') or '')).strip() or None
+    if guardian_contact and len(guardian_contact) > 15:
+        errors.append('guardian_contact is longer than 15 characters')
+
+    guardians = _validate_contacts(row.get('guardians'), 'guardians', errors)
+    emergency_contacts = _validate_contacts(row.get('emergencyContacts'), 'emergencyContacts', errors)
+
+    if errors:
+        return None, [], [], errors
+    student = {
+        'full_name': full_name,
+        'gender': gender,
+        'date_of_birth': dob,
+        'class_id': class_id,
+        'guardian_contact': guardian_contact,
+    }
+    return student, guardians, emergency_contacts, []
+
+
+class StudentImporter:
+    """Imports students chunk by chunk and accumulates a per-row report."""
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.known_classes = None
+        self.report = {
+            'total_rows': 0,
+            'imported': 0,
+            'failed': 0,
+            'classes_created': [],
+            'errors': [],
+        }
+
+    def _ensure_classes(self, class_ids):
+        if self.known_classes is None:
+            self.known_classes = set(db.session.execute(select(Class.class_id)).scalars())
+        missing = sorted(set(class_ids) - self.known_classes)
+        if missing:
+            db.session.execute(insert(Class), [
+                {'class_id': class_id, 'class_name': f'P{class_id}'} for class_id in missing
+            ])
+            self.known_classes.update(missing)
+        return missing
+
+    def _flush_chunk(self, chunk):
+        if not chunk:
+            return
+        # Reserve IDs before touching the session so SQLite's write lock is free
+        student_ids = reserve_student_ids(len(chunk))
+        today = datetime.date.today()
+
+        students, guardians, emergency_contacts = [], [], []
+        for student_id, (_, values, chunk_guardians, chunk_contacts) in zip(student_ids, chunk):
+            students.append(dict(values, student_id=student_id, enrollment_date=today))
+            guardians.extend(dict(g, student_id=student_id) for g in chunk_guardians)
+            emergency_contacts.extend(dict(e, student_id=student_id) for e in chunk_contacts)
+
+        try:
+            created_classes = self._ensure_classes(v['class_id'] for v in students)
+            db.session.execute(insert(Student), students)
+            if guardians:
+                db.session.execute(insert(Guardian), guardians)
+            if emergency_contacts:
+                db.session.execute(insert(EmergencyContact), emergency_contacts)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            self.known_classes = None
+            message = f'Database error: {getattr(e, "orig", None) or e}'
+            self.report['failed'] += len(chunk)
+            self.report['errors'].extend({'row': line_number, 'errors': [message]} for line_number, *_ in chunk)
+            return
+        self.report['imported'] += len(students)
+        self.report['classes_created'].extend(created_classes)
+
+    def run(self, rows):
+        started = time.perf_counter()
+        chunk = []
+        for line_number, row in rows:
+            self.report['total_rows'] += 1
+            values, guardians, emergency_contacts, errors = validate_row(row)
+            if errors:
+                self.report['failed'] += 1
+                self.report['errors'].append({'row': line_number, 'errors': errors})
+                continue
+            chunk.append((line_number, values, guardians, emergency_contacts))
+            if len(chunk) >= self.chunk_size:
+                self._flush_chunk(chunk)
+                chunk = []
+        self._flush_chunk(chunk)
+
+        elapsed = time.perf_counter() - started
+        self.report['elapsed_ms'] = round(elapsed * 1000, 1)
+        self.report['rows_per_second'] = round(self.report['total_rows'] / elapsed, 1) if elapsed else None
+        return self.report
+
+
+def import_students(stream, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import students from a text or binary stream and return the report."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    if not isinstance(stream, io.TextIOBase):
+        if isinstance(stream, io.RawIOBase):
+            stream = io.BufferedReader(stream)
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    return StudentImporter(chunk_size=chunk_size).run(iter_rows(stream, fmt))
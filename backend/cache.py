@@ -0,0 +1,190 @@
+"""
+Small TTL cache for expensive read endpoints (dashboard aggregates, ...).
+
+Entries live in-process by default. Setting CACHE_REDIS_URL in the app
+config shares them between workers through Redis (or anything speaking
+the Redis protocol); the `redis` package is only needed in that case.
+
+Invalidation is namespace based: every key is stored under the current
+generation of its namespace, so `invalidate()` is a single counter bump
+no matter how many keys are cached.
+"""
+import pickle
+import threading
+import time
+
+from flask import current_app, has_request_context, request
+
+
+class MemoryBackend:
+    """Process-local backend: a dict of key -> (expires_at, value)."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def incr(self, key):
+        with self._lock:
+            expires_at, value = self._data.get(key, (float('inf'), 0))
+            self._data[key] = (expires_at, value + 1)
+            return value + 1
+
+    def get_counter(self, key):
+        return self.get(key) or 0
+
+    def purge(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+
+class RedisBackend:
+    """Shared backend for multi-worker deployments."""
+
+    def __init__(self, url, client=None):
+        if client is None:
+            import redis  # optional dependency
+            client = redis.Redis.from_url(url)
+        self._client = client
+
+    def get(self, key):
+        raw = self._client.get(key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.setex(key, max(int(ttl), 1), pickle.dumps(value))
+
+    def incr(self, key):
+        return self._client.incr(key)
+
+    def get_counter(self, key):
+        # INCR stores a plain integer, not a pickle
+        raw = self._client.get(key)
+        return int(raw or 0)
+
+    def purge(self, prefix):
+        # Old generations simply expire through their TTL.
+        pass
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def _get_backend():
+    url = current_app.config.get('CACHE_REDIS_URL')
+    with _backends_lock:
+        if url not in _backends:
+            _backends[url] = RedisBackend(url) if url else MemoryBackend()
+        return _backends[url]
+
+
+def cache_bypassed():
+    """True when the current request asked to skip the cache (?nocache=1 or Cache-Control: no-cache)."""
+    if not has_request_context():
+        return False
+    if request.args.get('nocache', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'no-cache' in request.headers.get('Cache-Control', '')
+
+
+class TTLCache:
+    """A namespaced TTL cache with hit/miss counters."""
+
+    def __init__(self, namespace, ttl_config_key=None, default_ttl=60):
+        self.namespace = namespace
+        self.ttl_config_key = ttl_config_key
+        self.default_ttl = default_ttl
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'invalidations': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @property
+    def ttl(self):
+        if self.ttl_config_key:
+            return current_app.config.get(self.ttl_config_key, self.default_ttl)
+        return self.default_ttl
+
+    def _generation(self, backend):
+        return backend.get_counter(f'{self.namespace}:gen')
+
+    def _key(self, backend, key):
+        return f'{self.namespace}:{self._generation(backend)}:{key}'
+
+    def get_or_set(self, key, compute, ttl=None):
+        """Return the cached value for key, computing and storing it on a miss."""
+        if cache_bypassed():
+            self._count('bypassed')
+            return compute()
+
+        backend = _get_backend()
+        full_key = self._key(backend, key)
+        value = backend.get(full_key)
+        if value is not None:
+            self._count('hits')
+            return value
+
+        self._count('misses')
+        value = compute()
+        backend.set(full_key, value, ttl or self.ttl)
+        return value
+
+    def get(self, key):
+        """The cached value for key, or None. Not affected by ?nocache."""
+        backend = _get_backend()
+        return backend.get(self._key(backend, key))
+
+    def set(self, key, value, ttl=None):
+        backend = _get_backend()
+        backend.set(self._key(backend, key), value, ttl or self.ttl)
+
+    def invalidate(self):
+        """Drop every entry in this namespace."""
+        backend = _get_backend()
+        old_prefix = f'{self.namespace}:{self._generation(backend)}:'
+        backend.incr(f'{self.namespace}:gen')
+        backend.purge(old_prefix)
+        self._count('invalidations')
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0
+        stats['namespace'] = self.namespace
+        return stats
+
+
+# Dashboard aggregates; invalidated by the student, attendance,
+# assessment and behaviour write paths.
+dashboard_cache = TTLCache('dashboard', ttl_config_key='DASHBOARD_CACHE_TTL', default_ttl=60)
+
+# Per-term class/grade ranking snapshots; invalidated by the assessment
+# write paths and by student class changes and deletions.
+rankings_cache = TTLCache('rankings', ttl_config_key='RANKINGS_CACHE_TTL', default_ttl=300)
+
+# Teacher assignment listings (reference data, rarely written);
+# invalidated by assigning a teacher and deleting an assignment.
+assignments_cache = TTLCache('teacher_assignments', ttl_config_key='ASSIGNMENTS_CACHE_TTL', default_ttl=600)
+
+# Latest users.permissions_version per user id, published by auth when a
+# user's role or credentials change (see auth.py).
+permission_versions = TTLCache('permission_versions', ttl_config_key='AUTH_VERSION_TTL', default_ttl=86400)
@@ -7,8 +7,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from main import app
+    from app import app
     from models import db, Student, Guardian, EmergencyContact, Class
+    from student_ids import reserve_student_ids
     from datetime import date
     
     def create_test_data():
@@ -40,6 +41,9 @@ try:
                 ('Fiona', 'Garcia', date(2007, 12, 25), 'F', 6),
             ]
             
+            # Reserve a block of IDs up front (unused ones are left as gaps)
+            reserved_ids = iter(reserve_student_ids(len(students)))
+
             created_count = 0
             for first_name, last_name, dob, gender, class_id in students:
                 full_name = f"{first_name} {last_name}"
@@ -49,18 +53,7 @@ try:
                     print(f"⚠️  {full_name} already exists, skipping...")
                     continue
                 
-                # Generate student ID
-                last_student = Student.query.order_by(Student.student_id.desc()).first()
-                if last_student and str(last_student.student_id).startswith('RW-'):
-                    try:
-                        last_num = int(str(last_student.student_id).split('-')[1])
-                    except:
-                        last_num = 0
-                else:
-                    last_num = 0
-                
-                new_num = last_num + 1
-                student_id = f"RW-{new_num:03d}"
+                student_id = next(reserved_ids)
                 
                 # Create student
                 student = Student(
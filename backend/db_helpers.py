@@ -0,0 +1,30 @@
+"""Dialect-aware helpers shared by the bulk write paths."""
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db
+
+
+def dialect_name():
+    """Name of the dialect the session is bound to ('postgresql', 'sqlite', ...)."""
+    return db.session.get_bind().dialect.name
+
+
+def dialect_insert(model):
+    """An INSERT construct supporting on_conflict_do_update/do_nothing for the current database."""
+    return (pg_insert if dialect_name() == 'postgresql' else sqlite_insert)(model)
+
+
+def upsert_from_select(model, columns, key_columns, select_stmt):
+    """
+    INSERT INTO model (columns) SELECT ... ON CONFLICT (key_columns) DO UPDATE.
+
+    Every column not in key_columns is overwritten from the select; used to
+    refresh summary tables from grouped queries in one statement.
+    """
+    stmt = dialect_insert(model).from_select(columns, select_stmt)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={c: stmt.excluded[c] for c in columns if c not in key_columns}
+    )
+    db.session.execute(stmt)
@@ -0,0 +1,229 @@
+"""
+Versioned migrations.
+
+Migrations are files in migrations/ named NNNN_description.sql (or .py,
+see below) and applied in version order. Applied versions are recorded with a
+checksum in the `schema_migrations` table, so each file runs exactly once
+per database; a file edited after it was applied is reported as modified.
+
+models.py stays the source of truth for the full schema:
+
+  * an empty database is created from the models and every migration is
+    recorded as applied (the models already include their changes);
+  * an existing database first gets any brand-new tables from the models,
+    then the pending migrations, each in its own transaction. Migrations
+    therefore only alter tables that already exist, and should be
+    idempotent where the SQL allows it (IF NOT EXISTS, ...).
+
+Migrations are written in SQL both PostgreSQL and SQLite accept. A
+statement that only one of them supports (adding a constraint to an
+existing column, ...) goes after a `-- dialect: postgresql` line and is
+skipped on other databases.
+
+A NNNN_description.py migration defines upgrade(conn) and is for data
+migrations that reuse application code (e.g. rebuilding a summary table
+from the raw rows). While it runs, db.session is bound to the migration's
+connection, so the code it calls runs in the same transaction; it needs
+an app context, which migrate.py provides. It imports the current code,
+so it must still run against the schema as of its version.
+
+schema.sql is generated from the models with render_schema() (see
+migrate.py --dump-schema) so it cannot drift from them.
+"""
+import datetime
+import hashlib
+import importlib.util
+import os
+import re
+from collections import namedtuple
+from contextlib import contextmanager
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import DDL, CreateIndex, CreateTable
+
+from models import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+_FILENAME = re.compile(r'^(\d+)_(\w+)\.(sql|py)$')
+_DIALECT_GUARD = re.compile(r'^--\s*dialect:\s*(\w+)\s*$')
+
+# Kept out of db.metadata so create_all() and schema.sql never include it
+_tracking = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _tracking,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('checksum', String(64), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+Migration = namedtuple('Migration', 'version name path checksum')
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Return the migrations in `directory`, sorted by version."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, 'rb') as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations.append(Migration(int(match.group(1)), match.group(2), path, checksum))
+    migrations.sort()
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f'Duplicate migration versions in {directory}')
+    return migrations
+
+
+def split_statements(sql, dialect=None):
+    """
+    Split a migration file into statements (one per trailing ';', '--' comments dropped).
+
+    A CREATE TRIGGER statement runs up to its closing `END;` line. With a
+    dialect name, statements guarded for another dialect are left out.
+    """
+    statements, current, only = [], [], None
+    for line in sql.splitlines():
+        stripped = line.strip()
+        guard = _DIALECT_GUARD.match(stripped)
+        if guard and not current:
+            only = guard.group(1)
+        if not stripped or stripped.startswith('--'):
+            continue
+        current.append(line)
+        in_trigger = current[0].lstrip().upper().startswith('CREATE TRIGGER')
+        if stripped.endswith(';') and (not in_trigger or stripped.upper() == 'END;'):
+            if dialect is None or only in (None, dialect):
+                statements.append('\n'.join(current).rstrip().rstrip(';'))
+            current, only = [], None
+    if current and (dialect is None or only in (None, dialect)):
+        statements.append('\n'.join(current))
+    return statements
+
+
+def applied_migrations(conn):
+    """{version: checksum} of the migrations recorded in this database."""
+    _tracking.create_all(conn)
+    return dict(conn.execute(select(schema_migrations.c.version, schema_migrations.c.checksum)).all())
+
+
+def _record(conn, migration):
+    conn.execute(insert(schema_migrations).values(
+        version=migration.version, name=migration.name,
+        checksum=migration.checksum, applied_at=datetime.datetime.utcnow()
+    ))
+
+
+@contextmanager
+def _session_bound_to(conn):
+    """Point db.session at conn (inside its transaction) for the duration of the block."""
+    registry = db.session.registry
+    previous = registry() if registry.has() else None
+    session = Session(bind=conn, join_transaction_mode='create_savepoint')
+    registry.set(session)
+    try:
+        yield session
+    finally:
+        session.close()
+        if previous is not None:
+            registry.set(previous)
+        else:
+            registry.clear()
+
+
+def _run_python(conn, migration):
+    spec = importlib.util.spec_from_file_location(f'migration_{migration.version:04d}', migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    with _session_bound_to(conn):
+        module.upgrade(conn)
+
+
+def migration_status(engine, directory=MIGRATIONS_DIR):
+    """List of (migration, state) with state 'applied', 'pending' or 'modified'."""
+    with engine.begin() as conn:
+        applied = applied_migrations(conn)
+    status = []
+    for migration in discover_migrations(directory):
+        if migration.version not in applied:
+            state = 'pending'
+        elif applied[migration.version] != migration.checksum:
+            state = 'modified'
+        else:
+            state = 'applied'
+        status.append((migration, state))
+    return status
+
+
+def apply_migrations(engine, directory=MIGRATIONS_DIR, metadata=None):
+    """
+    Bring the database up to date and return the migrations that were run.
+
+    Returns an empty list for a fresh database, which is created from the
+    models and stamped with every migration instead.
+    """
+    metadata = metadata if metadata is not None else db.metadata
+    migrations = discover_migrations(directory)
+    existing = set(inspect(engine).get_table_names())
+    fresh = not existing.intersection(metadata.tables)
+
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        applied = applied_migrations(conn)
+        if fresh:
+            for migration in migrations:
+                if migration.version not in applied:
+                    _record(conn, migration)
+            return []
+
+    ran = []
+    for migration in migrations:
+        if migration.version in applied:
+            continue
+        with engine.begin() as conn:
+            if migration.path.endswith('.py'):
+                _run_python(conn, migration)
+            else:
+                with open(migration.path, encoding='utf-8') as f:
+                    for statement in split_statements(f.read(), engine.dialect.name):
+                        conn.exec_driver_sql(statement)
+            _record(conn, migration)
+        ran.append(migration)
+    return ran
+
+
+def _listener_ddl(table, event_name, dialect):
+    """Statements of the DDL() listeners attached to a table event that apply to `dialect`."""
+    statements = []
+    for listener in getattr(table.dispatch, event_name):
+        if not isinstance(listener, DDL):
+            continue
+        ddl_if = getattr(listener, '_ddl_if', None)
+        if ddl_if is None or ddl_if.dialect in (None, dialect.name):
+            statements.append(listener.statement.strip() + ';')
+    return statements
+
+
+def render_schema(metadata=None, dialect=None):
+    """DDL for every model table and index (and DDL() hooks around them), as PostgreSQL by default."""
+    metadata = metadata if metadata is not None else db.metadata
+    dialect = dialect or postgresql.dialect()
+    parts = ['-- Generated from models.py by `python migrate.py --dump-schema`; do not edit by hand.\n']
+    for table in metadata.sorted_tables:
+        before = _listener_ddl(table, 'before_create', dialect)
+        if before:
+            parts.extend(before + [''])
+        parts.append(str(CreateTable(table).compile(dialect=dialect)).strip() + ';\n')
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            parts.append(str(CreateIndex(index).compile(dialect=dialect)).strip() + ';')
+        parts.extend(_listener_ddl(table, 'after_create', dialect))
+        if table.indexes:
+            parts.append('')
+    return '\n'.join(line.rstrip() for line in '\n'.join(parts).splitlines()).rstrip() + '\n'
@@ -0,0 +1,190 @@
+"""
+Set-based early-warning engine.
+
+Computes every student's average score, attendance rate and negative
+behaviour count in a single grouped query (one aggregate subquery per
+source, outer-joined onto students; scores and attendance are read from
+their summary tables) and turns them into a weighted risk score that can
+be sorted, filtered and paginated in SQL.
+"""
+from flask import current_app
+from sqlalchemy import func, case
+
+from models import db, Student, AssessmentAggregate, AttendanceTermRollup, Behavioral
+from assessment_aggregates import average_percentage
+
+# Defaults can be overridden through app.config['EARLY_WARNING_THRESHOLDS']
+# and app.config['EARLY_WARNING_WEIGHTS'], or per request.
+DEFAULT_THRESHOLDS = {
+    'min_score': 50.0,            # average percentage below this is a risk
+    'min_attendance': 50.0,       # attendance rate (%) below this is a risk
+    'max_incidents': 0,           # negative behaviours above this are a risk
+    'incidents_for_max_risk': 5,  # incidents over the limit that saturate the behaviour risk
+}
+
+DEFAULT_WEIGHTS = {
+    'score': 0.5,
+    'attendance': 0.3,
+    'behavior': 0.2,
+}
+
+
+def get_thresholds(overrides=None):
+    """Merge configured thresholds with per-request overrides."""
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    thresholds.update(current_app.config.get('EARLY_WARNING_THRESHOLDS', {}))
+    thresholds.update({k: v for k, v in (overrides or {}).items() if v is not None})
+    return thresholds
+
+
+def get_weights(overrides=None):
+    """Merge configured weights with per-request overrides."""
+    weights = dict(DEFAULT_WEIGHTS)
+    weights.update(current_app.config.get('EARLY_WARNING_WEIGHTS', {}))
+    weights.update({k: v for k, v in (overrides or {}).items() if v is not None})
+    return weights
+
+
+def _score_stats():
+    # Reads the per student/subject/term aggregates rather than every assessment
+    return db.session.query(
+        AssessmentAggregate.student_id.label('student_id'),
+        average_percentage().label('avg_score')
+    ).group_by(AssessmentAggregate.student_id).subquery('score_stats')
+
+
+def _attendance_stats():
+    # Reads the per student per term rollup: O(students x terms), not O(rows)
+    return db.session.query(
+        AttendanceTermRollup.student_id.label('student_id'),
+        func.sum(AttendanceTermRollup.total).label('total'),
+        func.sum(AttendanceTermRollup.present).label('present')
+    ).group_by(AttendanceTermRollup.student_id).subquery('attendance_stats')
+
+
+def _behavior_stats():
+    return db.session.query(
+        Behavioral.student_id.label('student_id'),
+        func.count(Behavioral.behavior_id).label('incidents')
+    ).filter(Behavioral.behavior_type == 'negative').group_by(Behavioral.student_id).subquery('behavior_stats')
+
+
+def _shortfall(value, threshold):
+    """0..1 risk for a percentage that falls below its threshold (NULL = no data = no risk)."""
+    if threshold <= 0:
+        return 0.0
+    return case((value < threshold, (threshold - value) / float(threshold)), else_=0.0)
+
+
+def risk_query(class_id=None, thresholds=None, weights=None):
+    """
+    Build the per-student risk query.
+
+    Returns a subquery with one row per student: student_id, full_name,
+    class_id, avg_score, attendance_rate, incidents and the weighted
+    risk_score (0-100).
+    """
+    thresholds = thresholds or get_thresholds()
+    weights = weights or get_weights()
+
+    scores = _score_stats()
+    attendance = _attendance_stats()
+    behavior = _behavior_stats()
+
+    attendance_rate = case(
+        (attendance.c.total > 0, attendance.c.present * 100.0 / attendance.c.total),
+        else_=None
+    )
+    incidents = func.coalesce(behavior.c.incidents, 0)
+
+    over_limit = incidents - thresholds['max_incidents']
+    saturation = max(float(thresholds['incidents_for_max_risk']), 1.0)
+    behavior_risk = case(
+        (over_limit >= saturation, 1.0),
+        (over_limit > 0, over_limit / saturation),
+        else_=0.0
+    )
+
+    risk_score = (
+        weights['score'] * func.coalesce(_shortfall(scores.c.avg_score, thresholds['min_score']), 0.0)
+        + weights['attendance'] * func.coalesce(_shortfall(attendance_rate, thresholds['min_attendance']), 0.0)
+        + weights['behavior'] * behavior_risk
+    ) * 100.0
+
+    query = db.session.query(
+        Student.student_id.label('student_id'),
+        Student.full_name.label('full_name'),
+        Student.class_id.label('class_id'),
+        scores.c.avg_score.label('avg_score'),
+        attendance_rate.label('attendance_rate'),
+        incidents.label('incidents'),
+        risk_score.label('risk_score')
+    ).outerjoin(
+        scores, scores.c.student_id == Student.student_id
+    ).outerjoin(
+        attendance, attendance.c.student_id == Student.student_id
+    ).outerjoin(
+        behavior, behavior.c.student_id == Student.student_id
+    )
+
+    if class_id is not None:
+        query = query.filter(Student.class_id == class_id)
+
+    return query.subquery('risk')
+
+
+def at_risk_students(class_id=None, page=1, per_page=50, thresholds=None, weights=None, min_risk=0.0):
+    """
+    Return one page of at-risk students sorted by risk (highest first).
+
+    Everything, including the total row count, is computed in a single
+    round trip; only a page past the end needs a second query for the total.
+    """
+    thresholds = thresholds or get_thresholds()
+    weights = weights or get_weights()
+    risk = risk_query(class_id=class_id, thresholds=thresholds, weights=weights)
+
+    at_risk = risk.c.risk_score > min_risk
+    rows = db.session.query(
+        risk,
+        func.count().over().label('total')
+    ).filter(
+        at_risk
+    ).order_by(
+        risk.c.risk_score.desc(), risk.c.student_id
+    ).limit(per_page).offset((page - 1) * per_page).all()
+
+    alerts = []
+    for r in rows:
+        flags = []
+        if r.avg_score is not None and r.avg_score < thresholds['min_score']:
+            flags.append('low_score')
+        if r.attendance_rate is not None and r.attendance_rate < thresholds['min_attendance']:
+            flags.append('low_attendance')
+        if r.incidents > thresholds['max_incidents']:
+            flags.append('behavior')
+        alerts.append({
+            'student_id': r.student_id,
+            'name': r.full_name,
+            'class_id': r.class_id,
+            'avg_score': round(r.avg_score, 2) if r.avg_score is not None else None,
+            'attendance_rate': round(r.attendance_rate, 2) if r.attendance_rate is not None else None,
+            'misconduct_issues': r.incidents,
+            'risk_score': round(r.risk_score, 2),
+            'flags': flags
+        })
+
+    if rows:
+        total = rows[0].total
+    elif page > 1:
+        # Past the last page there is no row to carry the window count
+        total = db.session.query(func.count()).select_from(risk).filter(at_risk).scalar()
+    else:
+        total = 0
+
+    return {
+        'alerts': alerts,
+        'page': page,
+        'per_page': per_page,
+        'total': total
+    }
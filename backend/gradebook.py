@@ -0,0 +1,142 @@
+"""
+Class gradebook matrix.
+
+Fetches per student per column average percentages in one grouped,
+columnar query and pivots them with NumPy into a dense students x
+columns matrix, with per-student and per-column averages. Columns are
+either subjects or individual assessments (subject, type and date).
+Subject columns are read from the assessment aggregates.
+"""
+import numpy as np
+from sqlalchemy import String, cast, func, null, select, union_all
+
+from models import db, Assessment, AssessmentAggregate, Student
+from assessment_aggregates import average_percentage
+from subjects import subject_name
+
+COLUMN_MODES = ('subject', 'assessment')
+
+
+def _column_keys(mode):
+    if mode == 'subject':
+        return [Assessment.subject_id]
+    # Dates come back as text so no per-row date conversion is needed
+    return [Assessment.subject_id, Assessment.assessment_type, cast(Assessment.date_taken, String)]
+
+
+def _factorize(keys):
+    """
+    Map each key to a dense integer code in sorted key order.
+
+    Returns (codes, labels) with labels[codes[i]] == keys[i]. Hashing
+    first keeps this O(n); only the distinct labels are sorted.
+    """
+    index = {}
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.intp, count=len(keys))
+    labels = sorted(index)
+    remap = np.empty(len(labels), dtype=np.intp)
+    remap[[index[label] for label in labels]] = np.arange(len(labels))
+    return remap[codes], labels
+
+
+def _fetch(class_id, term, academic_year, mode):
+    keys = _column_keys(mode)
+    class_students = select(Student.student_id).where(Student.class_id == class_id)
+    conditions = [Assessment.student_id.in_(class_students), Assessment.max_score > 0]
+    if term:
+        conditions.append(Assessment.term == term)
+    if academic_year:
+        conditions.append(Assessment.academic_year == academic_year)
+
+    if mode == 'subject':
+        # Subject averages come from the per student/subject/year/term aggregates:
+        # one row per cell (or per term) instead of one per assessment
+        conditions = [AssessmentAggregate.student_id.in_(class_students)]
+        if term:
+            conditions.append(AssessmentAggregate.term == term)
+        if academic_year:
+            conditions.append(AssessmentAggregate.academic_year == academic_year)
+        grades = select(
+            AssessmentAggregate.student_id, null(), AssessmentAggregate.subject_id, average_percentage()
+        ).where(*conditions).group_by(AssessmentAggregate.student_id, AssessmentAggregate.subject_id)
+    else:
+        # Grades are aggregated straight off the (student_id, subject_id, ...) index
+        grades = select(
+            Assessment.student_id, null(), *keys,
+            func.avg(Assessment.score * 100.0 / Assessment.max_score)
+        ).where(*conditions).group_by(Assessment.student_id, *keys)
+
+    # The roster rows (no key, no value) carry names and keep students without
+    # grades in the matrix. One statement, one round trip.
+    roster = select(
+        Student.student_id, Student.full_name, *[null() for _ in keys], null()
+    ).where(Student.class_id == class_id)
+
+    # Plain Core execution: no ORM row processing for a purely columnar result
+    return db.session.connection().execute(union_all(grades, roster)).all()
+
+
+def _to_json(values):
+    """Round to 2 places and turn NaN (no grade) into None, for 1-D or 2-D arrays."""
+    rounded = np.round(values, 2).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+
+def build_gradebook(class_id, term=None, academic_year=None, mode='subject'):
+    """
+    Return the gradebook for a class as column headers plus arrays:
+
+      students / names         - row labels (sorted by name)
+      columns                  - column labels
+      matrix                   - rows of average percentages (None = no grade)
+      student_averages         - mean of each row's grades
+      column_averages          - mean of each column's grades
+      class_average            - mean of all grades
+    """
+    if mode not in COLUMN_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(COLUMN_MODES)}")
+    rows = _fetch(class_id, term, academic_year, mode)
+    if not rows:
+        return {'students': [], 'names': [], 'columns': [], 'matrix': [],
+                'student_averages': [], 'column_averages': [], 'class_average': None}
+
+    student_ids, names, *key_columns, values = zip(*rows)
+    values = np.array(values, dtype=float)  # None -> nan
+    graded = ~np.isnan(values)
+
+    roster = sorted(
+        ((name, student_id) for student_id, name, ok in zip(student_ids, names, graded.tolist()) if not ok),
+        key=lambda r: (r[0] or '', r[1])
+    )
+    row_labels = [student_id for _, student_id in roster]
+    row_of = {student_id: i for i, student_id in enumerate(row_labels)}
+
+    # Subject ids become names (from the subject cache) before columns are sorted
+    names_by_id = {subject_id: subject_name(subject_id) for subject_id in set(key_columns[0]) if subject_id is not None}
+    keys = [(names_by_id.get(key[0]),) + key[1:] for key in zip(*key_columns)]
+    graded_rows = [(student_id, key) for student_id, key, ok in zip(student_ids, keys, graded.tolist()) if ok]
+    row_index = np.fromiter((row_of[student_id] for student_id, _ in graded_rows), dtype=np.intp, count=len(graded_rows))
+    column_index, column_keys = _factorize([key for _, key in graded_rows])
+
+    matrix = np.full((len(row_labels), len(column_keys)), np.nan)
+    matrix[row_index, column_index] = values[graded]
+
+    present = ~np.isnan(matrix)
+    counts_by_row = present.sum(axis=1)
+    counts_by_column = present.sum(axis=0)
+    filled = np.where(present, matrix, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        student_averages = filled.sum(axis=1) / counts_by_row
+        column_averages = filled.sum(axis=0) / counts_by_column
+    total = present.sum()
+
+    return {
+        'students': row_labels,
+        'names': [name for name, _ in roster],
+        'columns': [' '.join(str(part) for part in key) for key in column_keys],
+        'matrix': _to_json(matrix),
+        'student_averages': _to_json(student_averages),
+        'column_averages': _to_json(column_averages),
+        'class_average': round(float(filled.sum() / total), 2) if total else None,
+    }
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Bulk-import students from a CSV or NDJSON file.
+
+    python import_students.py students.csv
+    python import_students.py students.ndjson --chunk-size 5000 --report report.json
+
+See bulk_import.py for the accepted columns.
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from bulk_import import import_students, detect_format, DEFAULT_CHUNK_SIZE, FORMATS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-import students from a CSV or NDJSON file.')
+    parser.add_argument('path', help='file to import')
+    parser.add_argument('--format', choices=FORMATS, help='defaults to the file extension')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--report', help='write the full JSON report (including row errors) here')
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    with app.app_context(), open(args.path, encoding='utf-8-sig', newline='') as f:
+        report = import_students(f, fmt, chunk_size=args.chunk_size)
+
+    print(f"Imported {report['imported']} of {report['total_rows']} rows "
+          f"in {report['elapsed_ms'] / 1000:.1f}s ({report['rows_per_second']} rows/s)")
+    if report['classes_created']:
+        print(f"Created classes: {', '.join(str(c) for c in report['classes_created'])}")
+    for error in report['errors'][:20]:
+        print(f"  line {error['row']}: {'; '.join(error['errors'])}")
+    if len(report['errors']) > 20:
+        print(f"  ... and {len(report['errors']) - 20} more")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return 0 if not report['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
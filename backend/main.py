@@ -21,6 +21,8 @@ from routes.attendance import attendance_bp
 from routes.participation import participation_bp
 from routes.behavioral import behavioral_bp
 from routes.admin import admin_bp
+from auth import login_user
+from routes.dashboard import dashboard_bp
 
 #initialazing the flask application
 app = Flask(__name__)
@@ -30,7 +32,7 @@ CORS(
     supports_credentials=True,
     allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    expose_headers=["Content-Type", "Authorization"]
+    expose_headers=["Content-Type", "Authorization", "X-Next-Cursor"]
 )
 app.secret_key = 'your_secret_key'
 
@@ -41,26 +43,6 @@ app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=30)
 db.init_app(app)
 
 # (Model definitions removed. Use: from models import User, ...)
-# Define a user model for the users table
-class User(db.Model):
-    __tablename__ = 'users'
-    user_id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(50), unique=True, nullable=False)
-    password_hash = db.Column(db.Text, nullable=False)
-    role = db.Column(db.String(20), nullable=False)
-    email = db.Column(db.String(100))
-
-
-# -------------------- MODELS --------------------
-# Define a user model for the users table
-class User(db.Model):
-    __tablename__ = 'users'
-    user_id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(50), unique=True, nullable=False)
-    password_hash = db.Column(db.Text, nullable=False)
-    role = db.Column(db.String(20), nullable=False)
-    email = db.Column(db.String(100))
-# (Model definitions removed. Use: from models import User, ...)
 
 
 # -------------------- ROUTES --------------------
@@ -124,9 +106,7 @@ def api_login():
         
         user = User.query.filter_by(username=username).first()
         if user:
-            session['user_id'] = user.user_id
-            session['username'] = user.username
-            session.permanent = remember
+            login_user(user, remember=remember)
             return jsonify({'success': True, 'username': user.username, 'role': user.role})
         return jsonify({'success': False, 'message': 'Invalid username'}), 401
     
@@ -192,4 +172,5 @@ if __name__ == '__main__':
     app.register_blueprint(participation_bp, url_prefix='/participation')
     app.register_blueprint(behavioral_bp, url_prefix='/behavioral')
     app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(dashboard_bp)
     app.run(debug=True, host='127.0.0.1', port=5051)
\ No newline at end of file
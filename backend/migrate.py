@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Apply the versioned migrations in migrations/.
+
+    python migrate.py                # apply pending migrations
+    python migrate.py --status       # list applied / pending / modified migrations
+    python migrate.py --dump-schema  # regenerate schema.sql from models.py
+
+See db_migrations.py for how fresh and existing databases are handled.
+"""
+import argparse
+import os
+import sys
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db_migrations import SCHEMA_FILE, apply_migrations, migration_status, render_schema
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply the versioned migrations.')
+    parser.add_argument('--status', action='store_true', help='show migration state and exit')
+    parser.add_argument('--dump-schema', action='store_true', help=f'write {os.path.basename(SCHEMA_FILE)} and exit')
+    args = parser.parse_args()
+
+    if args.dump_schema:
+        with open(SCHEMA_FILE, 'w', encoding='utf-8') as f:
+            f.write(render_schema())
+        print(f"Wrote {SCHEMA_FILE}")
+        return
+
+    from app import app
+    from models import db
+
+    with app.app_context():
+        if args.status:
+            for migration, state in migration_status(db.engine):
+                print(f"{migration.version:04d} {migration.name:<40} {state}")
+            return
+
+        ran = apply_migrations(db.engine)
+        if ran:
+            for migration in ran:
+                print(f"Applied {migration.version:04d}_{migration.name}")
+        else:
+            print("Database is up to date")
+
+
+if __name__ == '__main__':
+    main()
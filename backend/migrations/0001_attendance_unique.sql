@@ -0,0 +1,10 @@
+-- One attendance mark per student per class per day.
+-- Keep the most recent row of any existing duplicates, then enforce the key
+-- that the attendance write paths upsert on.
+DELETE FROM attendance
+WHERE attendance_id NOT IN (
+    SELECT MAX(attendance_id) FROM attendance GROUP BY student_id, class_id, date
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_attendance_student_class_date
+    ON attendance (student_id, class_id, date);
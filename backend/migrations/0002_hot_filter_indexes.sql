@@ -0,0 +1,18 @@
+-- Indexes for the columns the list, export and dashboard queries filter on.
+-- (student_id, class_id, date) is already covered by uq_attendance_student_class_date.
+CREATE INDEX IF NOT EXISTS ix_students_class_id ON students (class_id);
+CREATE INDEX IF NOT EXISTS ix_guardians_student_id ON guardians (student_id);
+CREATE INDEX IF NOT EXISTS ix_emergency_contacts_student_id ON emergency_contacts (student_id);
+
+CREATE INDEX IF NOT EXISTS ix_attendance_class_date ON attendance (class_id, date);
+CREATE INDEX IF NOT EXISTS ix_attendance_date ON attendance (date);
+
+CREATE INDEX IF NOT EXISTS ix_assessments_student_subject_term ON assessments (student_id, subject_name, term);
+CREATE INDEX IF NOT EXISTS ix_assessments_subject_term ON assessments (subject_name, term);
+
+CREATE INDEX IF NOT EXISTS ix_behavior_student_date ON behavior (student_id, date);
+CREATE INDEX IF NOT EXISTS ix_behavior_type_date ON behavior (behavior_type, date);
+CREATE INDEX IF NOT EXISTS ix_behavior_date ON behavior (date);
+
+CREATE INDEX IF NOT EXISTS ix_participation_date ON participation (date);
+CREATE INDEX IF NOT EXISTS ix_participation_student_date ON participation (student_id, date);
@@ -0,0 +1,67 @@
+-- Normalized subjects. The subjects table itself is created from the models;
+-- fill it with one row per distinct free-text name (case and surrounding
+-- spaces ignored, most used spelling kept), then point assessments and
+-- teacher assignments at it.
+INSERT INTO subjects (name)
+SELECT name FROM (
+    SELECT TRIM(name) AS name,
+           ROW_NUMBER() OVER (PARTITION BY LOWER(TRIM(name)) ORDER BY COUNT(*) DESC, TRIM(name)) AS spelling_rank
+    FROM (
+        SELECT subject_name AS name FROM assessments
+        UNION ALL
+        SELECT subject AS name FROM teacher_class_subject
+    ) names
+    GROUP BY TRIM(name)
+) spellings
+WHERE spelling_rank = 1 AND LOWER(name) NOT IN (SELECT LOWER(name) FROM subjects);
+
+-- subject_id was hard-coded to 1; subject_name becomes the canonical spelling
+UPDATE assessments SET
+    subject_id = (SELECT s.subject_id FROM subjects s WHERE LOWER(s.name) = LOWER(TRIM(assessments.subject_name))),
+    subject_name = (SELECT s.name FROM subjects s WHERE LOWER(s.name) = LOWER(TRIM(assessments.subject_name)));
+
+-- dialect: postgresql
+ALTER TABLE assessments ADD CONSTRAINT assessments_subject_id_fkey
+    FOREIGN KEY (subject_id) REFERENCES subjects (subject_id);
+
+DROP INDEX IF EXISTS ix_assessments_student_subject_term;
+DROP INDEX IF EXISTS ix_assessments_subject_term;
+CREATE INDEX IF NOT EXISTS ix_assessments_student_subject_term ON assessments (student_id, subject_id, term);
+CREATE INDEX IF NOT EXISTS ix_assessments_subject_term ON assessments (subject_id, term);
+
+-- teacher_class_subject.subject (free text) -> subject_id
+ALTER TABLE teacher_class_subject ADD COLUMN subject_id INTEGER REFERENCES subjects (subject_id);
+
+UPDATE teacher_class_subject SET
+    subject_id = (SELECT s.subject_id FROM subjects s WHERE LOWER(s.name) = LOWER(TRIM(teacher_class_subject.subject)));
+
+-- SQLite cannot add NOT NULL to an existing column; the model enforces it there
+-- dialect: postgresql
+ALTER TABLE teacher_class_subject ALTER COLUMN subject_id SET NOT NULL;
+
+ALTER TABLE teacher_class_subject DROP COLUMN subject;
+
+-- The score aggregates were keyed by subject_name: rebuild them keyed by subject_id
+DROP TABLE IF EXISTS assessment_aggregates;
+
+CREATE TABLE assessment_aggregates (
+    student_id VARCHAR NOT NULL,
+    subject_id INTEGER NOT NULL,
+    term VARCHAR(20) NOT NULL,
+    assessment_count INTEGER NOT NULL,
+    percentage_sum FLOAT NOT NULL,
+    percentage_sq_sum FLOAT NOT NULL,
+    last_date DATE,
+    PRIMARY KEY (student_id, subject_id, term),
+    FOREIGN KEY (student_id) REFERENCES students (student_id) ON DELETE CASCADE,
+    FOREIGN KEY (subject_id) REFERENCES subjects (subject_id)
+);
+
+INSERT INTO assessment_aggregates
+    (student_id, subject_id, term, assessment_count, percentage_sum, percentage_sq_sum, last_date)
+SELECT student_id, subject_id, COALESCE(term, ''), COUNT(assessment_id),
+       SUM(score * 100.0 / max_score), SUM((score * 100.0 / max_score) * (score * 100.0 / max_score)),
+       MAX(date_taken)
+FROM assessments
+WHERE max_score > 0
+GROUP BY student_id, subject_id, COALESCE(term, '');
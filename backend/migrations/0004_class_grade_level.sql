@@ -0,0 +1,4 @@
+-- Grade level shared by the classes (streams) of one grade, used to rank
+-- students across a grade. NULL means the class is a grade of its own,
+-- identified by class_name.
+ALTER TABLE classes ADD COLUMN grade_level VARCHAR(20);
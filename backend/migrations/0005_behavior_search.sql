@@ -0,0 +1,41 @@
+-- Keyset pagination on (date, behavior_id): behavior_id joins the date indexes.
+DROP INDEX IF EXISTS ix_behavior_student_date;
+DROP INDEX IF EXISTS ix_behavior_type_date;
+DROP INDEX IF EXISTS ix_behavior_date;
+CREATE INDEX IF NOT EXISTS ix_behavior_student_date ON behavior (student_id, date, behavior_id);
+CREATE INDEX IF NOT EXISTS ix_behavior_type_date ON behavior (behavior_type, date, behavior_id);
+CREATE INDEX IF NOT EXISTS ix_behavior_date ON behavior (date, behavior_id);
+
+-- Substring search on category/notes. PostgreSQL: trigram GIN indexes serve
+-- ILIKE '%term%' directly.
+-- dialect: postgresql
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+-- dialect: postgresql
+CREATE INDEX IF NOT EXISTS ix_behavior_category_trgm ON behavior USING gin (category gin_trgm_ops);
+-- dialect: postgresql
+CREATE INDEX IF NOT EXISTS ix_behavior_notes_trgm ON behavior USING gin (notes gin_trgm_ops);
+
+-- SQLite: an external-content FTS5 table with the trigram tokenizer, kept in
+-- sync by triggers (same DDL as BEHAVIOR_SEARCH_DDL in models.py), then filled
+-- from the existing rows.
+-- dialect: sqlite
+CREATE VIRTUAL TABLE IF NOT EXISTS behavior_search USING fts5(
+    category, notes, content='behavior', content_rowid='behavior_id', tokenize='trigram'
+);
+-- dialect: sqlite
+CREATE TRIGGER IF NOT EXISTS behavior_search_ai AFTER INSERT ON behavior BEGIN
+    INSERT INTO behavior_search (rowid, category, notes) VALUES (new.behavior_id, new.category, new.notes);
+END;
+-- dialect: sqlite
+CREATE TRIGGER IF NOT EXISTS behavior_search_ad AFTER DELETE ON behavior BEGIN
+    INSERT INTO behavior_search (behavior_search, rowid, category, notes)
+    VALUES ('delete', old.behavior_id, old.category, old.notes);
+END;
+-- dialect: sqlite
+CREATE TRIGGER IF NOT EXISTS behavior_search_au AFTER UPDATE ON behavior BEGIN
+    INSERT INTO behavior_search (behavior_search, rowid, category, notes)
+    VALUES ('delete', old.behavior_id, old.category, old.notes);
+    INSERT INTO behavior_search (rowid, category, notes) VALUES (new.behavior_id, new.category, new.notes);
+END;
+-- dialect: sqlite
+INSERT INTO behavior_search (behavior_search) VALUES ('rebuild');
@@ -0,0 +1,17 @@
+-- Numeric participation rating, set from status on every write
+-- (models.PARTICIPATION_RATINGS); backfill it once for existing rows.
+ALTER TABLE participation ADD COLUMN rating SMALLINT;
+
+UPDATE participation SET rating = CASE LOWER(TRIM(status))
+    WHEN 'excellent' THEN 5
+    WHEN 'good' THEN 4
+    WHEN 'average' THEN 3
+    WHEN 'poor' THEN 2
+    WHEN 'none' THEN 1
+END;
+
+-- Records written before class_id was filled in count for the student's class
+UPDATE participation SET class_id = (SELECT s.class_id FROM students s WHERE s.student_id = participation.student_id)
+WHERE class_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_participation_class_date ON participation (class_id, date);
@@ -0,0 +1,11 @@
+-- One assignment per teacher, class and subject.
+-- Keep the oldest row of any existing duplicates, then enforce the key.
+DELETE FROM teacher_class_subject
+WHERE id NOT IN (
+    SELECT MIN(id) FROM teacher_class_subject GROUP BY teacher_id, class_id, subject_id
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_teacher_class_subject
+    ON teacher_class_subject (teacher_id, class_id, subject_id);
+
+CREATE INDEX IF NOT EXISTS ix_teacher_class_subject_class ON teacher_class_subject (class_id);
@@ -0,0 +1,3 @@
+-- Version of a user's role and credentials, stored in their session at
+-- login; see auth.py.
+ALTER TABLE users ADD COLUMN permissions_version INTEGER NOT NULL DEFAULT 1;
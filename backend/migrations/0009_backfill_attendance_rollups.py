@@ -0,0 +1,6 @@
+"""Fill attendance_daily_rollup and attendance_term_rollup from the attendance rows recorded before them."""
+from attendance_rollup import rebuild_attendance_rollups
+
+
+def upgrade(conn):
+    rebuild_attendance_rollups()
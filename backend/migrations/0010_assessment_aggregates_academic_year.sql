@@ -0,0 +1,26 @@
+-- The score aggregates mixed same-named terms of different academic years:
+-- rebuild them keyed by (student_id, subject_id, academic_year, term)
+DROP TABLE IF EXISTS assessment_aggregates;
+
+CREATE TABLE assessment_aggregates (
+    student_id VARCHAR NOT NULL,
+    subject_id INTEGER NOT NULL,
+    academic_year VARCHAR(10) NOT NULL,
+    term VARCHAR(20) NOT NULL,
+    assessment_count INTEGER NOT NULL,
+    percentage_sum FLOAT NOT NULL,
+    percentage_sq_sum FLOAT NOT NULL,
+    last_date DATE,
+    PRIMARY KEY (student_id, subject_id, academic_year, term),
+    FOREIGN KEY (student_id) REFERENCES students (student_id) ON DELETE CASCADE,
+    FOREIGN KEY (subject_id) REFERENCES subjects (subject_id)
+);
+
+INSERT INTO assessment_aggregates
+    (student_id, subject_id, academic_year, term, assessment_count, percentage_sum, percentage_sq_sum, last_date)
+SELECT student_id, subject_id, COALESCE(academic_year, ''), COALESCE(term, ''), COUNT(assessment_id),
+       SUM(score * 100.0 / max_score), SUM((score * 100.0 / max_score) * (score * 100.0 / max_score)),
+       MAX(date_taken)
+FROM assessments
+WHERE max_score > 0
+GROUP BY student_id, subject_id, COALESCE(academic_year, ''), COALESCE(term, '');
@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import validates
 
 # Initialize the database
 
@@ -11,6 +13,8 @@ class User(db.Model):
     password_hash = db.Column(db.Text, nullable=False)
     role = db.Column(db.String(20), nullable=False)
     email = db.Column(db.String(100))
+    # Bumped when the role or credentials change; sessions holding an older value are re-validated
+    permissions_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     # Relationships
     parent = db.relationship('Parent', backref='user', uselist=False)
     teacher = db.relationship('Teacher', backref='user', uselist=False)
@@ -27,6 +31,9 @@ class Parent(db.Model):
 
 class Student(db.Model):
     __tablename__ = 'students'
+    __table_args__ = (
+        db.Index('ix_students_class_id', 'class_id'),
+    )
     student_id = db.Column(db.String, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
     gender = db.Column(db.String(10))
@@ -43,6 +50,12 @@ class Student(db.Model):
     guardians = db.relationship('Guardian', backref='student', cascade='all, delete-orphan')
     emergency_contacts = db.relationship('EmergencyContact', backref='student', cascade='all, delete-orphan')
 
+class IdSequence(db.Model):
+    """Counter table standing in for database sequences where they are unavailable (SQLite)"""
+    __tablename__ = 'id_sequences'
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False)
+
 class StudentParentLink(db.Model):
     __tablename__ = 'student_parent_link'
     id = db.Column(db.Integer, primary_key=True)
@@ -66,6 +79,7 @@ class Class(db.Model):
     __tablename__ = 'classes'
     class_id = db.Column(db.Integer, primary_key=True)
     class_name = db.Column(db.String(50), nullable=False)
+    grade_level = db.Column(db.String(20))  # Classes sharing a grade are ranked together; defaults to class_name
     teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.teacher_id'))
     # Relationships
     students = db.relationship('Student', backref='class_')
@@ -74,18 +88,58 @@ class Class(db.Model):
 
 class Attendance(db.Model):
     __tablename__ = 'attendance'
+    __table_args__ = (
+        # One mark per student per class per day; writes upsert on this key
+        db.Index('uq_attendance_student_class_date', 'student_id', 'class_id', 'date', unique=True),
+        db.Index('ix_attendance_class_date', 'class_id', 'date'),
+        db.Index('ix_attendance_date', 'date'),
+    )
     attendance_id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String, db.ForeignKey('students.student_id'))
     class_id = db.Column(db.Integer, db.ForeignKey('classes.class_id'))
     date = db.Column(db.Date, nullable=False)
     status = db.Column(db.String(10), nullable=False)
 
+class AttendanceDailyRollup(db.Model):
+    """Attendance counts per class per day, maintained by the attendance write paths"""
+    __tablename__ = 'attendance_daily_rollup'
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.class_id', ondelete='CASCADE'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+    late = db.Column(db.Integer, nullable=False, default=0)
+    excused = db.Column(db.Integer, nullable=False, default=0)
+
+class AttendanceTermRollup(db.Model):
+    """Attendance counts per student per academic term, maintained by the attendance write paths"""
+    __tablename__ = 'attendance_term_rollup'
+    student_id = db.Column(db.String, db.ForeignKey('students.student_id', ondelete='CASCADE'), primary_key=True)
+    academic_year = db.Column(db.String(10), primary_key=True)  # '2024-2025'
+    term = db.Column(db.String(20), primary_key=True)  # 'Term 1', 'Term 2', 'Term 3'
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+    late = db.Column(db.Integer, nullable=False, default=0)
+    excused = db.Column(db.Integer, nullable=False, default=0)
+
+class Subject(db.Model):
+    __tablename__ = 'subjects'
+    subject_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+
 class Assessment(db.Model):
     __tablename__ = 'assessments'
+    __table_args__ = (
+        db.Index('ix_assessments_student_subject_term', 'student_id', 'subject_id', 'term'),
+        db.Index('ix_assessments_subject_term', 'subject_id', 'term'),
+    )
     assessment_id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String, db.ForeignKey('students.student_id'), nullable=False)
-    subject_id = db.Column(db.Integer, nullable=False)  # For later if a subjects table is create
-    subject_name = db.Column(db.String(100), nullable=False)  # Temporary until subjects table exists
+    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.subject_id'), nullable=False)
+    subject_name = db.Column(db.String(100), nullable=False)  # Copy of subjects.name for display and exports
     assessment_type = db.Column(db.String(50), nullable=False)  # 'quiz', 'test', 'exam', 'assignment'
     score = db.Column(db.Float, nullable=False)
     max_score = db.Column(db.Float, nullable=False)
@@ -96,8 +150,31 @@ class Assessment(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+class AssessmentAggregate(db.Model):
+    """Per student, subject, academic year and term score totals, maintained by the assessment write paths"""
+    __tablename__ = 'assessment_aggregates'
+    student_id = db.Column(db.String, db.ForeignKey('students.student_id', ondelete='CASCADE'), primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.subject_id'), primary_key=True)
+    academic_year = db.Column(db.String(10), primary_key=True)  # '' for assessments without a year
+    term = db.Column(db.String(20), primary_key=True)  # '' for assessments without a term
+    assessment_count = db.Column(db.Integer, nullable=False, default=0)
+    percentage_sum = db.Column(db.Float, nullable=False, default=0)
+    percentage_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    last_date = db.Column(db.Date)
+
 class Behavioral(db.Model):
     __tablename__ = 'behavior'
+    __table_args__ = (
+        # behavior_id breaks date ties for keyset pagination on (date, behavior_id)
+        db.Index('ix_behavior_student_date', 'student_id', 'date', 'behavior_id'),
+        db.Index('ix_behavior_type_date', 'behavior_type', 'date', 'behavior_id'),
+        db.Index('ix_behavior_date', 'date', 'behavior_id'),
+        # Substring search on PostgreSQL; SQLite uses the behavior_search FTS table below
+        db.Index('ix_behavior_category_trgm', 'category', postgresql_using='gin',
+                 postgresql_ops={'category': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_behavior_notes_trgm', 'notes', postgresql_using='gin',
+                 postgresql_ops={'notes': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
     behavior_id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String, db.ForeignKey('students.student_id'), nullable=False)
     behavior_type = db.Column(db.String(10), nullable=False)  # 'positive' or 'negative'
@@ -108,30 +185,86 @@ class Behavioral(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+# pg_trgm must exist before the trigram indexes are created
+event.listen(Behavioral.__table__, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+# SQLite stand-in for the trigram indexes: an external-content FTS5 table over
+# behavior(category, notes) with the trigram tokenizer, kept in sync by triggers
+BEHAVIOR_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS behavior_search USING fts5("
+    "category, notes, content='behavior', content_rowid='behavior_id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS behavior_search_ai AFTER INSERT ON behavior BEGIN "
+    "INSERT INTO behavior_search (rowid, category, notes) VALUES (new.behavior_id, new.category, new.notes); END",
+    "CREATE TRIGGER IF NOT EXISTS behavior_search_ad AFTER DELETE ON behavior BEGIN "
+    "INSERT INTO behavior_search (behavior_search, rowid, category, notes) "
+    "VALUES ('delete', old.behavior_id, old.category, old.notes); END",
+    "CREATE TRIGGER IF NOT EXISTS behavior_search_au AFTER UPDATE ON behavior BEGIN "
+    "INSERT INTO behavior_search (behavior_search, rowid, category, notes) "
+    "VALUES ('delete', old.behavior_id, old.category, old.notes); "
+    "INSERT INTO behavior_search (rowid, category, notes) VALUES (new.behavior_id, new.category, new.notes); END",
+]
+for _statement in BEHAVIOR_SEARCH_DDL:
+    event.listen(Behavioral.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Behavioral.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS behavior_search').execute_if(dialect='sqlite'))
+
+# Participation statuses that carry a rating, matched ignoring case and surrounding spaces
+PARTICIPATION_RATINGS = {
+    'excellent': 5,
+    'good': 4,
+    'average': 3,
+    'poor': 2,
+    'none': 1,
+}
+
+
+def participation_rating(status):
+    return PARTICIPATION_RATINGS.get(status.strip().lower()) if status else None
+
+
 class Participation(db.Model):
     __tablename__ = 'participation'
+    __table_args__ = (
+        db.Index('ix_participation_date', 'date'),
+        db.Index('ix_participation_student_date', 'student_id', 'date'),
+        db.Index('ix_participation_class_date', 'class_id', 'date'),
+    )
     participation_id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String, db.ForeignKey('students.student_id'), nullable=False)
     class_id = db.Column(db.Integer, db.ForeignKey('classes.class_id'))
     event_name = db.Column(db.String(100), nullable=False)
     date = db.Column(db.Date, nullable=False)
     status = db.Column(db.String(20), nullable=False)
-
-    remarks = db.Column(db.String(255))    
+    # PARTICIPATION_RATINGS score of status (None for other statuses), kept in step by set_status_rating
+    rating = db.Column(db.SmallInteger)
     remarks = db.Column(db.String(255))
 
+    @validates('status')
+    def set_status_rating(self, key, status):
+        self.rating = participation_rating(status)
+        return status
+
 class TeacherClassSubject(db.Model):
     __tablename__ = 'teacher_class_subject'
+    __table_args__ = (
+        # A teacher teaches a subject to a class once
+        db.Index('uq_teacher_class_subject', 'teacher_id', 'class_id', 'subject_id', unique=True),
+        db.Index('ix_teacher_class_subject_class', 'class_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.teacher_id', ondelete='CASCADE'), nullable=False)
     class_id = db.Column(db.Integer, db.ForeignKey('classes.class_id', ondelete='CASCADE'), nullable=False)
-    subject = db.Column(db.String(100), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.subject_id'), nullable=False)
     # Relationships
     teacher = db.relationship('Teacher', backref='class_subject_assignments')
     class_ = db.relationship('Class', backref='teacher_subject_assignments')
 
 class Guardian(db.Model):
     __tablename__ = 'guardians'
+    __table_args__ = (
+        db.Index('ix_guardians_student_id', 'student_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String, db.ForeignKey('students.student_id', ondelete='CASCADE'))
     first_name = db.Column(db.String(100))
@@ -141,6 +274,9 @@ class Guardian(db.Model):
 
 class EmergencyContact(db.Model):
     __tablename__ = 'emergency_contacts'
+    __table_args__ = (
+        db.Index('ix_emergency_contacts_student_id', 'student_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.String, db.ForeignKey('students.student_id', ondelete='CASCADE'))
     first_name = db.Column(db.String(100))
@@ -149,15 +285,4 @@ class EmergencyContact(db.Model):
     contact = db.Column(db.String(15))
 
 
-    remarks = db.Column(db.String(255)) 
-
-class Parent(db.Model):
-    __tablename__ = 'parents'
-    parent_id = db.Column(db.Integer, primary_key=True)
-    full_name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(100), unique=True, nullable=False)
-    password = db.Column(db.String(128), nullable=False)  # Hash it
-    student_id = db.Column(db.Integer, db.ForeignKey('students.student_id'), nullable=False)
-
-    student = db.relationship('Student', backref='parent', uselist=False)
-
+    remarks = db.Column(db.String(255))
@@ -0,0 +1,186 @@
+"""
+Parent dashboard data with a bounded payload, in three queries.
+
+  1. the parent and every child linked through StudentParentLink;
+  2. one summary row per child for the current term: average score (from
+     the assessment aggregates), attendance rate (from the per-term
+     rollup) and positive/negative behaviour counts;
+  3. the latest `recent` attendance marks, assessments and behaviour
+     records per child, ranked with ROW_NUMBER() OVER (PARTITION BY
+     student_id ...) in one UNION ALL statement.
+
+The response size depends on the number of children and `recent`, never
+on how long a child has been enrolled. `since` limits the recent items
+to records dated on or after that day, for incremental refreshes.
+"""
+from datetime import date
+
+from sqlalchemy import Float, String, Text, case, cast, func, literal, null, select, union_all
+
+from models import (db, Parent, Student, StudentParentLink, Attendance, AttendanceTermRollup,
+                    Assessment, AssessmentAggregate, Behavioral)
+from assessment_aggregates import average_percentage
+from attendance_rollup import term_for_date
+
+DEFAULT_RECENT = 5
+MAX_RECENT = 20
+CATEGORIES = ('attendance', 'assessments', 'behaviors')
+
+
+def _typed_null(type_):
+    # Typed NULLs keep the UNION column types unambiguous on PostgreSQL
+    return cast(null(), type_)
+
+
+def _round(value):
+    return round(float(value), 2) if value is not None else None
+
+
+def _children(parent_id):
+    """(parent, [child rows]) or (None, []) when there is no such parent."""
+    rows = db.session.execute(
+        select(Parent.parent_id, Parent.full_name.label('parent_name'),
+               Student.student_id, Student.full_name, Student.class_id)
+        .outerjoin(StudentParentLink, StudentParentLink.parent_id == Parent.parent_id)
+        .outerjoin(Student, Student.student_id == StudentParentLink.student_id)
+        .where(Parent.parent_id == parent_id)
+        .order_by(Student.full_name, Student.student_id)
+    ).all()
+    if not rows:
+        return None, []
+    parent = {'parent_id': rows[0].parent_id, 'full_name': rows[0].parent_name}
+    # A child linked twice is listed once
+    return parent, list({row.student_id: row for row in rows if row.student_id is not None}.values())
+
+
+def _summaries(student_ids, term):
+    academic_year, term_name, start, end = term
+    scores = select(
+        AssessmentAggregate.student_id, average_percentage().label('term_average')
+    ).where(
+        AssessmentAggregate.student_id.in_(student_ids),
+        AssessmentAggregate.academic_year == academic_year,
+        AssessmentAggregate.term == term_name
+    ).group_by(AssessmentAggregate.student_id).subquery('scores')
+
+    attendance = select(
+        AttendanceTermRollup.student_id,
+        func.sum(AttendanceTermRollup.total).label('total'),
+        func.sum(AttendanceTermRollup.present).label('present')
+    ).where(
+        AttendanceTermRollup.student_id.in_(student_ids),
+        AttendanceTermRollup.academic_year == academic_year,
+        AttendanceTermRollup.term == term_name
+    ).group_by(AttendanceTermRollup.student_id).subquery('attendance')
+
+    behaviour = select(
+        Behavioral.student_id,
+        func.sum(case((Behavioral.behavior_type == 'positive', 1), else_=0)).label('positive'),
+        func.sum(case((Behavioral.behavior_type == 'negative', 1), else_=0)).label('negative')
+    ).where(
+        Behavioral.student_id.in_(student_ids), Behavioral.date.between(start, end)
+    ).group_by(Behavioral.student_id).subquery('behaviour')
+
+    rows = db.session.execute(
+        select(
+            Student.student_id, scores.c.term_average,
+            case((attendance.c.total > 0, attendance.c.present * 100.0 / attendance.c.total),
+                 else_=None).label('attendance_rate'),
+            func.coalesce(behaviour.c.positive, 0).label('positive'),
+            func.coalesce(behaviour.c.negative, 0).label('negative')
+        ).outerjoin(scores, scores.c.student_id == Student.student_id)
+        .outerjoin(attendance, attendance.c.student_id == Student.student_id)
+        .outerjoin(behaviour, behaviour.c.student_id == Student.student_id)
+        .where(Student.student_id.in_(student_ids))
+    ).all()
+    return {
+        row.student_id: {
+            'term_average': _round(row.term_average),
+            'attendance_rate': _round(row.attendance_rate),
+            'incidents': {'positive': row.positive, 'negative': row.negative},
+        } for row in rows
+    }
+
+
+def _latest(category, model, id_column, date_column, columns, student_ids, recent, since):
+    """Ranked (category, student_id, item_id, date, label, detail, score, max_score, notes, position) rows."""
+    ranked = select(
+        model.student_id, id_column.label('item_id'), date_column.label('day'), *columns,
+        func.row_number().over(
+            partition_by=model.student_id, order_by=(date_column.desc(), id_column.desc())
+        ).label('position')
+    ).where(model.student_id.in_(student_ids))
+    if since is not None:
+        ranked = ranked.where(date_column >= since)
+    ranked = ranked.subquery(category)
+    return select(
+        literal(category).label('category'), ranked.c.student_id, ranked.c.item_id, ranked.c.day,
+        ranked.c.label, ranked.c.detail, ranked.c.score, ranked.c.max_score, ranked.c.notes, ranked.c.position
+    ).where(ranked.c.position <= recent)
+
+
+def _recent_items(student_ids, recent, since):
+    statement = union_all(
+        _latest('attendance', Attendance, Attendance.attendance_id, Attendance.date, [
+            Attendance.status.label('label'), _typed_null(String).label('detail'),
+            _typed_null(Float).label('score'), _typed_null(Float).label('max_score'),
+            _typed_null(Text).label('notes'),
+        ], student_ids, recent, since),
+        _latest('assessments', Assessment, Assessment.assessment_id, Assessment.date_taken, [
+            Assessment.subject_name.label('label'), Assessment.assessment_type.label('detail'),
+            Assessment.score.label('score'), Assessment.max_score.label('max_score'),
+            Assessment.notes.label('notes'),
+        ], student_ids, recent, since),
+        _latest('behaviors', Behavioral, Behavioral.behavior_id, Behavioral.date, [
+            Behavioral.behavior_type.label('label'), Behavioral.category.label('detail'),
+            _typed_null(Float).label('score'), _typed_null(Float).label('max_score'),
+            Behavioral.notes.label('notes'),
+        ], student_ids, recent, since),
+    )
+    items = {student_id: {category: [] for category in CATEGORIES} for student_id in student_ids}
+    rows = sorted(db.session.execute(statement).all(), key=lambda row: row.position)
+    for row in rows:
+        if row.category == 'attendance':
+            item = {'attendance_id': row.item_id, 'date': row.day.isoformat(), 'status': row.label}
+        elif row.category == 'assessments':
+            item = {'assessment_id': row.item_id, 'date': row.day.isoformat(), 'subject': row.label,
+                    'type': row.detail, 'score': row.score, 'max_score': row.max_score, 'notes': row.notes}
+        else:
+            item = {'behavior_id': row.item_id, 'date': row.day.isoformat(), 'behavior_type': row.label,
+                    'category': row.detail, 'notes': row.notes}
+        items[row.student_id][row.category].append(item)
+    return items
+
+
+def parent_dashboard(parent_id, recent=DEFAULT_RECENT, since=None, day=None):
+    """
+    The parent's children with current-term summaries and their latest
+    items per category, or None if there is no such parent.
+    """
+    parent, children = _children(parent_id)
+    if parent is None:
+        return None
+
+    try:
+        term = term_for_date(day or date.today())
+    except ValueError:
+        term = None
+    student_ids = [child.student_id for child in children]
+    summaries = _summaries(student_ids, term) if student_ids and term else {}
+    items = _recent_items(student_ids, recent, since) if student_ids else {}
+
+    return {
+        'parent': parent,
+        'term': {
+            'academic_year': term[0], 'term': term[1],
+            'start_date': term[2].isoformat(), 'end_date': term[3].isoformat()
+        } if term else None,
+        'since': since.isoformat() if since else None,
+        'children': [{
+            'student_id': child.student_id,
+            'full_name': child.full_name,
+            'class_id': child.class_id,
+            'summary': summaries.get(child.student_id),
+            'recent': items[child.student_id],
+        } for child in children]
+    }
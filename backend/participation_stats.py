@@ -0,0 +1,90 @@
+"""
+Participation rating averages, overall and broken down, in one statement.
+
+Participation.rating holds the numeric score of the status (set on write,
+backfilled by migration 0006), so averaging is a plain AVG(rating) in the
+database. Each requested breakdown is one grouped SELECT; they are joined
+with UNION ALL to the overall row and told apart by a `dimension` column.
+"""
+from sqlalchemy import String, cast, func, literal, select, union_all
+
+from models import db, Participation
+from db_helpers import dialect_name
+
+# breakdown name -> key in the response rows
+BREAKDOWNS = {
+    'student': 'student_id',
+    'class': 'class_id',
+    'event': 'event_name',
+    'month': 'month',
+}
+
+
+def _month(column):
+    if dialect_name() == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    return func.strftime('%Y-%m', column)
+
+
+def _grouping_keys():
+    return {
+        'student': Participation.student_id,
+        'class': Participation.class_id,
+        'event': Participation.event_name,
+        'month': _month(Participation.date),
+    }
+
+
+def _average(value):
+    return round(float(value), 2) if value is not None else None
+
+
+def rating_summary(breakdowns=(), student_id=None, class_id=None, event_name=None, start_date=None, end_date=None):
+    """
+    Average participation rating over the matching records, plus the
+    averages per student/class/event/month for each name in `breakdowns`.
+
+    Returns {'records', 'rated_records', 'average_rating', 'by_<breakdown>': [...]}.
+    """
+    keys = _grouping_keys()
+    conditions = []
+    if student_id:
+        conditions.append(Participation.student_id == student_id)
+    if class_id is not None:
+        conditions.append(Participation.class_id == class_id)
+    if event_name:
+        conditions.append(Participation.event_name == event_name)
+    if start_date:
+        conditions.append(Participation.date >= start_date)
+    if end_date:
+        conditions.append(Participation.date <= end_date)
+
+    def grouped(dimension, key):
+        stmt = select(
+            literal(dimension).label('dimension'), cast(key, String).label('key'),
+            func.count(Participation.participation_id).label('records'),
+            func.count(Participation.rating).label('rated_records'),
+            func.avg(Participation.rating).label('average_rating'),
+        ).where(*conditions)
+        return stmt.group_by(key) if key is not None else stmt
+
+    parts = [grouped('overall', None)] + [grouped(name, keys[name]) for name in breakdowns]
+    rows = db.session.execute(union_all(*parts)).all()
+
+    summary = {f'by_{name}': [] for name in breakdowns}
+    for row in rows:
+        if row.dimension == 'overall':
+            summary.update(records=row.records, rated_records=row.rated_records,
+                           average_rating=_average(row.average_rating))
+            continue
+        key = int(row.key) if row.dimension == 'class' and row.key is not None else row.key
+        summary[f'by_{row.dimension}'].append({
+            BREAKDOWNS[row.dimension]: key,
+            'records': row.records,
+            'rated_records': row.rated_records,
+            'average_rating': _average(row.average_rating),
+        })
+    for name in breakdowns:
+        field = BREAKDOWNS[name]
+        summary[f'by_{name}'].sort(key=lambda entry: (entry[field] is None, entry[field] if entry[field] is not None else ''))
+    return summary
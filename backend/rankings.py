@@ -0,0 +1,100 @@
+"""
+Class and grade rankings by term average.
+
+One query computes every student's average percentage for a term (and
+academic year) from
+the assessment aggregates and ranks it with RANK() and PERCENT_RANK()
+windows partitioned by class and by grade (classes sharing a
+grade_level; a class without one is a grade of its own). Averages are
+rounded to two places before ranking, so students shown with the same
+average always share a rank and a percentile; the next rank skips the
+tied places (1, 2, 2, 4). Students without assessments in the term are
+not ranked.
+
+ranking_snapshot() caches the school-wide result per term and year, so class
+views and report cards for the whole school read one snapshot instead
+of querying per student.
+"""
+from sqlalchemy import Float, Numeric, cast, func, select
+
+from models import db, AssessmentAggregate, Class, Student
+from assessment_aggregates import average_percentage
+from cache import rankings_cache
+
+
+def _term_averages(term, academic_year):
+    average = cast(func.round(cast(average_percentage(), Numeric), 2), Float)
+    stmt = select(AssessmentAggregate.student_id, average.label('average'))
+    if term:
+        stmt = stmt.where(AssessmentAggregate.term == term)
+    if academic_year:
+        stmt = stmt.where(AssessmentAggregate.academic_year == academic_year)
+    return stmt.group_by(AssessmentAggregate.student_id).subquery('term_averages')
+
+
+def _percentile(percent_rank, size):
+    # PERCENT_RANK is 0 for a lone student; there is no one to be compared with
+    return round(float(percent_rank) * 100, 1) if size > 1 else None
+
+
+def compute_rankings(term=None, academic_year=None):
+    """
+    Rank every student with assessments in `term` of `academic_year` (all
+    terms / years when None).
+
+    Returns dicts with the student, class and grade, the average and, for
+    both the class and the grade: rank, size and percentile (the share of
+    the other students ranked below, 0-100, None when there are none).
+    Ordered by class, then rank.
+    """
+    averages = _term_averages(term, academic_year)
+    grade = func.coalesce(Class.grade_level, Class.class_name)
+    by_class = {'partition_by': Student.class_id}
+    by_grade = {'partition_by': grade}
+    class_rank = func.rank().over(order_by=averages.c.average.desc(), **by_class).label('class_rank')
+
+    stmt = select(
+        Student.student_id,
+        Student.full_name,
+        Student.class_id,
+        Class.class_name,
+        grade.label('grade_level'),
+        averages.c.average,
+        class_rank,
+        func.count().over(**by_class).label('class_size'),
+        func.percent_rank().over(order_by=averages.c.average, **by_class).label('class_percent_rank'),
+        func.rank().over(order_by=averages.c.average.desc(), **by_grade).label('grade_rank'),
+        func.count().over(**by_grade).label('grade_size'),
+        func.percent_rank().over(order_by=averages.c.average, **by_grade).label('grade_percent_rank'),
+    ).join(
+        Student, Student.student_id == averages.c.student_id
+    ).outerjoin(
+        Class, Class.class_id == Student.class_id
+    ).order_by(Student.class_id, class_rank, Student.student_id)
+
+    return [{
+        'student_id': row.student_id,
+        'full_name': row.full_name,
+        'class_id': row.class_id,
+        'class_name': row.class_name,
+        'grade_level': row.grade_level,
+        'average': row.average,
+        'class_rank': row.class_rank,
+        'class_size': row.class_size,
+        'class_percentile': _percentile(row.class_percent_rank, row.class_size),
+        'grade_rank': row.grade_rank,
+        'grade_size': row.grade_size,
+        'grade_percentile': _percentile(row.grade_percent_rank, row.grade_size),
+    } for row in db.session.execute(stmt)]
+
+
+def ranking_snapshot(term=None, academic_year=None):
+    """School-wide rankings for a term, cached until assessments or class placements change."""
+    return rankings_cache.get_or_set(
+        f'term:{academic_year or ""}:{term or ""}', lambda: compute_rankings(term, academic_year)
+    )
+
+
+def rankings_by_student(term=None, academic_year=None):
+    """{student_id: ranking} for a term, for report cards."""
+    return {ranking['student_id']: ranking for ranking in ranking_snapshot(term, academic_year)}
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Rebuild the summary tables from the raw data (backfills, repairs).
+
+    python rebuild_rollups.py              # everything
+    python rebuild_rollups.py attendance   # only the attendance rollups
+    python rebuild_rollups.py --check      # report drift without rebuilding
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from attendance_rollup import rebuild_attendance_rollups
+from assessment_aggregates import rebuild_assessment_aggregates, check_assessment_aggregates
+
+REBUILDERS = {
+    'attendance': rebuild_attendance_rollups,
+    'assessments': rebuild_assessment_aggregates,
+}
+
+CHECKERS = {
+    'assessments': check_assessment_aggregates,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild summary tables from the raw data.')
+    # No choices=: argparse rejects the empty default list of a nargs='*' positional against them
+    parser.add_argument('tables', nargs='*', metavar='table',
+                        help=f"one of {', '.join(sorted(REBUILDERS))}; defaults to all")
+    parser.add_argument('--check', action='store_true',
+                        help='only compare the tables with the raw data; exit 1 on any mismatch')
+    args = parser.parse_args()
+    unknown = sorted(set(args.tables) - set(REBUILDERS))
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+
+    with app.app_context():
+        if args.check:
+            drifted = False
+            for name in args.tables or sorted(CHECKERS):
+                if name not in CHECKERS:
+                    print(f"No checker for {name}")
+                    continue
+                mismatches = CHECKERS[name]()
+                drifted = drifted or bool(mismatches)
+                print(f"{name}: {len(mismatches)} mismatched rows")
+                for mismatch in mismatches[:20]:
+                    print(f"  {mismatch['key']}: expected {mismatch['expected']}, found {mismatch['actual']}")
+            sys.exit(1 if drifted else 0)
+
+        for name in args.tables or sorted(REBUILDERS):
+            started = time.perf_counter()
+            REBUILDERS[name]()
+            print(f"Rebuilt {name} rollups in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,18 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, current_app, request, jsonify, session
 from models import db, User, Teacher, Parent
 from werkzeug.security import generate_password_hash
-import secrets
-import string
+from auth import admin_required, publish_permissions, revoke_permissions
+from account_provisioning import DEFAULT_CHUNK_SIZE, generate_secure_password, provision_accounts, write_credentials
+import io
 
 admin_bp = Blueprint('admin', __name__)
 
-def require_admin():
-    """Decorator to require admin authentication"""
-    if 'user_id' not in session:
-        return jsonify({'error': 'Authentication required'}), 401
-    
-    user = User.query.get(session['user_id'])
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
-    return None
-
-def generate_secure_password(length=12):
-    """Generate a secure random password"""
-    characters = string.ascii_letters + string.digits + "!@#$%^&*"
-    return ''.join(secrets.choice(characters) for _ in range(length))
+ROLES = ('admin', 'teacher', 'parent', 'user')
 
 @admin_bp.route('/users', methods=['GET'])
+@admin_required
 def get_users():
     """Get all users with their details"""
-    auth_error = require_admin()
-    if auth_error:
-        return auth_error
-    
     users = User.query.all()
     return jsonify([
         {
@@ -40,12 +24,9 @@ def get_users():
     ])
 
 @admin_bp.route('/users/teachers', methods=['POST'])
+@admin_required
 def create_teacher():
     """Create a new teacher user with automatic password generation"""
-    auth_error = require_admin()
-    if auth_error:
-        return auth_error
-    
     data = request.get_json()
     
     # Validate required fields
@@ -98,12 +79,9 @@ def create_teacher():
         return jsonify({'error': f'Failed to create teacher: {str(e)}'}), 500
 
 @admin_bp.route('/users/parents', methods=['POST'])
+@admin_required
 def create_parent():
     """Create a new parent user with automatic password generation"""
-    auth_error = require_admin()
-    if auth_error:
-        return auth_error
-    
     data = request.get_json()
     
     # Validate required fields
@@ -155,13 +133,44 @@ def create_parent():
         db.session.rollback()
         return jsonify({'error': f'Failed to create parent: {str(e)}'}), 500
 
+@admin_bp.route('/users/bulk', methods=['POST'])
+@admin_required
+def provision_users():
+    """
+    Create teacher and parent accounts from a CSV file (see account_provisioning.py).
+
+    Send the file as multipart field "file" or as the raw request body;
+    ?role=teacher|parent is the role of rows without a role column.
+    Returns credentials.csv with the generated password (or the error) for
+    every line, and the counts and throughput in X-Accounts-* headers.
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    chunk_size = max(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int), 1)
+    try:
+        report, credentials = provision_accounts(
+            stream, default_role=request.args.get('role'), chunk_size=chunk_size,
+            workers=current_app.config.get('PROVISIONING_WORKERS')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    output = io.StringIO()
+    write_credentials(credentials, output)
+    return Response(output.getvalue(), status=201 if report['created'] else 400, mimetype='text/csv', headers={
+        'Content-Disposition': 'attachment; filename="credentials.csv"',
+        'Cache-Control': 'no-store',
+        'X-Accounts-Created': str(report['created']),
+        'X-Accounts-Failed': str(report['failed']),
+        'X-Elapsed-Ms': str(report['elapsed_ms']),
+        'X-Hashing-Ms': str(report['hashing_ms']),
+        'X-Accounts-Per-Second': str(report['accounts_per_second']),
+    })
+
 @admin_bp.route('/users/<int:user_id>', methods=['PUT'])
-def update_user():
+@admin_required
+def update_user(user_id):
     """Update user information"""
-    auth_error = require_admin()
-    if auth_error:
-        return auth_error
-    
     user = User.query.get_or_404(user_id)
     data = request.get_json()
     
@@ -179,21 +188,25 @@ def update_user():
         if existing and existing.user_id != user_id:
             return jsonify({'error': 'Username already exists'}), 400
         user.username = data['username']
+
+    if 'role' in data and data['role'] != user.role:
+        if data['role'] not in ROLES:
+            return jsonify({'error': f"Invalid role. Use one of: {', '.join(ROLES)}"}), 400
+        user.role = data['role']
+        revoke_permissions(user)
     
     try:
         db.session.commit()
+        publish_permissions(user.user_id, user.permissions_version)
         return jsonify({'message': 'User updated successfully'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Failed to update user: {str(e)}'}), 500
 
 @admin_bp.route('/users/<int:user_id>', methods=['DELETE'])
-def delete_user():
+@admin_required
+def delete_user(user_id):
     """Delete a user (with cascade protection for admin)"""
-    auth_error = require_admin()
-    if auth_error:
-        return auth_error
-    
     user = User.query.get_or_404(user_id)
     
     # Prevent admin from deleting themselves
@@ -201,28 +214,29 @@ def delete_user():
         return jsonify({'error': 'Cannot delete your own admin account'}), 400
     
     try:
+        version = revoke_permissions(user)
         db.session.delete(user)
         db.session.commit()
+        publish_permissions(user_id, version)
         return jsonify({'message': 'User deleted successfully'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Failed to delete user: {str(e)}'}), 500
 
 @admin_bp.route('/users/<int:user_id>/reset-password', methods=['POST'])
-def reset_user_password():
+@admin_required
+def reset_user_password(user_id):
     """Reset a user's password"""
-    auth_error = require_admin()
-    if auth_error:
-        return auth_error
-    
     user = User.query.get_or_404(user_id)
     
     # Generate new secure password
     new_password = generate_secure_password()
     user.password_hash = generate_password_hash(new_password)
+    revoke_permissions(user)
     
     try:
         db.session.commit()
+        publish_permissions(user.user_id, user.permissions_version)
         return jsonify({
             'message': 'Password reset successfully',
             'new_password': new_password
@@ -1,7 +1,15 @@
 from flask import Blueprint, request, jsonify
 from models import db, Assessment, Student
+from cache import dashboard_cache, rankings_cache
+from exports import EXPORT_FORMATS, export_format, stream_export
+from assessment_stats import assessment_statistics, GROUP_COLUMNS, DEFAULT_PERCENTILES
+from gradebook import build_gradebook, COLUMN_MODES
+from rankings import ranking_snapshot
+from assessment_aggregates import assessment_key, refresh_assessment_aggregates
+from subjects import get_or_create_subject, subject_name
 from datetime import datetime, date
 from flask_cors import cross_origin
+from sqlalchemy import insert, select
 
 import sys
 import os
@@ -13,11 +21,25 @@ assessments_bp = Blueprint('assessments', __name__)
 @assessments_bp.route('', methods=['GET'])  # Handle both with and without trailing slash
 @cross_origin()
 def get_assessments():
+    # ?format=ndjson|csv streams the whole result instead of building a list
+    fmt = export_format()
+    if fmt:
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        stmt = select(
+            Assessment.assessment_id.label('id'), Assessment.student_id,
+            Assessment.subject_id, Assessment.subject_name.label('subject'), Assessment.assessment_type,
+            Assessment.score, Assessment.max_score, Assessment.date_taken.label('date'),
+            Assessment.term, Assessment.academic_year
+        ).order_by(Assessment.assessment_id)
+        return stream_export(stmt, fmt, 'assessments')
+
     assessments = Assessment.query.all()
     return jsonify([
         {
             'id': a.assessment_id,  # Fixed: use assessment_id instead of id
             'student_id': a.student_id,
+            'subject_id': a.subject_id,
             'subject': a.subject_name,  # Fixed: use subject_name instead of subject
             'assessment_type': a.assessment_type,
             'assessment_name': a.assessment_name if hasattr(a, 'assessment_name') else a.assessment_type,
@@ -43,6 +65,7 @@ def get_assessment(assessment_id):
         'id': assessment.assessment_id,
         'student_id': assessment.student_id,
         'student_name': student.full_name if student else None,
+        'subject_id': assessment.subject_id,
         'subject_name': assessment.subject_name,
         'assessment_type': assessment.assessment_type,
         'score': assessment.score,
@@ -56,13 +79,30 @@ def get_assessment(assessment_id):
         'updated_at': assessment.updated_at.isoformat() if assessment.updated_at else None
     })
 
+def _resolve_subject(data):
+    """
+    (subject_id, subject_name, error) for the subject_id or subject_name in a request body.
+
+    subject_id wins when both are given; an unknown subject_name is added
+    as a new subject.
+    """
+    if data.get('subject_id') is not None:
+        name = subject_name(data['subject_id'])
+        if name is None:
+            return None, None, 'Subject not found'
+        return data['subject_id'], name, None
+    name = data.get('subject_name')
+    if not isinstance(name, str) or not name.strip():
+        return None, None, 'Missing required field: subject_name'
+    return (*get_or_create_subject(name), None)
+
 @assessments_bp.route('/', methods=['POST'])
 def add_assessment():
     """Add a new assessment record"""
     data = request.get_json()
     
     # Validate required fields
-    required_fields = ['student_id', 'subject_name', 'assessment_type', 'score', 'max_score', 'date_taken']
+    required_fields = ['student_id', 'assessment_type', 'score', 'max_score', 'date_taken']
     for field in required_fields:
         if field not in data:
             return jsonify({'error': f'Missing required field: {field}'}), 400
@@ -81,22 +121,30 @@ def add_assessment():
         date_taken = datetime.strptime(data['date_taken'], '%Y-%m-%d').date()
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    subject_id, name, error = _resolve_subject(data)
+    if error:
+        return jsonify({'error': error}), 400
     
     assessment = Assessment(
         student_id=data['student_id'],
-        subject_name=data['subject_name'],
+        subject_id=subject_id,
+        subject_name=name,
         assessment_type=data['assessment_type'],
         score=data['score'],
         max_score=data['max_score'],
         date_taken=date_taken,
         term=data.get('term'),
         academic_year=data.get('academic_year'),
-        notes=data.get('notes'),
-        subject_id=data.get('subject_id', 1)  # Default subject_id until subjects table exists
+        notes=data.get('notes')
     )
     
     db.session.add(assessment)
+    db.session.flush()
+    refresh_assessment_aggregates([assessment_key(assessment)])
     db.session.commit()
+    dashboard_cache.invalidate()
+    rankings_cache.invalidate()
     
     return jsonify({
         'message': 'Assessment added successfully',
@@ -104,11 +152,122 @@ def add_assessment():
         'percentage': round((assessment.score / assessment.max_score) * 100, 2)
     }), 201
 
+BULK_HEADER_FIELDS = ['assessment_type', 'max_score', 'date_taken']
+
+@assessments_bp.route('/bulk', methods=['POST'])
+def add_assessments_bulk():
+    """
+    Record one assessment for a whole class.
+
+    Body: the assessment header (subject_name or subject_id, assessment_type,
+    max_score, date_taken, optional term, academic_year, class_id) plus
+    `scores`, a list of {student_id, score, notes}. Student IDs are checked
+    with one IN query (and against class_id when given); valid scores are
+    inserted with a single statement. Invalid entries are reported by
+    index and student_id without blocking the rest.
+    """
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected an assessment header with a scores list'}), 400
+    for field in BULK_HEADER_FIELDS + ['scores']:
+        if field not in data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+    if not isinstance(data['scores'], list) or not data['scores']:
+        return jsonify({'error': 'scores must be a non-empty list'}), 400
+    try:
+        max_score = float(data['max_score'])
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_score must be a number'}), 400
+    if max_score <= 0:
+        return jsonify({'error': 'max_score must be greater than 0'}), 400
+    try:
+        date_taken = datetime.strptime(data['date_taken'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    subject_id, name, error = _resolve_subject(data)
+    if error:
+        return jsonify({'error': error}), 400
+    class_id = data.get('class_id')
+    if class_id is not None:
+        try:
+            if isinstance(class_id, bool):
+                raise TypeError
+            class_id = int(class_id)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'class_id must be an integer'}), 400
+
+    header = {
+        'subject_id': subject_id,
+        'subject_name': name,
+        'assessment_type': data['assessment_type'],
+        'max_score': max_score,
+        'date_taken': date_taken,
+        'term': data.get('term'),
+        'academic_year': data.get('academic_year'),
+    }
+
+    errors, entries, seen = [], [], set()
+    for index, entry in enumerate(data['scores']):
+        student_id = entry.get('student_id') if isinstance(entry, dict) else None
+        entry_errors = []
+        if not student_id:
+            entry_errors.append('student_id is required')
+        elif student_id in seen:
+            entry_errors.append('Duplicate student_id in scores')
+        score = entry.get('score') if isinstance(entry, dict) else None
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            entry_errors.append('score must be a number')
+        elif not 0 <= score <= max_score:
+            entry_errors.append('Score must be between 0 and max score')
+        if entry_errors:
+            errors.append({'index': index, 'student_id': student_id, 'errors': entry_errors})
+            continue
+        seen.add(student_id)
+        entries.append((index, student_id, score, entry.get('notes')))
+
+    # One IN query validates every referenced student (and their class)
+    students = dict(db.session.execute(
+        select(Student.student_id, Student.class_id).where(Student.student_id.in_(seen))
+    ).all()) if seen else {}
+
+    rows = []
+    for index, student_id, score, notes in entries:
+        if student_id not in students:
+            errors.append({'index': index, 'student_id': student_id, 'errors': ['Student not found']})
+        elif class_id is not None and students[student_id] != class_id:
+            errors.append({'index': index, 'student_id': student_id,
+                           'errors': [f'Student is not in class {class_id}']})
+        else:
+            rows.append(dict(header, student_id=student_id, score=score, notes=notes))
+
+    if rows:
+        db.session.execute(insert(Assessment), rows)
+        refresh_assessment_aggregates(assessment_key(r) for r in rows)
+        db.session.commit()
+        dashboard_cache.invalidate()
+        rankings_cache.invalidate()
+
+    errors.sort(key=lambda e: e['index'])
+    scores = [r['score'] for r in rows]
+    return jsonify({
+        'message': f'Recorded {len(rows)} of {len(data["scores"])} scores',
+        'created': len(rows),
+        'rejected': len(errors),
+        'errors': errors,
+        'class_average': {
+            'score': round(sum(scores) / len(scores), 2),
+            'percentage': round(sum(scores) / len(scores) * 100 / max_score, 2),
+            'highest_score': max(scores),
+            'lowest_score': min(scores),
+        } if scores else None
+    }), 201 if rows else 400
+
 @assessments_bp.route('/<int:assessment_id>', methods=['PUT'])
 def update_assessment(assessment_id):
     """Update an assessment record"""
     assessment = Assessment.query.get_or_404(assessment_id)
     data = request.get_json()
+    old_key = assessment_key(assessment)
     
     # Validate student exists if student_id is being updated
     if 'student_id' in data:
@@ -124,8 +283,11 @@ def update_assessment(assessment_id):
         return jsonify({'error': 'Score cannot be greater than max score'}), 400
     
     # Update fields
-    if 'subject_name' in data:
-        assessment.subject_name = data['subject_name']
+    if 'subject_id' in data or 'subject_name' in data:
+        subject_id, name, error = _resolve_subject(data)
+        if error:
+            return jsonify({'error': error}), 400
+        assessment.subject_id, assessment.subject_name = subject_id, name
     if 'assessment_type' in data:
         assessment.assessment_type = data['assessment_type']
     if 'score' in data:
@@ -144,7 +306,11 @@ def update_assessment(assessment_id):
     if 'notes' in data:
         assessment.notes = data['notes']
     
+    db.session.flush()
+    refresh_assessment_aggregates([old_key, assessment_key(assessment)])
     db.session.commit()
+    dashboard_cache.invalidate()
+    rankings_cache.invalidate()
     
     return jsonify({
         'message': 'Assessment updated successfully',
@@ -156,47 +322,81 @@ def update_assessment(assessment_id):
 def delete_assessment(assessment_id):
     """Delete an assessment record"""
     assessment = Assessment.query.get_or_404(assessment_id)
+    key = assessment_key(assessment)
     
     db.session.delete(assessment)
+    db.session.flush()
+    refresh_assessment_aggregates([key])
     db.session.commit()
+    dashboard_cache.invalidate()
+    rankings_cache.invalidate()
     
     return jsonify({'message': 'Assessment deleted successfully'}), 200
 
 # Additional useful endpoints for analytics
 @assessments_bp.route('/statistics', methods=['GET'])
 def get_assessment_statistics():
-    """Get assessment statistics"""
-    student_id = request.args.get('student_id', type=int)
-    subject_name = request.args.get('subject')
-    term = request.args.get('term')
-    
-    query = Assessment.query
-    
-    if student_id:
-        query = query.filter_by(student_id=student_id)
-    if subject_name:
-        query = query.filter_by(subject_name=subject_name)
-    if term:
-        query = query.filter_by(term=term)
-    
-    assessments = query.all()
-    
-    if not assessments:
-        return jsonify({'message': 'No assessments found'})
-    
-    # Calculate statistics
-    scores = [a.score for a in assessments]
-    max_scores = [a.max_score for a in assessments]
-    percentages = [(a.score / a.max_score) * 100 for a in assessments if a.max_score > 0]
-    
-    stats = {
-        'total_assessments': len(assessments),
-        'average_score': round(sum(scores) / len(scores), 2) if scores else 0,
-        'average_percentage': round(sum(percentages) / len(percentages), 2) if percentages else 0,
-        'highest_score': max(scores) if scores else 0,
-        'lowest_score': min(scores) if scores else 0,
-        'highest_percentage': round(max(percentages), 2) if percentages else 0,
-        'lowest_percentage': round(min(percentages), 2) if percentages else 0
+    """Get assessment statistics, optionally one row per subject/term/class/assessment type"""
+    group_by = request.args.get('group_by')
+    if group_by and group_by not in GROUP_COLUMNS:
+        return jsonify({'error': f"group_by must be one of: {', '.join(GROUP_COLUMNS)}"}), 400
+
+    try:
+        percentiles = [float(p) for p in request.args.get('percentiles', '').split(',') if p.strip()]
+    except ValueError:
+        return jsonify({'error': 'percentiles must be a comma-separated list of numbers'}), 400
+    if any(not 0 <= p <= 100 for p in percentiles):
+        return jsonify({'error': 'percentiles must be between 0 and 100'}), 400
+
+    filters = {
+        'student_id': request.args.get('student_id'),
+        'subject': request.args.get('subject'),
+        'subject_id': request.args.get('subject_id', type=int),
+        'term': request.args.get('term'),
+        'academic_year': request.args.get('academic_year'),
+        'class_id': request.args.get('class_id', type=int),
     }
-    
-    return jsonify(stats)
+    results = assessment_statistics(filters, group_by=group_by,
+                                    percentiles=percentiles or DEFAULT_PERCENTILES)
+
+    if group_by:
+        return jsonify({'group_by': group_by, 'groups': results})
+    if not results or not results[0]['total_assessments']:
+        return jsonify({'message': 'No assessments found'})
+    return jsonify(results[0])
+
+@assessments_bp.route('/gradebook', methods=['GET'])
+def get_gradebook():
+    """Get a class gradebook: students x subjects (or assessments) matrix of average percentages"""
+    class_id = request.args.get('class_id', type=int)
+    if class_id is None:
+        return jsonify({'error': 'class_id is required'}), 400
+    columns = request.args.get('columns', 'subject')
+    if columns not in COLUMN_MODES:
+        return jsonify({'error': f"columns must be one of: {', '.join(COLUMN_MODES)}"}), 400
+
+    gradebook = build_gradebook(
+        class_id,
+        term=request.args.get('term'),
+        academic_year=request.args.get('academic_year'),
+        mode=columns
+    )
+    return jsonify({'class_id': class_id, 'term': request.args.get('term'), **gradebook})
+
+@assessments_bp.route('/rankings', methods=['GET'])
+def get_rankings():
+    """Get class and grade ranks/percentiles by term average, optionally for one class, grade or student"""
+    term = request.args.get('term')
+    academic_year = request.args.get('academic_year')
+    class_id = request.args.get('class_id', type=int)
+    grade_level = request.args.get('grade_level')
+    student_id = request.args.get('student_id')
+
+    # Filtering the cached school-wide snapshot keeps grade ranks intact
+    rankings = [
+        r for r in ranking_snapshot(term, academic_year)
+        if (class_id is None or r['class_id'] == class_id)
+        and (grade_level is None or r['grade_level'] == grade_level)
+        and (student_id is None or r['student_id'] == student_id)
+    ]
+    return jsonify({'term': term, 'academic_year': academic_year, 'rankings': rankings})
@@ -1,26 +1,178 @@
 from flask import Blueprint, request, jsonify
-from models import db, Attendance
+from models import db, Attendance, Student, Class
+from cache import dashboard_cache
+from db_helpers import dialect_name, dialect_insert
+from attendance_rollup import refresh_attendance_rollups
+from exports import EXPORT_FORMATS, export_format, stream_export
+from datetime import datetime
+from sqlalchemy import and_, any_, bindparam, case, func, select, tuple_, update, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
+import threading
+import time
 
 attendance_bp = Blueprint('attendance', __name__)
 
-# Log new attendance
+VALID_STATUSES = ('present', 'absent', 'late', 'excused')
+REQUIRED_FIELDS = ['student_id', 'class_id', 'date', 'status']
+BATCH_CHUNK_SIZE = 5000
+ATTENDANCE_KEY = ['student_id', 'class_id', 'date']
+CONFIRMED_STATUS = 'Confirmed'
+
+# Per-process ingest counters, exposed by /attendance/batch/metrics
+batch_metrics = {
+    'batches': 0,
+    'rows_received': 0,
+    'rows_written': 0,
+    'rows_rejected': 0,
+    'total_seconds': 0.0,
+    'last_batch': None,
+}
+_metrics_lock = threading.Lock()
+
+def _record_batch_metrics(received, written, rejected, elapsed):
+    with _metrics_lock:
+        batch_metrics['batches'] += 1
+        batch_metrics['rows_received'] += received
+        batch_metrics['rows_written'] += written
+        batch_metrics['rows_rejected'] += rejected
+        batch_metrics['total_seconds'] += elapsed
+        batch_metrics['last_batch'] = {
+            'rows': received,
+            'written': written,
+            'rejected': rejected,
+            'elapsed_ms': round(elapsed * 1000, 2)
+        }
+
+def _validate_record(record):
+    """Return (column values, list of errors) for one attendance record"""
+    if not isinstance(record, dict):
+        return None, ['Expected an object']
+    errors = [f'Missing field: {field}' for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+    if errors:
+        return None, errors
+
+    status = str(record['status']).strip().lower()
+    if status not in VALID_STATUSES:
+        errors.append(f"Invalid status '{record['status']}'. Use one of: {', '.join(VALID_STATUSES)}")
+    try:
+        day = datetime.strptime(str(record['date']), '%Y-%m-%d').date()
+    except ValueError:
+        errors.append('Invalid date format. Use YYYY-MM-DD')
+    try:
+        class_id = int(record['class_id'])
+    except (TypeError, ValueError):
+        errors.append('class_id must be an integer')
+    if errors:
+        return None, errors
+
+    return {
+        'student_id': str(record['student_id']),
+        'class_id': class_id,
+        'date': day,
+        'status': status
+    }, []
+
+def _upsert_attendance(rows):
+    """
+    Insert rows, updating the status where (student_id, class_id, date)
+    already exists. Returns (created, updated).
+    """
+    if not rows:
+        return 0, 0
+    keys = [(r['student_id'], r['class_id'], r['date']) for r in rows]
+    existing = db.session.execute(
+        select(func.count()).select_from(Attendance).where(
+            tuple_(Attendance.student_id, Attendance.class_id, Attendance.date).in_(keys)
+        )
+    ).scalar()
+
+    stmt = dialect_insert(Attendance)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=ATTENDANCE_KEY,
+        set_={'status': stmt.excluded.status}
+    )
+    db.session.execute(stmt, rows)
+    return len(rows) - existing, existing
+
+def _confirm_where(condition, return_ids=False):
+    """
+    Set status to CONFIRMED_STATUS on every record matching condition.
+
+    Returns total / confirmed / already_confirmed counts (and the matched
+    IDs if return_ids). On PostgreSQL this is one statement: the counts
+    come from a CTE over the matching rows and a data-modifying CTE
+    running UPDATE ... RETURNING. Elsewhere it is an aggregate SELECT
+    followed by the UPDATE in the same transaction.
+    """
+    target = select(
+        Attendance.attendance_id, Attendance.status
+    ).where(condition).cte('target')
+    is_confirmed = target.c.status == CONFIRMED_STATUS
+    counts = [
+        func.count().label('total'),
+        func.coalesce(func.sum(case((is_confirmed, 1), else_=0)), 0).label('already_confirmed'),
+    ]
+
+    if dialect_name() == 'postgresql':
+        if return_ids:
+            counts.append(func.array_agg(target.c.attendance_id).label('found_ids'))
+        updated = (
+            update(Attendance)
+            .where(Attendance.attendance_id == target.c.attendance_id, ~is_confirmed)
+            .values(status=CONFIRMED_STATUS)
+            .returning(Attendance.attendance_id)
+            .cte('updated')
+        )
+        confirmed = select(func.count()).select_from(updated).scalar_subquery()
+        row = db.session.execute(select(*counts, confirmed.label('confirmed')).select_from(target)).one()
+        result = dict(row._mapping)
+        if return_ids:
+            result['found_ids'] = result['found_ids'] or []
+        _refresh_confirmed(condition, result)
+        return result
+
+    row = db.session.execute(select(*counts).select_from(target)).one()
+    result = dict(row._mapping)
+    if return_ids:
+        result['found_ids'] = db.session.execute(select(target.c.attendance_id)).scalars().all()
+    updated = db.session.execute(
+        update(Attendance)
+        .where(condition, Attendance.status != CONFIRMED_STATUS)
+        .values(status=CONFIRMED_STATUS)
+        .execution_options(synchronize_session=False)
+    )
+    result['confirmed'] = updated.rowcount
+    _refresh_confirmed(condition, result)
+    return result
+
+def _refresh_confirmed(condition, result):
+    if result['confirmed']:
+        keys = db.session.execute(
+            select(Attendance.student_id, Attendance.class_id, Attendance.date).where(condition)
+        ).all()
+        refresh_attendance_rollups(keys)
+
+def _existing_ids(column, ids):
+    if not ids:
+        return set()
+    return set(db.session.execute(select(column).where(column.in_(ids))).scalars())
+
+# Log new attendance (idempotent: re-posting the same student/class/date updates the status)
 @attendance_bp.route('/', methods=['POST'])
 def log_attendance():
     data = request.get_json()
-    required_fields = ['student_id', 'class_id', 'date', 'status']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({'error': f'Missing field: {field}'}), 400
+    values, errors = _validate_record(data)
+    if errors:
+        return jsonify({'error': errors[0], 'errors': errors}), 400
 
-    attendance = Attendance(
-        student_id=data['student_id'],
-        class_id=data['class_id'],
-        date=data['date'],
-        status=data['status']
-    )
-    db.session.add(attendance)
+    created, updated = _upsert_attendance([values])
+    refresh_attendance_rollups([(values['student_id'], values['class_id'], values['date'])])
     db.session.commit()
-    return jsonify({'message': 'Attendance logged'}), 201
+    dashboard_cache.invalidate()
+    if created:
+        return jsonify({'message': 'Attendance logged', 'created': created, 'updated': updated}), 201
+    return jsonify({'message': 'Attendance updated', 'created': created, 'updated': updated}), 200
 
 # List all attendance records
 @attendance_bp.route('/', methods=['GET'])
@@ -29,15 +181,26 @@ def get_all_attendance():
     class_id = request.args.get('class_id')
     date = request.args.get('date')
 
-    query = Attendance.query
+    conditions = []
     if student_id:
-        query = query.filter_by(student_id=student_id)
+        conditions.append(Attendance.student_id == student_id)
     if class_id:
-        query = query.filter_by(class_id=class_id)
+        conditions.append(Attendance.class_id == class_id)
     if date:
-        query = query.filter_by(date=date)
+        conditions.append(Attendance.date == date)
+
+    # ?format=ndjson|csv streams the whole result instead of building a list
+    fmt = export_format()
+    if fmt:
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        stmt = select(
+            Attendance.attendance_id, Attendance.student_id, Attendance.class_id,
+            Attendance.date, Attendance.status
+        ).where(*conditions).order_by(Attendance.attendance_id)
+        return stream_export(stmt, fmt, 'attendance')
 
-    records = query.all()
+    records = Attendance.query.filter(*conditions).all()
     return jsonify([
         {
             'attendance_id': r.attendance_id,
@@ -70,12 +233,24 @@ def update_attendance(attendance_id):
         return jsonify({'error': 'Record not found'}), 404
 
     data = request.get_json()
+    old_key = (record.student_id, record.class_id, record.date)
     record.student_id = data.get('student_id', record.student_id)
     record.class_id = data.get('class_id', record.class_id)
-    record.date = data.get('date', record.date)
+    if 'date' in data:
+        try:
+            record.date = datetime.strptime(str(data['date']), '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     record.status = data.get('status', record.status)
 
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Attendance already recorded for this student, class and date'}), 409
+    refresh_attendance_rollups([old_key, (record.student_id, record.class_id, record.date)])
     db.session.commit()
+    dashboard_cache.invalidate()
     return jsonify({'message': 'Attendance updated'})
 
 #  Delete a record
@@ -85,44 +260,120 @@ def delete_attendance(attendance_id):
     if not record:
         return jsonify({'error': 'Record not found'}), 404
 
+    key = (record.student_id, record.class_id, record.date)
     db.session.delete(record)
+    db.session.flush()
+    refresh_attendance_rollups([key])
     db.session.commit()
+    dashboard_cache.invalidate()
     return jsonify({'message': 'Attendance record deleted'})
 
 # Batch log attendance
 @attendance_bp.route('/batch', methods=['POST'])
 def log_attendance_batch():
+    """
+    Bulk-insert a list of attendance records.
+
+    Every record is validated (required fields, status, date, known
+    student and class); valid ones are upserted on (student_id, class_id,
+    date) with one executemany per chunk (?chunk_size=, default
+    BATCH_CHUNK_SIZE) and committed chunk by chunk, so retries are safe.
+    Rejected records are reported by their index in the payload.
+    """
+    started = time.perf_counter()
     data = request.get_json()
     if not isinstance(data, list):
         return jsonify({'error': 'Expected a list of attendance records'}), 400
-    created = 0
-    for record in data:
-        required_fields = ['student_id', 'class_id', 'date', 'status']
-        if not all(field in record for field in required_fields):
-            continue  # skip invalid records
-        attendance = Attendance(
-            student_id=record['student_id'],
-            class_id=record['class_id'],
-            date=record['date'],
-            status=record['status']
-        )
-        db.session.add(attendance)
-        created += 1
-    db.session.commit()
-    return jsonify({'message': f'Batch attendance logged: {created} records'}), 201
+    chunk_size = max(request.args.get('chunk_size', BATCH_CHUNK_SIZE, type=int), 1)
+
+    rows, errors = [], []
+    for index, record in enumerate(data):
+        values, record_errors = _validate_record(record)
+        if record_errors:
+            errors.append({'index': index, 'errors': record_errors})
+        else:
+            rows.append((index, values))
+
+    # A key repeated within the payload collapses to its last occurrence
+    last_index = {}
+    for index, values in rows:
+        last_index[(values['student_id'], values['class_id'], values['date'])] = index
+    duplicates = len(rows) - len(last_index)
+    rows = [(index, values) for index, values in rows
+            if last_index[(values['student_id'], values['class_id'], values['date'])] == index]
+
+    # Check referenced students and classes with one IN query each
+    known_students = _existing_ids(Student.student_id, {v['student_id'] for _, v in rows})
+    known_classes = _existing_ids(Class.class_id, {v['class_id'] for _, v in rows})
+    valid = []
+    for index, values in rows:
+        record_errors = []
+        if values['student_id'] not in known_students:
+            record_errors.append(f"Unknown student_id: {values['student_id']}")
+        if values['class_id'] not in known_classes:
+            record_errors.append(f"Unknown class_id: {values['class_id']}")
+        if record_errors:
+            errors.append({'index': index, 'errors': record_errors})
+        else:
+            valid.append(values)
+
+    created = updated = 0
+    chunks = 0
+    for i in range(0, len(valid), chunk_size):
+        chunk = valid[i:i + chunk_size]
+        chunk_created, chunk_updated = _upsert_attendance(chunk)
+        refresh_attendance_rollups((r['student_id'], r['class_id'], r['date']) for r in chunk)
+        db.session.commit()
+        created += chunk_created
+        updated += chunk_updated
+        chunks += 1
+    if valid:
+        dashboard_cache.invalidate()
+
+    errors.sort(key=lambda e: e['index'])
+    elapsed = time.perf_counter() - started
+    _record_batch_metrics(len(data), created + updated, len(errors), elapsed)
+
+    return jsonify({
+        'message': f'Batch attendance logged: {created + updated} records',
+        'created': created,
+        'updated': updated,
+        'duplicates_in_batch': duplicates,
+        'rejected': len(errors),
+        'errors': errors,
+        'chunks': chunks,
+        'elapsed_ms': round(elapsed * 1000, 2),
+        'rows_per_second': round(len(data) / elapsed, 1) if elapsed else None
+    }), 201
+
+# GET /attendance/batch/metrics
+@attendance_bp.route('/batch/metrics', methods=['GET'])
+def attendance_batch_metrics():
+    """Cumulative batch ingest throughput for this process"""
+    with _metrics_lock:
+        metrics = dict(batch_metrics)
+    metrics['rows_per_second'] = (
+        round(metrics['rows_received'] / metrics['total_seconds'], 1) if metrics['total_seconds'] else None
+    )
+    return jsonify(metrics)
 
 # PUT /api/attendance/<int:attendance_id>/confirm
 @attendance_bp.route('/<int:attendance_id>/confirm', methods=['PUT'])
 def confirm_attendance(attendance_id):
     """Confirm a specific attendance record"""
     record = Attendance.query.get(attendance_id)
-   
+    if not record:
+        return jsonify({'error': 'Record not found'}), 404
+
     # Check if already confirmed
-    if record.status == 'Confirmed':
+    if record.status == CONFIRMED_STATUS:
         return jsonify({'message': f'Attendance ID {attendance_id} is already confirmed'}), 200
 
-    record.status = 'Confirmed'
+    record.status = CONFIRMED_STATUS
+    db.session.flush()
+    refresh_attendance_rollups([(record.student_id, record.class_id, record.date)])
     db.session.commit()
+    dashboard_cache.invalidate()
     return jsonify({
         'message': f'Attendance ID {attendance_id} confirmed successfully',
         'attendance_id': attendance_id,
@@ -141,29 +392,27 @@ def confirm_attendance_batch():
     attendance_ids = data['attendance_ids']
     if not isinstance(attendance_ids, list):
         return jsonify({'error': 'attendance_ids must be a list'}), 400
-    
-    confirmed_count = 0
-    already_confirmed_count = 0
-    not_found_ids = []
-    
-    for attendance_id in attendance_ids:
-        record = Attendance.query.get(attendance_id)
-        if not record:
-            not_found_ids.append(attendance_id)
-            continue
-            
-        if record.status == 'Confirmed':
-            already_confirmed_count += 1
-        else:
-            record.status = 'Confirmed'
-            confirmed_count += 1
-    
+    try:
+        attendance_ids = list(dict.fromkeys(int(i) for i in attendance_ids))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'attendance_ids must be integers'}), 400
+
+    if dialect_name() == 'postgresql':
+        # One array parameter instead of one bind per ID
+        id_filter = Attendance.attendance_id == any_(bindparam('ids', attendance_ids, type_=ARRAY(Integer)))
+    else:
+        id_filter = Attendance.attendance_id.in_(attendance_ids)
+
+    result = _confirm_where(id_filter, return_ids=True)
     db.session.commit()
-    
+    if result['confirmed']:
+        dashboard_cache.invalidate()
+
+    not_found_ids = sorted(set(attendance_ids) - set(result['found_ids']))
     response = {
         'message': f'Batch confirmation completed',
-        'confirmed': confirmed_count,
-        'already_confirmed': already_confirmed_count,
+        'confirmed': result['confirmed'],
+        'already_confirmed': result['already_confirmed'],
         'not_found': len(not_found_ids)
     }
     
@@ -185,29 +434,61 @@ def confirm_attendance_by_class():
     
     class_id = data['class_id']
     date = data['date']
+    try:
+        day = datetime.strptime(str(date), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    result = _confirm_where(and_(Attendance.class_id == class_id, Attendance.date == day))
+    db.session.commit()
     
-    # Find all attendance records for this class and date
-    records = Attendance.query.filter_by(class_id=class_id, date=date).all()
-    
-    if not records:
+    if not result['total']:
         return jsonify({'error': 'No attendance records found for the specified class and date'}), 404
-    
-    confirmed_count = 0
-    already_confirmed_count = 0
-    
-    for record in records:
-        if record.status == 'Confirmed':
-            already_confirmed_count += 1
-        else:
-            record.status = 'Confirmed'
-            confirmed_count += 1
-    
-    db.session.commit()
+    if result['confirmed']:
+        dashboard_cache.invalidate()
     
     return jsonify({
         'message': f'All attendance records for class {class_id} on {date} confirmed',
-        'total_records': len(records),
-        'confirmed': confirmed_count,
-        'already_confirmed': already_confirmed_count
-    }), 200    
+        'total_records': result['total'],
+        'confirmed': result['confirmed'],
+        'already_confirmed': result['already_confirmed']
+    }), 200
 
+# PUT /api/attendance/confirm/range
+@attendance_bp.route('/confirm/range', methods=['PUT'])
+def confirm_attendance_by_range():
+    """Confirm all attendance records for a class between two dates (inclusive), e.g. a whole week"""
+    data = request.get_json() or {}
+
+    required_fields = ['class_id', 'start_date', 'end_date']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'error': f'Missing field: {field}'}), 400
+
+    try:
+        start_date = datetime.strptime(str(data['start_date']), '%Y-%m-%d').date()
+        end_date = datetime.strptime(str(data['end_date']), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    if start_date > end_date:
+        return jsonify({'error': 'start_date must not be after end_date'}), 400
+
+    class_id = data['class_id']
+    result = _confirm_where(and_(
+        Attendance.class_id == class_id,
+        Attendance.date >= start_date,
+        Attendance.date <= end_date
+    ))
+    db.session.commit()
+
+    if not result['total']:
+        return jsonify({'error': 'No attendance records found for the specified class and dates'}), 404
+    if result['confirmed']:
+        dashboard_cache.invalidate()
+
+    return jsonify({
+        'message': f'Attendance records for class {class_id} from {start_date} to {end_date} confirmed',
+        'total_records': result['total'],
+        'confirmed': result['confirmed'],
+        'already_confirmed': result['already_confirmed']
+    }), 200
@@ -1,22 +1,57 @@
 from flask import Blueprint, request, jsonify
 from models import db, Behavioral
-from datetime import datetime, date
-from sqlalchemy import and_, or_
+from cache import dashboard_cache
+from datetime import datetime, date, timedelta
+from sqlalchemy import func, tuple_
+from exports import EXPORT_FORMATS, export_format, stream_export
+from behavior_search import search_condition
+from behavior_stats import DEFAULT_RECENT, MAX_BATCH_STUDENTS, MAX_RECENT, behavior_statistics
 
 behavioral_bp = Blueprint('behavioral', __name__)
 
-@behavioral_bp.route('/', methods=['GET'])
-def get_behavioral():
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
 
+def _serialize_behavior(b):
+    return {
+        'behavior_id': b.behavior_id,
+        'student_id': b.student_id,
+        'date': b.date.isoformat(),
+        'behavior_type': b.behavior_type,
+        'category': b.category,
+        'notes': b.notes,
+        'teacher_id': b.teacher_id,
+        'created_at': b.created_at.isoformat() if b.created_at else None,
+        'updated_at': b.updated_at.isoformat() if b.updated_at else None
+    }
 
-# Get query parameters for filtering
-    # Get query parameters for filtering
+def _parse_cursor(cursor):
+    """'<date>_<behavior_id>' (the X-Next-Cursor of the previous page) -> (date, behavior_id)"""
+    day, _, behavior_id = cursor.partition('_')
+    return date.fromisoformat(day), int(behavior_id)
 
-    # Get query parameters for filtering
+@behavioral_bp.route('/', methods=['GET'])
+def get_behavioral():
+    """
+    List behavioral records, most recent first.
 
+    Optional query parameters:
+      student_id, behavior_type, teacher_id, start_date, end_date - filters
+      category  - case-insensitive substring of the category
+      q         - case-insensitive substring of the category or the notes
+      limit     - page size (max MAX_PAGE_SIZE); enables keyset pagination
+                  on (date, behavior_id)
+      cursor    - the X-Next-Cursor value of the previous page
+      count     - 1 to get the number of matching records in X-Total-Count
+                  (computed on the first page only)
+
+    The body is always a list of full records; the cursor for the next
+    page, if any, is sent in the X-Next-Cursor header.
+    """
     student_id = request.args.get('student_id')
     behavior_type = request.args.get('behavior_type')
     category = request.args.get('category')
+    search = request.args.get('q')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     teacher_id = request.args.get('teacher_id')
@@ -30,8 +65,12 @@ def get_behavioral():
     if behavior_type:
         query = query.filter(Behavioral.behavior_type == behavior_type)
     
+    # Substring searches go through the trigram (PostgreSQL) or FTS (SQLite) indexes
     if category:
-        query = query.filter(Behavioral.category.ilike(f'%{category}%'))
+        query = query.filter(search_condition(category, columns=('category',)))
+    
+    if search:
+        query = query.filter(search_condition(search))
     
     if teacher_id:
         query = query.filter(Behavioral.teacher_id == teacher_id)
@@ -50,14 +89,52 @@ def get_behavioral():
         except ValueError:
             return jsonify({'error': 'Invalid end_date format. Use YYYY-MM-DD'}), 400
     
-    # Order by date descending (most recent first)
-    records = query.order_by(Behavioral.date.desc()).all()
+    # ?format=ndjson|csv streams the whole result instead of building a list
+    fmt = export_format()
+    if fmt:
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        stmt = query.with_entities(
+            Behavioral.behavior_id, Behavioral.student_id, Behavioral.behavior_type,
+            Behavioral.category, Behavioral.notes, Behavioral.date, Behavioral.teacher_id
+        ).order_by(Behavioral.date.desc(), Behavioral.behavior_id.desc()).statement
+        return stream_export(stmt, fmt, 'behavior')
+
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    if cursor and not limit:
+        limit = DEFAULT_PAGE_SIZE
+    if limit is not None:
+        limit = min(max(limit, 1), MAX_PAGE_SIZE)
+
+    total = None
+    if request.args.get('count', '').lower() in ('1', 'true', 'yes') and not cursor:
+        total = query.order_by(None).with_entities(func.count(Behavioral.behavior_id)).scalar()
+
+    # Most recent first; behavior_id orders records of the same day
+    query = query.order_by(Behavioral.date.desc(), Behavioral.behavior_id.desc())
+    if cursor:
+        try:
+            cursor_date, cursor_id = _parse_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        # Seeks straight to the page on the (..., date, behavior_id) indexes
+        query = query.filter(tuple_(Behavioral.date, Behavioral.behavior_id) < (cursor_date, cursor_id))
+    if limit:
+        # Fetch one extra row to know whether there is a next page
+        records = query.limit(limit + 1).all()
+        has_more = len(records) > limit
+        records = records[:limit]
+    else:
+        records = query.all()
+        has_more = False
 
-    return jsonify([
-        {
-            'behavior_id': b.behavior_id,
-        } for b in records
-    ]) 
+    response = jsonify([_serialize_behavior(b) for b in records])
+    if has_more:
+        response.headers['X-Next-Cursor'] = f'{records[-1].date.isoformat()}_{records[-1].behavior_id}'
+    if total is not None:
+        response.headers['X-Total-Count'] = str(total)
+    return response
 
 @behavioral_bp.route('/student/<student_id>', methods=['GET'])
 def get_behavioral_by_student(student_id):
@@ -77,62 +154,63 @@ def get_behavioral_by_student(student_id):
     
     records = query.all()
     
-
-    return jsonify([
-        {
-            'behavior_id': b.behavior_id,
-            'student_id': b.student_id,
-            'date': b.date.isoformat(),
-            'behavior_type': b.behavior_type,
-            'category': b.category,
-            'notes': b.notes,
-            'teacher_id': b.teacher_id,
-            'created_at': b.created_at.isoformat() if b.created_at else None,
-            'updated_at': b.updated_at.isoformat() if b.updated_at else None
-        } for b in records
-    ])
+    return jsonify([_serialize_behavior(b) for b in records])
 
 
 @behavioral_bp.route('/stats/<student_id>', methods=['GET'])
 def get_behavioral_stats(student_id):
     """Get behavioral statistics for a specific student"""
-    from sqlalchemy import func
-    
-    # Get counts by behavior type
-    stats = db.session.query(
-        Behavioral.behavior_type,
-        func.count(Behavioral.behavior_id).label('count')
-    ).filter(
-        Behavioral.student_id == student_id
-    ).group_by(Behavioral.behavior_type).all()
-    
-    # Get recent behavioral trends (last 30 days)
-    from datetime import timedelta
-    thirty_days_ago = date.today() - timedelta(days=30)
-    recent_records = Behavioral.query.filter(
-        and_(
-            Behavioral.student_id == student_id,
-            Behavioral.date >= thirty_days_ago
-        )
-    ).order_by(Behavioral.date.desc()).all()
-    
-    stats_dict = {stat.behavior_type: stat.count for stat in stats}
-    
-    return jsonify({
-        'student_id': student_id,
-        'total_records': sum(stats_dict.values()),
-        'behavior_counts': stats_dict,
-        'recent_behaviors': [
-            {
-                'behavior_id': b.behavior_id,
-                'date': b.date.isoformat(),
-                'behavior_type': b.behavior_type,
-                'category': b.category,
-                'notes': b.notes,
-                'teacher_id': b.teacher_id
-            } for b in recent_records[:10]  # Last 10 records
-        ]
-    })
+    stats = behavior_statistics([student_id], since=date.today() - timedelta(days=30)).get(student_id)
+    if stats is None:
+        stats = {'student_id': student_id, 'total_records': 0, 'behavior_counts': {}, 'recent_behaviors': []}
+    stats.pop('category_counts', None)
+    return jsonify(stats)
+
+def _batch_stats_response(student_ids=None, class_id=None, recent=None, days=None):
+    try:
+        recent = DEFAULT_RECENT if recent is None else int(recent)
+        days = None if days in (None, '') else int(days)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'recent and days must be integers'}), 400
+    recent = min(max(recent, 0), MAX_RECENT)
+    since = date.today() - timedelta(days=days) if days is not None else None
+    stats = behavior_statistics(student_ids=student_ids, class_id=class_id, recent=recent, since=since)
+    if student_ids is not None:
+        return jsonify([stats[s] for s in dict.fromkeys(student_ids) if s in stats])
+    return jsonify(list(stats.values()))
+
+@behavioral_bp.route('/stats', methods=['GET'])
+def get_class_behavioral_stats():
+    """
+    Behavioral statistics for every student in a class, in one query.
+
+    Query parameters: class_id (required), recent (last N records per
+    student, default DEFAULT_RECENT, max MAX_RECENT), days (only records
+    from the last N days in the recent list).
+    """
+    class_id = request.args.get('class_id', type=int)
+    if class_id is None:
+        return jsonify({'error': 'class_id is required'}), 400
+    return _batch_stats_response(class_id=class_id, recent=request.args.get('recent'),
+                                 days=request.args.get('days'))
+
+@behavioral_bp.route('/stats/batch', methods=['POST'])
+def get_batch_behavioral_stats():
+    """
+    Behavioral statistics for many students, in one query.
+
+    Body: {"student_ids": [...], "recent": N, "days": N}; recent and days
+    as for GET /stats. Returns one entry per known student, in request order.
+    """
+    data = request.get_json(silent=True) or {}
+    student_ids = data.get('student_ids')
+    if not isinstance(student_ids, list) or not student_ids:
+        return jsonify({'error': 'student_ids must be a non-empty list'}), 400
+    if len(student_ids) > MAX_BATCH_STUDENTS:
+        return jsonify({'error': f'At most {MAX_BATCH_STUDENTS} student_ids per request'}), 400
+    return _batch_stats_response(student_ids=[str(s) for s in student_ids], recent=data.get('recent'),
+                                 days=data.get('days'))
+
 @behavioral_bp.route('/', methods=['POST'])
 def add_behavioral():
     data = request.get_json()
@@ -161,6 +239,7 @@ def add_behavioral():
 
     db.session.add(record)
     db.session.commit()
+    dashboard_cache.invalidate()
     return jsonify({
             'message': 'Behavioral record added successfully',
             'behavior_id': record.behavior_id,
@@ -190,6 +269,7 @@ def update_behavioral(behavior_id):
             record.date = datetime.fromisoformat(data['date']).date()
         
         db.session.commit()
+        dashboard_cache.invalidate()
         
         return jsonify({
             'message': 'Behavioral record updated successfully',
@@ -209,6 +289,7 @@ def delete_behavioral(behavior_id):
         record = Behavioral.query.get_or_404(behavior_id)
         db.session.delete(record)
         db.session.commit()
+        dashboard_cache.invalidate()
         
         return jsonify({'message': 'Behavioral record deleted successfully'})
         
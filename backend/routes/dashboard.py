@@ -1,46 +1,55 @@
-from flask import Blueprint, jsonify
-from models import db, Student, Assessment, Attendance
+from flask import Blueprint, request, jsonify
+from models import db, Student, Class, Assessment, AssessmentAggregate, Attendance, AttendanceDailyRollup, AttendanceTermRollup
 from sqlalchemy import func
+from assessment_aggregates import average_percentage
+from subjects import subject_name
+from early_warning import at_risk_students, get_thresholds, get_weights, DEFAULT_THRESHOLDS, DEFAULT_WEIGHTS
+from cache import dashboard_cache
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/api/dashboard/summary', methods=['GET'])
 def dashboard_summary():
+    return jsonify(dashboard_cache.get_or_set('summary', _compute_summary))
+
+def _compute_summary():
     # Total students
     total_students = db.session.query(func.count(Student.student_id)).scalar()
 
-    # Average assessment score (as percentage)
-    avg_score = db.session.query(
-        func.avg((Assessment.score / Assessment.max_score) * 100)
-    ).scalar() or 0
+    # Average assessment score (as percentage), from the per student/subject/term aggregates
+    avg_score = db.session.query(average_percentage()).scalar() or 0
 
-    # Attendance rate (present/total)
-    total_attendance = db.session.query(func.count(Attendance.attendance_id)).scalar() or 0
-    present_attendance = db.session.query(func.count(Attendance.attendance_id)).filter(Attendance.status == 'present').scalar() or 0
+    # Attendance rate (present/total), from the per class per day rollup
+    total_attendance, present_attendance = db.session.query(
+        func.coalesce(func.sum(AttendanceDailyRollup.total), 0),
+        func.coalesce(func.sum(AttendanceDailyRollup.present), 0)
+    ).one()
     attendance_rate = (present_attendance / total_attendance * 100) if total_attendance else 0
 
     # High performers (students with avg score >= 80%)
-    high_performers = db.session.query(Assessment.student_id).group_by(Assessment.student_id).having(
-        func.avg((Assessment.score / Assessment.max_score) * 100) >= 80
-    ).count()
+    high_performers = db.session.query(AssessmentAggregate.student_id).group_by(
+        AssessmentAggregate.student_id
+    ).having(average_percentage() >= 80).count()
 
-    return jsonify({
+    return {
         'total_students': total_students,
         'average_score': round(avg_score, 2),
         'attendance_rate': round(attendance_rate, 2),
         'high_performers': high_performers
-    })
+    }
 
-@dashboard_bp.route('/api/students/<int:student_id>/performance', methods=['GET'])
+@dashboard_bp.route('/api/students/<student_id>/performance', methods=['GET'])
 def student_performance(student_id):
-    # Average score for this student
-    avg_score = db.session.query(
-        func.avg((Assessment.score / Assessment.max_score) * 100)
-    ).filter(Assessment.student_id == student_id).scalar() or 0
-
-    # Attendance rate for this student
-    total_attendance = db.session.query(func.count(Attendance.attendance_id)).filter(Attendance.student_id == student_id).scalar() or 0
-    present_attendance = db.session.query(func.count(Attendance.attendance_id)).filter(Attendance.student_id == student_id, Attendance.status == 'present').scalar() or 0
+    # Average score for this student: a handful of aggregate rows, not every assessment
+    avg_score = db.session.query(average_percentage()).filter(
+        AssessmentAggregate.student_id == student_id
+    ).scalar() or 0
+
+    # Attendance rate for this student, from the per student per term rollup
+    total_attendance, present_attendance = db.session.query(
+        func.coalesce(func.sum(AttendanceTermRollup.total), 0),
+        func.coalesce(func.sum(AttendanceTermRollup.present), 0)
+    ).filter(AttendanceTermRollup.student_id == student_id).one()
     attendance_rate = (present_attendance / total_attendance * 100) if total_attendance else 0
 
     # High performer?
@@ -57,12 +66,13 @@ def student_performance(student_id):
 @dashboard_bp.route('/api/dashboard/subject-performance', methods=['GET'])
 def subject_performance():
     results = db.session.query(
-        Assessment.subject,
-        func.avg((Assessment.score / Assessment.max_score) * 100).label('average_score')
-    ).group_by(Assessment.subject).all()
+        AssessmentAggregate.subject_id,
+        average_percentage().label('average_score')
+    ).group_by(AssessmentAggregate.subject_id).all()
 
+    # Names come from the subject cache rather than a join
     data = [
-        {'subject': r.subject, 'average_score': round(r.average_score, 2)}
+        {'subject_id': r.subject_id, 'subject': subject_name(r.subject_id), 'average_score': round(r.average_score, 2)}
         for r in results
     ]
     return jsonify({'subjects': data})
@@ -71,53 +81,59 @@ def subject_performance():
 # Alerts for underperforming students
 @dashboard_bp.route('/api/dashboard/alerts', methods=['GET'])
 def alerts():
-    failing_students = []
-    students = Student.query.all()
-
-    for student in students:
-        # Scores
-        avg_score = db.session.query(
-            func.avg((Assessment.score / Assessment.max_score) * 100)
-        ).filter(Assessment.student_id == student.student_id).scalar() or 0
+    """At-risk students, sorted by risk score and paginated"""
+    class_id = request.args.get('class_id', type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
 
-        # Attendance
-        total_attendance = db.session.query(func.count(Attendance.attendance_id)).filter_by(student_id=student.student_id).scalar() or 0
-        present_attendance = db.session.query(func.count(Attendance.attendance_id)).filter_by(student_id=student.student_id, status='present').scalar() or 0
-        attendance_rate = (present_attendance / total_attendance * 100) if total_attendance else 0
+    thresholds = get_thresholds({
+        key: request.args.get(key, type=float) for key in DEFAULT_THRESHOLDS
+    })
+    weights = get_weights({
+        key: request.args.get(f'weight_{key}', type=float) for key in DEFAULT_WEIGHTS
+    })
 
-        # Behavior misconduct
-        misconduct_count = db.session.query(func.count(Behavior.behavior_id)).filter_by(student_id=student.student_id).scalar()
+    cache_key = 'alerts:' + '&'.join(
+        f'{k}={v}' for k, v in sorted(request.args.items()) if k != 'nocache'
+    )
+    return jsonify(dashboard_cache.get_or_set(cache_key, lambda: at_risk_students(
+        class_id=class_id,
+        page=page,
+        per_page=per_page,
+        thresholds=thresholds,
+        weights=weights
+    )))
 
-        if avg_score < 50 or attendance_rate < 50 or misconduct_count > 0:
-            failing_students.append({
-                'student_id': student.student_id,
-                'name': student.name,
-                'avg_score': round(avg_score, 2),
-                'attendance_rate': round(attendance_rate, 2),
-                'misconduct_issues': misconduct_count
-            })
 
-    return jsonify({'alerts': failing_students})
+# Cache hit/miss counters, for debugging
+@dashboard_bp.route('/api/dashboard/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify(dashboard_cache.stats())
 
 
 # Top Students with class info
 @dashboard_bp.route('/api/dashboard/top-students', methods=['GET'])
 def top_students():
+    avg_score = average_percentage()
     top = db.session.query(
-        Assessment.student_id,
-        func.avg((Assessment.score / Assessment.max_score) * 100).label('avg_score')
-    ).group_by(Assessment.student_id).order_by(func.avg((Assessment.score / Assessment.max_score) * 100).desc()).limit(5).all()
-
-    data = []
-    for t in top:
-        student = Student.query.get(t.student_id)
-        classes = db.session.query(Class.name).join(Attendance).filter(Attendance.student_id == t.student_id).distinct().all()
-        data.append({
-            'student_id': student.student_id,
-            'name': student.name,
-            'avg_score': round(t.avg_score, 2),
-            'classes': [c.name for c in classes]
-        })
+        Student.student_id,
+        Student.full_name,
+        Class.class_name,
+        avg_score.label('avg_score')
+    ).join(
+        AssessmentAggregate, AssessmentAggregate.student_id == Student.student_id
+    ).outerjoin(
+        Class, Class.class_id == Student.class_id
+    ).group_by(
+        Student.student_id, Student.full_name, Class.class_name
+    ).order_by(avg_score.desc(), Student.student_id).limit(5).all()
+
+    data = [{
+        'student_id': t.student_id,
+        'name': t.full_name,
+        'avg_score': round(t.avg_score, 2),
+        'classes': [t.class_name] if t.class_name else []
+    } for t in top]
 
     return jsonify({'top_students': data})
 
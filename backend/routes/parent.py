@@ -1,47 +1,44 @@
 from flask import Blueprint, request, jsonify
-from models import db, Parent, Student, Attendance, Assessment, Behavior
+from models import User, Parent
 from werkzeug.security import check_password_hash
-from flask_jwt_extended import create_access_token
+from auth import current_profile_id, login_user, require_role
+from datetime import datetime
+from parent_dashboard import DEFAULT_RECENT, MAX_RECENT, parent_dashboard
 
 parents_bp = Blueprint('parents', __name__)
 
 @parents_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
-    parent = Parent.query.filter_by(email=data['email']).first()
-    if parent and check_password_hash(parent.password, data['password']):
-        access_token = create_access_token(identity=parent.parent_id)
-        return jsonify(access_token=access_token)
+    user = User.query.filter_by(email=data['email']).first()
+    if user and check_password_hash(user.password_hash, data['password']):
+        parent = Parent.query.filter_by(user_id=user.user_id).first()
+        if not parent:
+            return jsonify({'error': 'No parent profile linked to this user'}), 404
+        login_user(user, profile_id=parent.parent_id)
+        return jsonify({'message': 'Logged in', 'parent_id': parent.parent_id})
     return jsonify({'error': 'Invalid credentials'}), 401
 
 @parents_bp.route('/dashboard', methods=['GET'])
-@jwt_required()
+@require_role('parent')
 def dashboard():
-    parent_id = get_jwt_identity()
-    parent = Parent.query.get(parent_id)
-    student = parent.student
+    """
+    Every linked child with current-term summaries and their latest items.
 
-    attendance = Attendance.query.filter_by(student_id=student.student_id).all()
-    assessments = Assessment.query.filter_by(student_id=student.student_id).all()
-    behaviors = Behavior.query.filter_by(student_id=student.student_id).all()
+    Optional query parameters:
+      recent - items per category per child (default DEFAULT_RECENT, max MAX_RECENT)
+      since  - YYYY-MM-DD; only items dated on or after it (incremental refresh)
+    """
+    recent = request.args.get('recent', DEFAULT_RECENT, type=int)
+    recent = min(max(recent, 1), MAX_RECENT)
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.strptime(since, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid since format. Use YYYY-MM-DD'}), 400
 
-    return jsonify({
-        'student': {
-            'name': student.full_name,
-            'class_id': student.class_id
-        },
-        'attendance': [{'date': a.date.isoformat(), 'status': a.status} for a in attendance],
-        'assessments': [{
-            'subject': a.subject_name,
-            'score': a.score,
-            'max_score': a.max_score,
-            'type': a.assessment_type,
-            'date': a.date_taken.isoformat()
-        } for a in assessments],
-        'behaviors': [{
-            'type': b.behavior_type,
-            'severity': b.severity,
-            'notes': b.notes,
-            'date': b.date.isoformat()
-        } for b in behaviors]
-    })
+    data = parent_dashboard(current_profile_id(), recent=recent, since=since or None)
+    if data is None:
+        return jsonify({'error': 'Parent not found'}), 404
+    return jsonify(data)
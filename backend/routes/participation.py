@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from models import db, Participation
+from models import db, Participation, Student
 from datetime import datetime
+from participation_stats import BREAKDOWNS, rating_summary
 
 participation_bp = Blueprint('participation', __name__)
 
@@ -15,6 +16,7 @@ def get_participation_by_date(date):
             'event_name': p.event_name,
             'date': p.date.isoformat(),
             'status': p.status,
+            'rating': p.rating,
             'remarks': p.remarks
         } for p in logs
     ])
@@ -24,8 +26,11 @@ def get_participation_by_date(date):
 def add_participation():
     data = request.get_json()
     try:
+        student = db.session.get(Student, data['student_id'])
         participation = Participation(
             student_id=data['student_id'],
+            # The class the record counts for; defaults to the student's current class
+            class_id=data.get('class_id') or (student.class_id if student else None),
             event_name=data['event_name'],
             date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
             status=data['status'],
@@ -48,6 +53,7 @@ def get_all_participation():
             "event_name": p.event_name,
             "date": p.date.isoformat(),
             "status": p.status,
+            "rating": p.rating,
             "remarks": p.remarks
         } for p in records
     ]), 200
@@ -64,6 +70,7 @@ def get_participation_by_id(pid):
         "event_name": p.event_name,
         "date": p.date.isoformat(),
         "status": p.status,
+        "rating": p.rating,
         "remarks": p.remarks
     }), 200
 
@@ -101,27 +108,35 @@ def delete_participation(pid):
 # GET /api/participation/average-rating
 @participation_bp.route('/average-rating', methods=['GET'])
 def average_participation_rating():
-    rating_map = {
-        "Excellent": 5,
-        "Good": 4,
-        "Average": 3,
-        "Poor": 2,
-        "None": 1
-    }
+    """
+    Average participation rating, optionally broken down.
 
-    records = Participation.query.all()
-    if not records:
-        return jsonify({'average_rating': 0, 'message': 'No participation records found'}), 200
-
-    ratings = []
-    for p in records:
-        status = p.status.strip().capitalize()
-        score = rating_map.get(status)
-        if score:
-            ratings.append(score)
-
-    if not ratings:
-        return jsonify({'average_rating': 0, 'message': 'No valid ratings found'}), 200
+    Query parameters:
+      by - comma-separated breakdowns: student, class, event, month
+      student_id, class_id, event_name, start_date, end_date - filters
+    """
+    breakdowns = [name.strip() for name in request.args.get('by', '').split(',') if name.strip()]
+    unknown = [name for name in breakdowns if name not in BREAKDOWNS]
+    if unknown:
+        return jsonify({'error': f"Unknown breakdown: {', '.join(unknown)}. Use: {', '.join(BREAKDOWNS)}"}), 400
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
 
-    avg_rating = round(sum(ratings) / len(ratings), 2)
-    return jsonify({'average_rating': avg_rating}), 200
+    summary = rating_summary(
+        breakdowns=list(dict.fromkeys(breakdowns)),
+        student_id=request.args.get('student_id'),
+        class_id=request.args.get('class_id', type=int),
+        event_name=request.args.get('event_name'),
+        start_date=start_date,
+        end_date=end_date,
+    )
+    if not summary['records']:
+        summary.update(average_rating=0, message='No participation records found')
+    elif not summary['rated_records']:
+        summary.update(average_rating=0, message='No valid ratings found')
+    return jsonify(summary), 200
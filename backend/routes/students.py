@@ -7,6 +7,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Importing the necessary Flask and database components
 from flask import Flask, Blueprint, request, jsonify
 from models import db, Student, Class, Guardian, EmergencyContact
+from cache import dashboard_cache, rankings_cache
+from student_ids import next_student_id
+from bulk_import import import_students, detect_format, DEFAULT_CHUNK_SIZE
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, selectinload
 import datetime
 
 # Create a blueprint for student related routes
@@ -17,6 +22,42 @@ from flask_cors import CORS, cross_origin
 students_bp = Blueprint('students', __name__)
 CORS(students_bp)
 
+# Fields that can be requested from GET /students/?fields=...
+# (response key -> column name, or a loader for child collections)
+LIST_FIELDS = {
+    'id': 'student_id',
+    'name': 'full_name',
+    'class_id': 'class_id',
+    'gender': 'gender',
+    'date_of_birth': 'date_of_birth',
+    'enrollment_date': 'enrollment_date',
+    'guardians': Student.guardians,
+    'emergencyContacts': Student.emergency_contacts,
+}
+DEFAULT_LIST_FIELDS = ['id', 'name', 'class_id', 'guardians', 'emergencyContacts']
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def _serialize_contact(c):
+    return {
+        'firstName': c.first_name,
+        'lastName': c.last_name,
+        'relationship': c.relationship,
+        'contact': c.contact
+    }
+
+def _serialize_student(s, fields):
+    data = {}
+    for field in fields:
+        if field == 'guardians':
+            data[field] = [_serialize_contact(g) for g in s.guardians]
+        elif field == 'emergencyContacts':
+            data[field] = [_serialize_contact(e) for e in s.emergency_contacts]
+        else:
+            value = getattr(s, LIST_FIELDS[field])
+            data[field] = value.isoformat() if isinstance(value, datetime.date) else value
+    return data
+
 @students_bp.route('/', methods=['GET'])
 
 # Get all students
@@ -26,32 +67,69 @@ CORS(students_bp)
 @cross_origin()
 
 def get_students():
+    """
+    List students.
+
+    Optional query parameters:
+      class_id  - only students in this class
+      name      - case-insensitive substring match on the full name
+      fields    - comma-separated subset of LIST_FIELDS to return; guardians
+                  and emergency contacts are only loaded when requested
+      limit     - page size (max MAX_PAGE_SIZE); enables keyset pagination
+      cursor    - the X-Next-Cursor value of the previous page
+
+    The body is always a list; the cursor for the next page, if any, is sent
+    in the X-Next-Cursor header.
+    """
     if request.method == 'OPTIONS':
         return '', 200
-    students = Student.query.all()
-    return jsonify([
-        {
-            'id': s.student_id,
-            'name': s.full_name,
-            'class_id': s.class_id,
-            'guardians': [
-                {
-                    'firstName': g.first_name,
-                    'lastName': g.last_name,
-                    'relationship': g.relationship,
-                    'contact': g.contact
-                } for g in s.guardians
-            ],
-            'emergencyContacts': [
-                {
-                    'firstName': e.first_name,
-                    'lastName': e.last_name,
-                    'relationship': e.relationship,
-                    'contact': e.contact
-                } for e in s.emergency_contacts
-            ]
-        } for s in students
-    ])
+
+    fields = DEFAULT_LIST_FIELDS
+    if request.args.get('fields'):
+        fields = [f.strip() for f in request.args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in LIST_FIELDS]
+        if unknown:
+            return jsonify({'message': f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    if cursor and not limit:
+        limit = DEFAULT_PAGE_SIZE
+    if limit is not None:
+        limit = min(max(limit, 1), MAX_PAGE_SIZE)
+
+    columns = [LIST_FIELDS[f] for f in fields if isinstance(LIST_FIELDS[f], str)]
+    query = Student.query.options(
+        load_only(*[getattr(Student, c) for c in set(columns) | {'student_id'}])
+    )
+    if 'guardians' in fields:
+        query = query.options(selectinload(Student.guardians))
+    if 'emergencyContacts' in fields:
+        query = query.options(selectinload(Student.emergency_contacts))
+
+    class_id = request.args.get('class_id', type=int)
+    if class_id is not None:
+        query = query.filter(Student.class_id == class_id)
+    name = request.args.get('name')
+    if name:
+        query = query.filter(Student.full_name.ilike(f'%{name}%'))
+
+    query = query.order_by(Student.student_id)
+    if cursor:
+        query = query.filter(Student.student_id > cursor)
+    if limit:
+        # Fetch one extra row to know whether there is a next page
+        students = query.limit(limit + 1).all()
+        has_more = len(students) > limit
+        students = students[:limit]
+    else:
+        students = query.all()
+        has_more = False
+
+    response = jsonify([_serialize_student(s, fields) for s in students])
+    if has_more:
+        response.headers['X-Next-Cursor'] = students[-1].student_id
+    return response
 
 
 @students_bp.route('/', methods=['POST'])
@@ -78,18 +156,12 @@ def add_student():
     if not class_obj:
         class_obj = Class(class_id=class_id, class_name=f'P{class_id}')
         db.session.add(class_obj)
-        db.session.commit()
-    # Generate student_id in format RW-000
-    last_student = Student.query.order_by(Student.student_id.desc()).first()
-    if last_student and str(last_student.student_id).startswith('RW-'):
         try:
-            last_num = int(str(last_student.student_id).split('-')[1])
-        except Exception:
-            last_num = 0
-    else:
-        last_num = 0
-    new_num = last_num + 1
-    new_student_id = f"RW-{new_num:03d}"
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # created concurrently by another request
+    # Allocate student_id in format RW-000
+    new_student_id = next_student_id()
     # Parse date of birth properly
     dob = None
     if data.get('dateOfBirth'):
@@ -131,8 +203,36 @@ def add_student():
         )
         db.session.add(emergency)
     db.session.commit()
+    dashboard_cache.invalidate()
     return jsonify({'message': 'Student added', 'id': student.student_id}), 201
 
+# Bulk import students from a CSV or NDJSON file
+@students_bp.route('/import', methods=['POST'])
+def import_students_file():
+    """
+    Stream a CSV or NDJSON file of students into the database.
+
+    Send the file as multipart field "file" or as the raw request body.
+    The format is taken from ?format=csv|ndjson, else guessed from the
+    filename / content type. Returns a report with per-row errors.
+    """
+    upload = request.files.get('file')
+    if upload:
+        stream, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, None, request.mimetype
+
+    fmt = request.args.get('format') or detect_format(filename, content_type)
+    chunk_size = max(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int), 1)
+    try:
+        report = import_students(stream, fmt, chunk_size=chunk_size)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    if report['imported']:
+        dashboard_cache.invalidate()
+    return jsonify(report), 201 if report['imported'] else 400
+
 @students_bp.route('/<student_id>', methods=['GET'])
 def get_student(student_id):
     student = Student.query.get(student_id)
@@ -145,22 +245,8 @@ def get_student(student_id):
         'date_of_birth': student.date_of_birth.isoformat() if student.date_of_birth else None,
         'enrollment_date': student.enrollment_date.isoformat() if student.enrollment_date else None,
         'class_id': student.class_id,
-        'guardians': [
-            {
-                'firstName': g.first_name,
-                'lastName': g.last_name,
-                'relationship': g.relationship,
-                'contact': g.contact
-            } for g in student.guardians
-        ],
-        'emergencyContacts': [
-            {
-                'firstName': e.first_name,
-                'lastName': e.last_name,
-                'relationship': e.relationship,
-                'contact': e.contact
-            } for e in student.emergency_contacts
-        ]
+        'guardians': [_serialize_contact(g) for g in student.guardians],
+        'emergencyContacts': [_serialize_contact(e) for e in student.emergency_contacts]
     })
 
 @students_bp.route('/<student_id>', methods=['PUT'])
@@ -180,6 +266,8 @@ def update_student(student_id):
     student.class_id = data.get('class_id', student.class_id)
     student.guardian_contact = data.get('guardian_contact', student.guardian_contact)
     db.session.commit()
+    dashboard_cache.invalidate()
+    rankings_cache.invalidate()
     return jsonify({'message': 'Student updated'})
 
 @students_bp.route('/<student_id>', methods=['DELETE'])
@@ -189,6 +277,8 @@ def delete_student(student_id):
         return jsonify({'message': 'Student not found'}), 404
     db.session.delete(student)
     db.session.commit()
+    dashboard_cache.invalidate()
+    rankings_cache.invalidate()
     return jsonify({'message': 'Student deleted'})
 
 @students_bp.route('/classes', methods=['GET'])
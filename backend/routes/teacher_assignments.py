@@ -1,16 +1,14 @@
 from flask import Blueprint, request, jsonify
-from models import db, TeacherClassSubject, Teacher, Class
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from models import db, TeacherClassSubject
+from cache import assignments_cache
+from auth import admin_required
+from subjects import find_subject_id, get_or_create_subject, subject_name
 
 teacher_assignments_bp = Blueprint('teacher_assignments', __name__)
 
-# Placeholder for admin authentication/authorization
-def admin_required(f):
-    def wrapper(*args, **kwargs):
-        # TODO: Implement admin check
-        return f(*args, **kwargs)
-    wrapper.__name__ = f.__name__
-    return wrapper
-
 @teacher_assignments_bp.route('/', methods=['POST'])
 @admin_required
 def assign_teacher():
@@ -18,28 +16,64 @@ def assign_teacher():
     teacher_id = data.get('teacher_id')
     class_id = data.get('class_id')
     subject = data.get('subject')
-    if not all([teacher_id, class_id, subject]):
+    subject_id = data.get('subject_id')
+    if not all([teacher_id, class_id]) or not (subject_id or (isinstance(subject, str) and subject.strip())):
         return jsonify({'message': 'Missing required fields'}), 400
-    assignment = TeacherClassSubject(teacher_id=teacher_id, class_id=class_id, subject=subject)
+    if subject_id:
+        if subject_name(subject_id) is None:
+            return jsonify({'message': 'Subject not found'}), 404
+    else:
+        subject_id, _ = get_or_create_subject(subject)
+    assignment = TeacherClassSubject(teacher_id=teacher_id, class_id=class_id, subject_id=subject_id)
     db.session.add(assignment)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Assignment already exists'}), 409
+    assignments_cache.invalidate()
     return jsonify({'message': 'Assignment created', 'id': assignment.id}), 201
 
+def _assignment_rows(teacher_id=None, class_id=None, subject_id=None):
+    query = select(TeacherClassSubject).options(
+        joinedload(TeacherClassSubject.teacher), joinedload(TeacherClassSubject.class_)
+    ).order_by(TeacherClassSubject.id)
+    if teacher_id is not None:
+        query = query.where(TeacherClassSubject.teacher_id == teacher_id)
+    if class_id is not None:
+        query = query.where(TeacherClassSubject.class_id == class_id)
+    if subject_id is not None:
+        query = query.where(TeacherClassSubject.subject_id == subject_id)
+    return [{
+        'id': a.id,
+        'teacher_id': a.teacher_id,
+        'teacher_name': a.teacher.full_name if a.teacher else None,
+        'class_id': a.class_id,
+        'class_name': a.class_.class_name if a.class_ else None,
+        'subject_id': a.subject_id,
+        'subject': subject_name(a.subject_id)
+    } for a in db.session.scalars(query)]
+
 @teacher_assignments_bp.route('/', methods=['GET'])
 @admin_required
 def list_assignments():
-    assignments = TeacherClassSubject.query.all()
-    result = []
-    for a in assignments:
-        result.append({
-            'id': a.id,
-            'teacher_id': a.teacher_id,
-            'teacher_name': a.teacher.full_name if a.teacher else None,
-            'class_id': a.class_id,
-            'class_name': a.class_.class_name if a.class_ else None,
-            'subject': a.subject
-        })
-    return jsonify(result)
+    """
+    List assignments, optionally filtered by teacher_id, class_id and
+    subject_id or subject (name). Cached until an assignment is created
+    or deleted.
+    """
+    teacher_id = request.args.get('teacher_id', type=int)
+    class_id = request.args.get('class_id', type=int)
+    subject_id = request.args.get('subject_id', type=int)
+    subject = request.args.get('subject')
+    if subject_id is None and subject:
+        subject_id = find_subject_id(subject)
+        if subject_id is None:
+            return jsonify([])
+    key = f'teacher={teacher_id}:class={class_id}:subject={subject_id}'
+    return jsonify(assignments_cache.get_or_set(
+        key, lambda: _assignment_rows(teacher_id, class_id, subject_id)
+    ))
 
 @teacher_assignments_bp.route('/<int:assignment_id>', methods=['DELETE'])
 @admin_required
@@ -49,4 +83,5 @@ def delete_assignment(assignment_id):
         return jsonify({'message': 'Assignment not found'}), 404
     db.session.delete(assignment)
     db.session.commit()
+    assignments_cache.invalidate()
     return jsonify({'message': 'Assignment deleted'}) 
\ No newline at end of file
@@ -1,89 +1,236 @@
--- Users table for login
+-- Generated from models.py by `python migrate.py --dump-schema`; do not edit by hand.
+
+CREATE TABLE id_sequences (
+	name VARCHAR(50) NOT NULL,
+	next_value BIGINT NOT NULL,
+	PRIMARY KEY (name)
+);
+
+CREATE TABLE subjects (
+	subject_id SERIAL NOT NULL,
+	name VARCHAR(100) NOT NULL,
+	PRIMARY KEY (subject_id),
+	UNIQUE (name)
+);
+
 CREATE TABLE users (
-    user_id SERIAL PRIMARY KEY,
-    username VARCHAR(50) UNIQUE NOT NULL,
-    password_hash TEXT NOT NULL,
-    role VARCHAR(20) CHECK (role IN ('admin', 'teacher', 'parent')) NOT NULL,
-    email VARCHAR(100)
+	user_id SERIAL NOT NULL,
+	username VARCHAR(50) NOT NULL,
+	password_hash TEXT NOT NULL,
+	role VARCHAR(20) NOT NULL,
+	email VARCHAR(100),
+	permissions_version INTEGER DEFAULT '1' NOT NULL,
+	PRIMARY KEY (user_id),
+	UNIQUE (username)
 );
 
--- Parents table
 CREATE TABLE parents (
-    parent_id SERIAL PRIMARY KEY,
-    user_id INT REFERENCES users(user_id) ON DELETE CASCADE,
-    full_name VARCHAR(100) NOT NULL,
-    phone VARCHAR(15),
-    address TEXT
+	parent_id SERIAL NOT NULL,
+	user_id INTEGER,
+	full_name VARCHAR(100) NOT NULL,
+	phone VARCHAR(15),
+	address TEXT,
+	PRIMARY KEY (parent_id),
+	FOREIGN KEY(user_id) REFERENCES users (user_id) ON DELETE CASCADE
+);
+
+CREATE TABLE teachers (
+	teacher_id SERIAL NOT NULL,
+	full_name VARCHAR(100) NOT NULL,
+	email VARCHAR(100),
+	phone VARCHAR(15),
+	user_id INTEGER,
+	PRIMARY KEY (teacher_id),
+	FOREIGN KEY(user_id) REFERENCES users (user_id) ON DELETE CASCADE
+);
+
+CREATE TABLE classes (
+	class_id SERIAL NOT NULL,
+	class_name VARCHAR(50) NOT NULL,
+	grade_level VARCHAR(20),
+	teacher_id INTEGER,
+	PRIMARY KEY (class_id),
+	FOREIGN KEY(teacher_id) REFERENCES teachers (teacher_id)
+);
+
+CREATE TABLE attendance_daily_rollup (
+	class_id INTEGER NOT NULL,
+	date DATE NOT NULL,
+	total INTEGER NOT NULL,
+	present INTEGER NOT NULL,
+	absent INTEGER NOT NULL,
+	late INTEGER NOT NULL,
+	excused INTEGER NOT NULL,
+	PRIMARY KEY (class_id, date),
+	FOREIGN KEY(class_id) REFERENCES classes (class_id) ON DELETE CASCADE
 );
 
--- Students table
 CREATE TABLE students (
-    student_id SERIAL PRIMARY KEY,
-    full_name VARCHAR(100) NOT NULL,
-    gender VARCHAR(10),
-    date_of_birth DATE,
-    class_id INT,
-    guardian_contact VARCHAR(15)
+	student_id VARCHAR NOT NULL,
+	full_name VARCHAR(100) NOT NULL,
+	gender VARCHAR(10),
+	date_of_birth DATE,
+	enrollment_date DATE,
+	class_id INTEGER,
+	guardian_contact VARCHAR(15),
+	PRIMARY KEY (student_id),
+	FOREIGN KEY(class_id) REFERENCES classes (class_id)
 );
 
--- Linking table: students <-> parents
-CREATE TABLE student_parent_link (
-    id SERIAL PRIMARY KEY,
-    student_id INT REFERENCES students(student_id) ON DELETE CASCADE,
-    parent_id INT REFERENCES parents(parent_id) ON DELETE CASCADE
+CREATE INDEX ix_students_class_id ON students (class_id);
+
+CREATE TABLE teacher_class_subject (
+	id SERIAL NOT NULL,
+	teacher_id INTEGER NOT NULL,
+	class_id INTEGER NOT NULL,
+	subject_id INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(teacher_id) REFERENCES teachers (teacher_id) ON DELETE CASCADE,
+	FOREIGN KEY(class_id) REFERENCES classes (class_id) ON DELETE CASCADE,
+	FOREIGN KEY(subject_id) REFERENCES subjects (subject_id)
 );
 
--- Teachers table
-CREATE TABLE teachers (
-    teacher_id SERIAL PRIMARY KEY,
-    full_name VARCHAR(100) NOT NULL,
-    email VARCHAR(100),
-    phone VARCHAR(15),
-    user_id INT REFERENCES users(user_id) ON DELETE CASCADE
+CREATE INDEX ix_teacher_class_subject_class ON teacher_class_subject (class_id);
+CREATE UNIQUE INDEX uq_teacher_class_subject ON teacher_class_subject (teacher_id, class_id, subject_id);
+
+CREATE TABLE assessment_aggregates (
+	student_id VARCHAR NOT NULL,
+	subject_id INTEGER NOT NULL,
+	academic_year VARCHAR(10) NOT NULL,
+	term VARCHAR(20) NOT NULL,
+	assessment_count INTEGER NOT NULL,
+	percentage_sum FLOAT NOT NULL,
+	percentage_sq_sum FLOAT NOT NULL,
+	last_date DATE,
+	PRIMARY KEY (student_id, subject_id, academic_year, term),
+	FOREIGN KEY(student_id) REFERENCES students (student_id) ON DELETE CASCADE,
+	FOREIGN KEY(subject_id) REFERENCES subjects (subject_id)
 );
 
--- Classes table
-CREATE TABLE classes (
-    class_id SERIAL PRIMARY KEY,
-    class_name VARCHAR(50) NOT NULL,
-    teacher_id INT REFERENCES teachers(teacher_id)
+CREATE TABLE assessments (
+	assessment_id SERIAL NOT NULL,
+	student_id VARCHAR NOT NULL,
+	subject_id INTEGER NOT NULL,
+	subject_name VARCHAR(100) NOT NULL,
+	assessment_type VARCHAR(50) NOT NULL,
+	score FLOAT NOT NULL,
+	max_score FLOAT NOT NULL,
+	date_taken DATE NOT NULL,
+	term VARCHAR(20),
+	academic_year VARCHAR(10),
+	notes TEXT,
+	created_at TIMESTAMP WITHOUT TIME ZONE,
+	updated_at TIMESTAMP WITHOUT TIME ZONE,
+	PRIMARY KEY (assessment_id),
+	FOREIGN KEY(student_id) REFERENCES students (student_id),
+	FOREIGN KEY(subject_id) REFERENCES subjects (subject_id)
 );
 
--- Attendance table
+CREATE INDEX ix_assessments_student_subject_term ON assessments (student_id, subject_id, term);
+CREATE INDEX ix_assessments_subject_term ON assessments (subject_id, term);
+
 CREATE TABLE attendance (
-    attendance_id SERIAL PRIMARY KEY,
-    student_id INT REFERENCES students(student_id),
-    class_id INT REFERENCES classes(class_id),
-    date DATE NOT NULL,
-    status VARCHAR(10) CHECK (status IN ('present', 'absent', 'late')) NOT NULL
+	attendance_id SERIAL NOT NULL,
+	student_id VARCHAR,
+	class_id INTEGER,
+	date DATE NOT NULL,
+	status VARCHAR(10) NOT NULL,
+	PRIMARY KEY (attendance_id),
+	FOREIGN KEY(student_id) REFERENCES students (student_id),
+	FOREIGN KEY(class_id) REFERENCES classes (class_id)
 );
 
--- Assessments table
-CREATE TABLE assessments (
-    assessment_id SERIAL PRIMARY KEY,
-    student_id INT REFERENCES students(student_id),
-    subject VARCHAR(50),
-    score NUMERIC(5,2),
-    max_score NUMERIC(5,2),
-    assessment_date DATE NOT NULL,
-    remarks TEXT
+CREATE INDEX ix_attendance_class_date ON attendance (class_id, date);
+CREATE INDEX ix_attendance_date ON attendance (date);
+CREATE UNIQUE INDEX uq_attendance_student_class_date ON attendance (student_id, class_id, date);
+
+CREATE TABLE attendance_term_rollup (
+	student_id VARCHAR NOT NULL,
+	academic_year VARCHAR(10) NOT NULL,
+	term VARCHAR(20) NOT NULL,
+	start_date DATE NOT NULL,
+	end_date DATE NOT NULL,
+	total INTEGER NOT NULL,
+	present INTEGER NOT NULL,
+	absent INTEGER NOT NULL,
+	late INTEGER NOT NULL,
+	excused INTEGER NOT NULL,
+	PRIMARY KEY (student_id, academic_year, term),
+	FOREIGN KEY(student_id) REFERENCES students (student_id) ON DELETE CASCADE
+);
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE TABLE behavior (
+	behavior_id SERIAL NOT NULL,
+	student_id VARCHAR NOT NULL,
+	behavior_type VARCHAR(10) NOT NULL,
+	category VARCHAR(50) NOT NULL,
+	notes TEXT,
+	date DATE NOT NULL,
+	teacher_id VARCHAR(20),
+	created_at TIMESTAMP WITHOUT TIME ZONE,
+	updated_at TIMESTAMP WITHOUT TIME ZONE,
+	PRIMARY KEY (behavior_id),
+	FOREIGN KEY(student_id) REFERENCES students (student_id)
+);
+
+CREATE INDEX ix_behavior_category_trgm ON behavior USING gin (category gin_trgm_ops);
+CREATE INDEX ix_behavior_date ON behavior (date, behavior_id);
+CREATE INDEX ix_behavior_notes_trgm ON behavior USING gin (notes gin_trgm_ops);
+CREATE INDEX ix_behavior_student_date ON behavior (student_id, date, behavior_id);
+CREATE INDEX ix_behavior_type_date ON behavior (behavior_type, date, behavior_id);
+
+CREATE TABLE emergency_contacts (
+	id SERIAL NOT NULL,
+	student_id VARCHAR,
+	first_name VARCHAR(100),
+	last_name VARCHAR(100),
+	relationship VARCHAR(50),
+	contact VARCHAR(15),
+	remarks VARCHAR(255),
+	PRIMARY KEY (id),
+	FOREIGN KEY(student_id) REFERENCES students (student_id) ON DELETE CASCADE
+);
+
+CREATE INDEX ix_emergency_contacts_student_id ON emergency_contacts (student_id);
+
+CREATE TABLE guardians (
+	id SERIAL NOT NULL,
+	student_id VARCHAR,
+	first_name VARCHAR(100),
+	last_name VARCHAR(100),
+	relationship VARCHAR(50),
+	contact VARCHAR(15),
+	PRIMARY KEY (id),
+	FOREIGN KEY(student_id) REFERENCES students (student_id) ON DELETE CASCADE
 );
 
--- Participation table
+CREATE INDEX ix_guardians_student_id ON guardians (student_id);
+
 CREATE TABLE participation (
-    participation_id SERIAL PRIMARY KEY,
-    student_id INT REFERENCES students(student_id),
-    class_id INT REFERENCES classes(class_id),
-    date DATE,
-    engagement_level INT CHECK (engagement_level BETWEEN 1 AND 5),
-    notes TEXT
+	participation_id SERIAL NOT NULL,
+	student_id VARCHAR NOT NULL,
+	class_id INTEGER,
+	event_name VARCHAR(100) NOT NULL,
+	date DATE NOT NULL,
+	status VARCHAR(20) NOT NULL,
+	rating SMALLINT,
+	remarks VARCHAR(255),
+	PRIMARY KEY (participation_id),
+	FOREIGN KEY(student_id) REFERENCES students (student_id),
+	FOREIGN KEY(class_id) REFERENCES classes (class_id)
 );
 
--- Behavior table
-CREATE TABLE behavior (
-    behavior_id SERIAL PRIMARY KEY,
-    student_id INT REFERENCES students(student_id),
-    incident_date DATE,
-    category VARCHAR(50),
-    description TEXT
+CREATE INDEX ix_participation_class_date ON participation (class_id, date);
+CREATE INDEX ix_participation_date ON participation (date);
+CREATE INDEX ix_participation_student_date ON participation (student_id, date);
+
+CREATE TABLE student_parent_link (
+	id SERIAL NOT NULL,
+	student_id VARCHAR,
+	parent_id INTEGER,
+	PRIMARY KEY (id),
+	FOREIGN KEY(student_id) REFERENCES students (student_id) ON DELETE CASCADE,
+	FOREIGN KEY(parent_id) REFERENCES parents (parent_id) ON DELETE CASCADE
 );
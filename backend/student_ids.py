@@ -0,0 +1,92 @@
+"""
+Student ID allocation.
+
+Student IDs are displayed as RW-NNN. The numeric part comes from a
+database sequence (`student_id_seq`) on PostgreSQL, or from a row in the
+`id_sequences` counter table on SQLite, so allocation is atomic, O(1) and
+safe across concurrent registrars. IDs are handed out in their own short
+transaction: a rolled-back enrollment leaves a gap, never a duplicate.
+"""
+import threading
+
+from sqlalchemy import func, select, update, text
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Student, IdSequence
+
+STUDENT_ID_PREFIX = 'RW-'
+SEQUENCE_NAME = 'student_id_seq'
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def format_student_id(number):
+    return f"{STUDENT_ID_PREFIX}{number:03d}"
+
+
+def _max_existing_number(conn):
+    """Highest numeric suffix among existing RW-NNN IDs (one-time scan at initialization)."""
+    prefix_len = len(STUDENT_ID_PREFIX)
+    suffixes = conn.execute(
+        select(func.substr(Student.student_id, prefix_len + 1))
+        .where(Student.student_id.like(f'{STUDENT_ID_PREFIX}%'))
+    ).scalars()
+    return max((int(s) for s in suffixes if s and s.isdigit()), default=0)
+
+
+def _ensure_sequence(engine):
+    key = (engine.url, SEQUENCE_NAME)
+    if key in _initialized:
+        return
+    with _init_lock:
+        if key in _initialized:
+            return
+        with engine.begin() as conn:
+            start = _max_existing_number(conn) + 1
+            if engine.dialect.name == 'postgresql':
+                # START WITH in the same statement makes creation atomic
+                # when several workers race to initialize.
+                conn.execute(text(f'CREATE SEQUENCE IF NOT EXISTS {SEQUENCE_NAME} START WITH {start}'))
+            else:
+                exists = conn.execute(
+                    select(IdSequence.name).where(IdSequence.name == SEQUENCE_NAME)
+                ).first()
+                if not exists:
+                    try:
+                        with conn.begin_nested():
+                            conn.execute(IdSequence.__table__.insert().values(name=SEQUENCE_NAME, next_value=start))
+                    except IntegrityError:
+                        pass  # another worker created it first
+        _initialized.add(key)
+
+
+def reserve_student_ids(count=1):
+    """Atomically reserve `count` student IDs and return them formatted as RW-NNN."""
+    if count < 1:
+        return []
+    engine = db.engine
+    _ensure_sequence(engine)
+
+    with engine.begin() as conn:
+        if engine.dialect.name == 'postgresql':
+            numbers = conn.execute(
+                text(f"SELECT nextval('{SEQUENCE_NAME}') FROM generate_series(1, :n)"),
+                {'n': count}
+            ).scalars().all()
+        else:
+            # The UPDATE takes the write lock, so concurrent reservations serialize here
+            end = conn.execute(
+                update(IdSequence)
+                .where(IdSequence.name == SEQUENCE_NAME)
+                .values(next_value=IdSequence.next_value + count)
+                .returning(IdSequence.next_value)
+            ).scalar_one()
+            numbers = range(end - count, end)
+
+    return [format_student_id(n) for n in numbers]
+
+
+def next_student_id():
+    """Allocate a single student ID."""
+    return reserve_student_ids(1)[0]
@@ -0,0 +1,100 @@
+"""
+Subject lookups.
+
+Assessments, their aggregates and teacher assignments reference subjects
+by subject_id. The subjects table is small and rows are never renamed or
+deleted, so each process keeps all of it in memory: serializers turn ids
+into names without a join, and writers resolve a posted name to its id
+without a query. A lookup that misses reloads the table once, since
+another worker may have added the subject.
+
+Names are matched ignoring case and surrounding whitespace, the same way
+migration 0003 deduplicated the existing free-text names.
+"""
+import threading
+import weakref
+
+from sqlalchemy import select
+
+from models import db, Subject
+from db_helpers import dialect_insert
+
+
+def normalize_subject_name(name):
+    return name.strip()
+
+
+def _lookup_key(name):
+    return normalize_subject_name(name).lower()
+
+
+class SubjectCache:
+    """id -> name and normalized name -> id for one database."""
+
+    def __init__(self):
+        self._names = {}
+        self._ids = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        rows = db.session.execute(select(Subject.subject_id, Subject.name)).all()
+        with self._lock:
+            self._names = dict(rows)
+            self._ids = {_lookup_key(name): subject_id for subject_id, name in rows}
+            self._loaded = True
+
+    def _lookup(self, mapping, key):
+        if not self._loaded:
+            self._load()
+        value = mapping().get(key)
+        if value is None:
+            self._load()
+            value = mapping().get(key)
+        return value
+
+    def name(self, subject_id):
+        return self._lookup(lambda: self._names, subject_id)
+
+    def id_for(self, name):
+        return self._lookup(lambda: self._ids, _lookup_key(name))
+
+
+# One cache per engine, so apps bound to different databases never mix ids
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def subject_cache():
+    engine = db.engine
+    with _caches_lock:
+        if engine not in _caches:
+            _caches[engine] = SubjectCache()
+        return _caches[engine]
+
+
+def subject_name(subject_id):
+    """Name of a subject, or None if there is no such subject."""
+    return subject_cache().name(subject_id) if subject_id is not None else None
+
+
+def find_subject_id(name):
+    """subject_id for a name (ignoring case and surrounding whitespace), or None."""
+    return subject_cache().id_for(name) if name and name.strip() else None
+
+
+def get_or_create_subject(name):
+    """
+    (subject_id, name) for a subject name, adding the subject if it does not exist yet.
+
+    The insert runs in the caller's transaction; the new subject reaches
+    the cache through the reload of a later lookup that misses.
+    """
+    subject_id = find_subject_id(name)
+    if subject_id is not None:
+        return subject_id, subject_name(subject_id)
+    name = normalize_subject_name(name)
+    db.session.execute(dialect_insert(Subject).values(name=name).on_conflict_do_nothing())
+    return tuple(db.session.execute(select(Subject.subject_id, Subject.name).where(
+        db.func.lower(Subject.name) == name.lower()
+    ).order_by(Subject.subject_id).limit(1)).one())
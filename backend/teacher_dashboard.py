@@ -0,0 +1,114 @@
+"""
+Teacher dashboard data in a constant number of queries.
+
+The teacher and their classes are loaded with selectinload (2 queries).
+One grouped query returns every student of those classes with their
+attendance rate and negative incidents over the last `days` days and
+their average score, which is read from the assessment aggregates. One
+behavior_statistics() call adds each student's latest records from the
+same window. That is 4 queries however many classes and students the
+teacher has.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import selectinload
+
+from models import db, Teacher, Student, Attendance, AssessmentAggregate, Behavioral
+from assessment_aggregates import average_percentage
+from behavior_stats import behavior_statistics
+
+DEFAULT_WINDOW_DAYS = 30
+MAX_WINDOW_DAYS = 365
+RECENT_BEHAVIORS = 3
+
+
+def _round(value):
+    return round(float(value), 2) if value is not None else None
+
+
+def _roster_summaries(class_ids, since):
+    """One row per student of the classes: roster fields, attendance_rate, avg_score, incidents."""
+    roster = select(Student.student_id).where(Student.class_id.in_(class_ids))
+
+    attendance = select(
+        Attendance.student_id,
+        func.count(Attendance.attendance_id).label('total'),
+        func.sum(case((Attendance.status == 'present', 1), else_=0)).label('present')
+    ).where(Attendance.class_id.in_(class_ids), Attendance.date >= since).group_by(
+        Attendance.student_id
+    ).subquery('attendance')
+
+    scores = select(
+        AssessmentAggregate.student_id,
+        average_percentage().label('avg_score')
+    ).where(AssessmentAggregate.student_id.in_(roster)).group_by(
+        AssessmentAggregate.student_id
+    ).subquery('scores')
+
+    incidents = select(
+        Behavioral.student_id,
+        func.count(Behavioral.behavior_id).label('incidents')
+    ).where(
+        Behavioral.student_id.in_(roster), Behavioral.behavior_type == 'negative', Behavioral.date >= since
+    ).group_by(Behavioral.student_id).subquery('incidents')
+
+    attendance_rate = case((attendance.c.total > 0, attendance.c.present * 100.0 / attendance.c.total), else_=None)
+    return db.session.execute(
+        select(
+            Student.student_id, Student.full_name, Student.gender, Student.date_of_birth, Student.class_id,
+            attendance_rate.label('attendance_rate'),
+            scores.c.avg_score,
+            func.coalesce(incidents.c.incidents, 0).label('incidents')
+        ).outerjoin(attendance, attendance.c.student_id == Student.student_id)
+        .outerjoin(scores, scores.c.student_id == Student.student_id)
+        .outerjoin(incidents, incidents.c.student_id == Student.student_id)
+        .where(Student.class_id.in_(class_ids))
+        .order_by(Student.class_id, Student.full_name, Student.student_id)
+    ).all()
+
+
+def teacher_dashboard(teacher_id, days=DEFAULT_WINDOW_DAYS):
+    """The teacher, their classes and per-student summaries over the last `days` days, or None."""
+    teacher = db.session.scalar(
+        select(Teacher).options(selectinload(Teacher.classes)).where(Teacher.teacher_id == teacher_id)
+    )
+    if teacher is None:
+        return None
+
+    since = date.today() - timedelta(days=days)
+    classes = sorted(teacher.classes, key=lambda c: c.class_name)
+    class_ids = [c.class_id for c in classes]
+    rows = _roster_summaries(class_ids, since) if class_ids else []
+    recent = behavior_statistics(
+        student_ids=[row.student_id for row in rows], recent=RECENT_BEHAVIORS, since=since
+    ) if rows else {}
+
+    students_by_class = {class_id: [] for class_id in class_ids}
+    for row in rows:
+        students_by_class[row.class_id].append({
+            'student_id': row.student_id,
+            'full_name': row.full_name,
+            'gender': row.gender,
+            'dob': row.date_of_birth.isoformat() if row.date_of_birth else None,
+            'attendance_rate': _round(row.attendance_rate),
+            'average_score': _round(row.avg_score),
+            'incidents': row.incidents,
+            'recent_behaviors': recent[row.student_id]['recent_behaviors'] if row.student_id in recent else [],
+        })
+
+    return {
+        'teacher': {
+            'teacher_id': teacher.teacher_id,
+            'full_name': teacher.full_name,
+            'email': teacher.email,
+            'phone': teacher.phone
+        },
+        'window_days': days,
+        'classes': [{
+            'class_id': c.class_id,
+            'class_name': c.class_name,
+            'grade_level': c.grade_level,
+            'students': students_by_class[c.class_id]
+        } for c in classes]
+    }
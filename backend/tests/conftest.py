@@ -0,0 +1,28 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from sqlalchemy import event
+
+from app import app
+from models import db
+
+@pytest.fixture(scope='session', autouse=True)
+def create_tables():
+    """Create the tables once per run, as the test modules' __main__ blocks do"""
+    with app.app_context():
+        db.create_all()
+
+def count_queries(fn):
+    """Run fn and return (result, number of SQL statements executed)"""
+    with app.app_context():
+        engine = db.engine
+    statements = []
+    listener = lambda *args, **kwargs: statements.append(1)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    return result, len(statements)
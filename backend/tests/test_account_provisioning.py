@@ -0,0 +1,66 @@
+import csv
+import io
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, User, Teacher, Parent
+from werkzeug.security import check_password_hash
+
+ACCOUNTS = """role,username,email,full_name,phone,address
+teacher,bulk-teacher-1,t1@school.rw,Bulk Teacher One,0788000001,
+,bulk-parent-1,p1@home.rw,Bulk Parent One,0788000002,Kigali
+parent,bulk-parent-2,P2@home.rw,Bulk Parent Two,,
+parent,bulk-parent-3,p2@HOME.rw,Bulk Parent Three,,
+parent,bulk-existing,new@home.rw,Already There,,
+principal,bulk-principal,pr@school.rw,Bulk Principal,,
+"""
+
+def test_bulk_provisioning_creates_accounts_and_credentials():
+    """Test batch uniqueness checks, pooled password hashing and the credentials file"""
+    client = app.test_client()
+    with app.app_context():
+        admin = User(username='bulk-admin', password_hash='x', role='admin')
+        db.session.add_all([admin, User(username='bulk-existing', password_hash='x', role='parent')])
+        db.session.commit()
+        with client.session_transaction() as session:
+            session['user_id'] = admin.user_id
+
+    app.config['PROVISIONING_WORKERS'] = 2
+    try:
+        response = client.post('/admin/users/bulk?role=parent', data=ACCOUNTS.encode(), content_type='text/csv')
+    finally:
+        app.config.pop('PROVISIONING_WORKERS')
+    assert response.status_code == 201
+    assert 'attachment' in response.headers['Content-Disposition']
+    assert response.headers['X-Accounts-Created'] == '3' and response.headers['X-Accounts-Failed'] == '3'
+    assert float(response.headers['X-Accounts-Per-Second']) > 0
+
+    rows = {row['line']: row for row in csv.DictReader(io.StringIO(response.get_data(as_text=True)))}
+    assert [rows[str(n)]['error'] for n in range(2, 5)] == ['', '', '']
+    assert rows['5']['error'] == 'email is repeated in the file'
+    assert rows['6']['error'] == 'Username already exists'
+    assert rows['7']['error'].startswith('role must be one of')
+
+    with app.app_context():
+        teacher_user = User.query.filter_by(username='bulk-teacher-1').one()
+        assert teacher_user.role == 'teacher'
+        assert check_password_hash(teacher_user.password_hash, rows['2']['password'])
+        teacher = db.session.get(Teacher, int(rows['2']['profile_id']))
+        assert teacher.user_id == teacher_user.user_id and teacher.phone == '0788000001'
+        parent = db.session.get(Parent, int(rows['3']['profile_id']))
+        assert parent.full_name == 'Bulk Parent One' and parent.address == 'Kigali'
+        assert User.query.filter_by(username='bulk-parent-1').one().role == 'parent'
+
+    again = client.post('/admin/users/bulk', data=ACCOUNTS.encode(), content_type='text/csv')
+    assert again.status_code == 400 and again.headers['X-Accounts-Created'] == '0'
+    assert client.post('/admin/users/bulk?role=admin', data=b'username\n').status_code == 400
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+
+    test_bulk_provisioning_creates_accounts_and_credentials()
+
+    print("All tests passed!")
@@ -4,7 +4,9 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import app
-from models import db, Student, Assessment
+from models import db, Student, Class, Assessment, AssessmentAggregate
+from assessment_aggregates import rebuild_assessment_aggregates, check_assessment_aggregates
+from subjects import get_or_create_subject, subject_name
 from datetime import date
 
 def test_add_assessment():
@@ -156,6 +158,218 @@ def test_assessment_statistics():
     response = client.get('/api/assessments/statistics')
     assert response.status_code == 200
 
+def test_assessment_statistics_percentiles():
+    """Test SQL-side statistics for a string student ID with custom percentiles"""
+    client = app.test_client()
+    with app.app_context():
+        if not Student.query.get('RW-S001'):
+            db.session.add(Student(student_id='RW-S001', full_name="Stats Student", class_id=1))
+        subject_id, _ = get_or_create_subject("Statistics")
+        for score in (40, 60, 80, 100):
+            db.session.add(Assessment(
+                student_id='RW-S001', subject_id=subject_id, subject_name="Statistics", assessment_type="quiz",
+                score=score, max_score=100, date_taken=date(2024, 2, 1), term="Term 2"
+            ))
+        db.session.commit()
+        rebuild_assessment_aggregates()
+
+    response = client.get('/api/assessments/statistics?student_id=RW-S001&subject=Statistics&percentiles=25,90')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['total_assessments'] == 4
+    assert data['average_percentage'] == 70.0
+    assert data['median_percentage'] == 70.0
+    assert data['percentiles'] == {'p25': 55.0, 'p90': 94.0}
+    assert data['stddev_percentage'] == 25.82
+
+def test_assessment_statistics_group_by():
+    """Test one statistics row per group and group_by validation"""
+    client = app.test_client()
+    response = client.get('/api/assessments/statistics?student_id=RW-S001&group_by=subject')
+    assert response.status_code == 200
+    groups = json.loads(response.data)['groups']
+    statistics = [g for g in groups if g['subject'] == 'Statistics'][0]
+    assert statistics['lowest_score'] == 40
+    assert statistics['highest_percentage'] == 100.0
+
+    assert client.get('/api/assessments/statistics?group_by=teacher').status_code == 400
+
+def test_gradebook_matrix():
+    """Test the class gradebook pivot with row/column averages and missing grades"""
+    client = app.test_client()
+    with app.app_context():
+        if not Class.query.get(44):
+            db.session.add(Class(class_id=44, class_name='P44'))
+        db.session.add_all([
+            Student(student_id='RW-G001', full_name="Alpha Grade", class_id=44),
+            Student(student_id='RW-G002', full_name="Beta Grade", class_id=44),
+            Student(student_id='RW-G003', full_name="Gamma Grade", class_id=44),
+        ])
+        for student_id, subject, score in (('RW-G001', 'Mathematics', 80), ('RW-G001', 'Mathematics', 60),
+                                           ('RW-G001', 'English', 90), ('RW-G002', 'Mathematics', 50)):
+            db.session.add(Assessment(
+                student_id=student_id, subject_id=get_or_create_subject(subject)[0], subject_name=subject,
+                assessment_type="quiz",
+                score=score, max_score=100, date_taken=date(2024, 2, 1), term="Term 2"
+            ))
+        db.session.commit()
+        rebuild_assessment_aggregates()
+
+    response = client.get('/api/assessments/gradebook?class_id=44&term=Term%202')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['students'] == ['RW-G001', 'RW-G002', 'RW-G003']
+    assert data['columns'] == ['English', 'Mathematics']
+    assert data['matrix'] == [[90.0, 70.0], [None, 50.0], [None, None]]
+    assert data['student_averages'] == [80.0, 50.0, None]
+    assert data['column_averages'] == [90.0, 60.0]
+    assert data['class_average'] == 70.0
+
+    assert client.get('/api/assessments/gradebook').status_code == 400
+
+def test_bulk_assessment_entry():
+    """Test recording a whole class's scores in one request with per-student errors"""
+    client = app.test_client()
+    response = client.post('/api/assessments/bulk', json={
+        "subject_name": "Geography", "assessment_type": "exam", "max_score": 50,
+        "date_taken": "2024-03-01", "term": "Term 2", "class_id": 44,
+        "scores": [
+            {"student_id": "RW-G001", "score": 40},
+            {"student_id": "RW-G002", "score": 30},
+            {"student_id": "RW-G003", "score": 60},
+            {"student_id": "RW-S001", "score": 20},
+            {"student_id": "RW-NOPE", "score": 10},
+            {"student_id": "RW-G001", "score": 45},
+        ]
+    })
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert data['created'] == 2
+    assert [(e['index'], e['errors'][0]) for e in data['errors']] == [
+        (2, 'Score must be between 0 and max score'),
+        (3, 'Student is not in class 44'),
+        (4, 'Student not found'),
+        (5, 'Duplicate student_id in scores'),
+    ]
+    assert data['class_average'] == {'score': 35.0, 'percentage': 70.0, 'highest_score': 40, 'lowest_score': 30}
+
+    with app.app_context():
+        assert Assessment.query.filter_by(subject_name="Geography").count() == 2
+
+    # class_id sent as a JSON string is compared as the integer it names
+    header = {"subject_name": "Geography", "assessment_type": "quiz", "max_score": 10,
+              "date_taken": "2024-03-08", "term": "Term 2"}
+    response = client.post('/api/assessments/bulk', json={
+        **header, "class_id": "44", "scores": [{"student_id": "RW-G003", "score": 7}]})
+    assert response.status_code == 201
+    assert json.loads(response.data)['created'] == 1
+    response = client.post('/api/assessments/bulk', json={
+        **header, "class_id": "P44", "scores": [{"student_id": "RW-G003", "score": 7}]})
+    assert response.status_code == 400
+    assert json.loads(response.data)['error'] == 'class_id must be an integer'
+
+def test_assessment_aggregates_follow_writes():
+    """Test that add/update/delete keep the per student/subject/term aggregates exact"""
+    client = app.test_client()
+    with app.app_context():
+        if not Student.query.get('RW-AG01'):
+            db.session.add(Student(student_id='RW-AG01', full_name="Agg Student"))
+            db.session.commit()
+
+    def aggregates():
+        with app.app_context():
+            return {
+                (subject_name(a.subject_id), a.academic_year, a.term): (a.assessment_count, round(a.percentage_sum, 6), a.last_date.isoformat())
+                for a in AssessmentAggregate.query.filter_by(student_id='RW-AG01')
+            }
+
+    base = {"student_id": "RW-AG01", "assessment_type": "quiz", "max_score": 50}
+    first = client.post('/api/assessments/', json={
+        **base, "subject_name": "History", "score": 40, "date_taken": "2024-01-10", "term": "Term 1"})
+    client.post('/api/assessments/', json={
+        **base, "subject_name": "History", "score": 30, "date_taken": "2024-01-20", "term": "Term 1"})
+    assert aggregates() == {('History', '', 'Term 1'): (2, 140.0, '2024-01-20')}
+
+    # Moving an assessment to another term updates both keys
+    assessment_id = json.loads(first.data)['id']
+    response = client.put(f'/api/assessments/{assessment_id}', json={"term": "Term 2", "score": 45})
+    assert response.status_code == 200
+    assert aggregates() == {('History', '', 'Term 1'): (1, 60.0, '2024-01-20'),
+                            ('History', '', 'Term 2'): (1, 90.0, '2024-01-10')}
+
+    assert client.delete(f'/api/assessments/{assessment_id}').status_code == 200
+    assert aggregates() == {('History', '', 'Term 1'): (1, 60.0, '2024-01-20')}
+
+    # The same term name in another academic year is a key of its own
+    client.post('/api/assessments/', json={
+        **base, "subject_name": "History", "score": 20, "date_taken": "2024-09-20",
+        "term": "Term 1", "academic_year": "2024-2025"})
+    assert aggregates() == {('History', '', 'Term 1'): (1, 60.0, '2024-01-20'),
+                            ('History', '2024-2025', 'Term 1'): (1, 40.0, '2024-09-20')}
+
+    with app.app_context():
+        assert check_assessment_aggregates() == []
+        rebuild_assessment_aggregates()
+        assert check_assessment_aggregates() == []
+    assert aggregates() == {('History', '', 'Term 1'): (1, 60.0, '2024-01-20'),
+                            ('History', '2024-2025', 'Term 1'): (1, 40.0, '2024-09-20')}
+
+def test_subject_names_resolve_to_one_subject():
+    """Test that posted subject names map to one subjects row, ignoring case and spaces"""
+    client = app.test_client()
+    base = {"student_id": "RW-AG01", "assessment_type": "quiz", "score": 5, "max_score": 10,
+            "date_taken": "2024-02-01"}
+    first = client.post('/api/assessments/', json={**base, "subject_name": "Chemistry"})
+    second = client.post('/api/assessments/', json={**base, "subject_name": "  chemistry "})
+    assert second.status_code == 201
+    with app.app_context():
+        first, second = (db.session.get(Assessment, json.loads(r.data)['id']) for r in (first, second))
+        assert first.subject_id == second.subject_id
+        assert second.subject_name == "Chemistry"
+
+    response = client.post('/api/assessments/', json={**base, "subject_id": 99999})
+    assert response.status_code == 400
+    assert json.loads(response.data)['error'] == 'Subject not found'
+
+def test_class_and_grade_rankings():
+    """Test RANK/PERCENT_RANK per class and per grade, ties, and snapshot invalidation"""
+    client = app.test_client()
+    with app.app_context():
+        for class_id, class_name in ((53, 'P5 Blue'), (54, 'P5 Green')):
+            if not Class.query.get(class_id):
+                db.session.add(Class(class_id=class_id, class_name=class_name, grade_level='P5-rank'))
+        subject_id, _ = get_or_create_subject("Mathematics")
+        for student_id, class_id, score in (('RW-R001', 53, 90), ('RW-R002', 53, 80), ('RW-R003', 53, 80),
+                                            ('RW-R004', 53, 70), ('RW-R005', 54, 85)):
+            db.session.add(Student(student_id=student_id, full_name=student_id, class_id=class_id))
+            db.session.add(Assessment(
+                student_id=student_id, subject_id=subject_id, subject_name="Mathematics", assessment_type="exam",
+                score=score, max_score=100, date_taken=date(2024, 3, 1), term="Term R"
+            ))
+        db.session.commit()
+        rebuild_assessment_aggregates()
+
+    response = client.get('/api/assessments/rankings?term=Term%20R&class_id=53')
+    assert response.status_code == 200
+    rankings = json.loads(response.data)['rankings']
+    assert [(r['student_id'], r['class_rank'], r['class_percentile'], r['grade_rank']) for r in rankings] == [
+        ('RW-R001', 1, 100.0, 1),
+        ('RW-R002', 2, 33.3, 3),
+        ('RW-R003', 2, 33.3, 3),
+        ('RW-R004', 4, 0.0, 5),
+    ]
+    assert {(r['class_size'], r['grade_size']) for r in rankings} == {(4, 5)}
+    response = client.get('/api/assessments/rankings?term=Term%20R&academic_year=2023-2024')
+    assert json.loads(response.data)['rankings'] == []
+
+    # A new score through the API invalidates the cached snapshot
+    client.post('/api/assessments/', json={
+        "student_id": "RW-R004", "subject_name": "Mathematics", "assessment_type": "exam",
+        "score": 100, "max_score": 100, "date_taken": "2024-03-02", "term": "Term R"})
+    response = client.get('/api/assessments/rankings?term=Term%20R&student_id=RW-R004')
+    [ranking] = json.loads(response.data)['rankings']
+    assert (ranking['average'], ranking['class_rank'], ranking['grade_rank']) == (85.0, 2, 2)
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
@@ -167,5 +381,12 @@ if __name__ == '__main__':
     test_update_assessment()
     test_delete_assessment()
     test_assessment_statistics()
+    test_assessment_statistics_percentiles()
+    test_assessment_statistics_group_by()
+    test_gradebook_matrix()
+    test_bulk_assessment_entry()
+    test_assessment_aggregates_follow_writes()
+    test_subject_names_resolve_to_one_subject()
+    test_class_and_grade_rankings()
     
     print("All tests passed!")
\ No newline at end of file
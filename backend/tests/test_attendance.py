@@ -0,0 +1,165 @@
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, Student, Class, Attendance
+
+def setup_module(module):
+    with app.app_context():
+        if not Class.query.get(51):
+            db.session.add(Class(class_id=51, class_name='P51'))
+        for i in range(3):
+            if not Student.query.get(f'RW-A{i:03d}'):
+                db.session.add(Student(student_id=f'RW-A{i:03d}', full_name=f"Attendance Student {i}", class_id=51))
+        db.session.commit()
+
+def test_batch_attendance_reports_rejected_rows():
+    """Test that invalid batch records are rejected with reasons"""
+    client = app.test_client()
+    response = client.post('/attendance/batch?chunk_size=2', json=[
+        {"student_id": "RW-A000", "class_id": 51, "date": "2024-02-05", "status": "present"},
+        {"student_id": "RW-A001", "class_id": 51, "date": "2024-02-05", "status": "Late"},
+        {"student_id": "RW-A002", "class_id": 51, "date": "2024-02-05", "status": "sleeping"},
+        {"student_id": "RW-A002", "class_id": 51, "date": "05/02/2024", "status": "absent"},
+        {"student_id": "RW-NOPE", "class_id": 51, "date": "2024-02-05", "status": "absent"},
+        {"student_id": "RW-A002", "class_id": 51, "date": "2024-02-05"},
+        {"student_id": "RW-A002", "class_id": 51, "date": "2024-02-05", "status": "excused"},
+    ])
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assert data['created'] == 3
+    assert data['chunks'] == 2
+    assert [e['index'] for e in data['errors']] == [2, 3, 4, 5]
+    assert 'Unknown student_id' in data['errors'][2]['errors'][0]
+
+    with app.app_context():
+        statuses = sorted(r.status for r in Attendance.query.filter_by(class_id=51).all())
+    assert statuses == ['excused', 'late', 'present']
+
+def test_batch_attendance_metrics():
+    """Test that batch throughput metrics are exposed"""
+    client = app.test_client()
+    data = json.loads(client.get('/attendance/batch/metrics').data)
+    assert data['batches'] >= 1
+    assert data['rows_written'] >= 3
+    assert data['last_batch']['rows'] > 0
+
+def test_log_attendance_is_idempotent():
+    """Test that re-posting the same student/class/date updates instead of duplicating"""
+    client = app.test_client()
+    record = {"student_id": "RW-A000", "class_id": 51, "date": "2024-02-06", "status": "absent"}
+
+    response = client.post('/attendance/', json=record)
+    assert response.status_code == 201
+    assert json.loads(response.data)['created'] == 1
+
+    response = client.post('/attendance/', json=dict(record, status="present"))
+    assert response.status_code == 200
+    assert json.loads(response.data)['updated'] == 1
+
+    with app.app_context():
+        rows = Attendance.query.filter_by(student_id="RW-A000", class_id=51).filter(Attendance.date == '2024-02-06').all()
+    assert [r.status for r in rows] == ['present']
+
+def test_batch_attendance_retry_updates():
+    """Test that retrying a batch reports updates, not new rows"""
+    client = app.test_client()
+    batch = [
+        {"student_id": f"RW-A{i:03d}", "class_id": 51, "date": "2024-02-07", "status": "present"}
+        for i in range(3)
+    ]
+    first = json.loads(client.post('/attendance/batch', json=batch).data)
+    assert (first['created'], first['updated']) == (3, 0)
+
+    batch[0]['status'] = 'late'
+    second = json.loads(client.post('/attendance/batch', json=batch + [batch[1]]).data)
+    assert (second['created'], second['updated']) == (0, 3)
+    assert second['duplicates_in_batch'] == 1
+
+    with app.app_context():
+        assert Attendance.query.filter_by(class_id=51).filter(Attendance.date == '2024-02-07').count() == 3
+
+def test_confirm_attendance_batch_counts():
+    """Test confirmed / already-confirmed / not-found counts for a batch of IDs"""
+    client = app.test_client()
+    with app.app_context():
+        ids = [r.attendance_id for r in Attendance.query.filter_by(class_id=51).filter(Attendance.date == '2024-02-07')]
+
+    data = json.loads(client.put('/attendance/confirm/batch', json={'attendance_ids': ids[:2]}).data)
+    assert (data['confirmed'], data['already_confirmed'], data['not_found']) == (2, 0, 0)
+
+    data = json.loads(client.put('/attendance/confirm/batch', json={'attendance_ids': ids + [999999]}).data)
+    assert (data['confirmed'], data['already_confirmed'], data['not_found']) == (1, 2, 1)
+    assert data['not_found_ids'] == [999999]
+
+def test_confirm_attendance_range():
+    """Test confirming a class's attendance over a date range"""
+    client = app.test_client()
+    response = client.put('/attendance/confirm/range', json={
+        'class_id': 51, 'start_date': '2024-02-05', 'end_date': '2024-02-07'
+    })
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['total_records'] == 7
+    assert data['already_confirmed'] == 3
+    assert data['confirmed'] == 4
+
+    response = client.put('/attendance/confirm/range', json={
+        'class_id': 51, 'start_date': '2030-01-01', 'end_date': '2030-01-07'
+    })
+    assert response.status_code == 404
+
+def test_attendance_rollups_follow_writes():
+    """Test that the daily and term rollups match the raw table after writes and a rebuild"""
+    from attendance_rollup import rebuild_attendance_rollups
+    from models import AttendanceDailyRollup, AttendanceTermRollup
+    client = app.test_client()
+
+    client.post('/attendance/batch', json=[
+        {"student_id": f"RW-A{i:03d}", "class_id": 51, "date": "2024-02-12", "status": "present" if i else "absent"}
+        for i in range(3)
+    ])
+    with app.app_context():
+        record_id = Attendance.query.filter_by(student_id="RW-A002", class_id=51).filter(Attendance.date == '2024-02-12').one().attendance_id
+    client.delete(f'/attendance/{record_id}')
+
+    def snapshot():
+        with app.app_context():
+            daily = {(r.class_id, r.date.isoformat()): (r.total, r.present, r.absent)
+                     for r in AttendanceDailyRollup.query.filter_by(class_id=51)}
+            terms = {(r.student_id, r.term): (r.total, r.present)
+                     for r in AttendanceTermRollup.query.filter(AttendanceTermRollup.student_id.like('RW-A%'))}
+        return daily, terms
+
+    daily, terms = snapshot()
+    assert daily[(51, '2024-02-12')] == (2, 1, 1)
+
+    with app.app_context():
+        raw = Attendance.query.filter_by(student_id="RW-A001").count()
+    assert terms[("RW-A001", "Term 2")][0] == raw
+
+    with app.app_context():
+        rebuild_attendance_rollups()
+    assert snapshot() == (daily, terms)
+
+def test_attendance_export_streams_ndjson_and_csv():
+    """Test that ?format= streams the filtered list as NDJSON or CSV"""
+    client = app.test_client()
+    with app.app_context():
+        expected = Attendance.query.filter_by(class_id=51).count()
+
+    response = client.get('/attendance/?class_id=51&format=ndjson')
+    assert response.status_code == 200
+    assert response.is_streamed
+    rows = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert len(rows) == expected
+    assert {r['class_id'] for r in rows} == {51}
+
+    response = client.get('/attendance/?class_id=51&format=csv')
+    lines = response.data.decode().splitlines()
+    assert lines[0] == 'attendance_id,student_id,class_id,date,status'
+    assert len(lines) == expected + 1
+
+    assert client.get('/attendance/?format=xml').status_code == 400
@@ -0,0 +1,52 @@
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, User
+from tests.conftest import count_queries
+
+def _client_for(user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+def test_session_role_checks_and_revocation():
+    """Test that role checks skip the database until the user's permissions change"""
+    with app.app_context():
+        users = [User(username=f'auth-admin-{i}', password_hash='x', role='admin') for i in range(2)]
+        users.append(User(username='auth-teacher', password_hash='x', role='teacher'))
+        db.session.add_all(users)
+        db.session.commit()
+        admin_id, other_admin_id, teacher_id = [u.user_id for u in users]
+
+    admin, other_admin, teacher = _client_for(admin_id), _client_for(other_admin_id), _client_for(teacher_id)
+    assert app.test_client().get('/admin/users').status_code == 401
+    assert teacher.get('/admin/users').status_code == 403
+
+    # The first request loads the role into the session; later ones do not query users
+    assert admin.get('/admin/users').status_code == 200
+    response, queries = count_queries(lambda: admin.get('/admin/users'))
+    assert response.status_code == 200 and queries == 1
+    assert other_admin.get('/admin/users').status_code == 200
+
+    response = admin.put(f'/admin/users/{other_admin_id}', json={'role': 'teacher'})
+    assert response.status_code == 200
+    assert other_admin.get('/admin/users').status_code == 403
+    assert admin.put(f'/admin/users/{teacher_id}', json={'role': 'owner'}).status_code == 400
+
+    assert admin.delete(f'/admin/users/{other_admin_id}').status_code == 200
+    assert other_admin.get('/admin/users').status_code == 401
+
+    users_listed = [u['username'] for u in json.loads(admin.get('/admin/users').data)]
+    assert 'auth-admin-1' not in users_listed and 'auth-teacher' in users_listed
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+
+    test_session_role_checks_and_revocation()
+
+    print("All tests passed!")
@@ -0,0 +1,96 @@
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, Student, Behavioral
+from datetime import date, timedelta
+from tests.conftest import count_queries
+
+def test_behavioral_list_keyset_pages_and_search():
+    """Test full records, (date, behavior_id) keyset pages, total count and category/notes search"""
+    client = app.test_client()
+    with app.app_context():
+        if not db.session.get(Student, 'RW-B001'):
+            db.session.add(Student(student_id='RW-B001', full_name="Behaviour Student", class_id=1))
+        for day, category, notes in ((3, 'Lateness', 'Arrived after assembly'), (3, 'Disruption', 'Talking in class'),
+                                     (2, 'Helpfulness', 'Helped clean the LAB'), (1, 'Disruption', None),
+                                     (1, 'Lateness', '50% of the lesson missed')):
+            db.session.add(Behavioral(student_id='RW-B001', behavior_type='negative', category=category,
+                                      notes=notes, date=date(2024, 5, day)))
+        db.session.commit()
+
+    response = client.get('/api/behavioral/?student_id=RW-B001&limit=2&count=1')
+    assert response.status_code == 200
+    first_page = json.loads(response.data)
+    assert response.headers['X-Total-Count'] == '5'
+    assert first_page[0]['category'] == 'Disruption' and first_page[0]['notes'] == 'Talking in class'
+    assert [r['date'] for r in first_page] == ['2024-05-03', '2024-05-03']
+
+    seen, cursor = [r['behavior_id'] for r in first_page], response.headers['X-Next-Cursor']
+    while cursor:
+        response = client.get(f'/api/behavioral/?student_id=RW-B001&limit=2&cursor={cursor}')
+        assert 'X-Total-Count' not in response.headers
+        seen += [r['behavior_id'] for r in json.loads(response.data)]
+        cursor = response.headers.get('X-Next-Cursor')
+    assert len(seen) == len(set(seen)) == 5
+
+    def search(params):
+        return sorted(r['category'] for r in json.loads(client.get(f'/api/behavioral/?student_id=RW-B001&{params}').data))
+    assert search('category=RUPT') == ['Disruption', 'Disruption']
+    assert search('q=lab') == ['Helpfulness']
+    assert search('q=50%25') == ['Lateness']
+    assert search('q=%25') == ['Lateness']
+
+    assert client.get('/api/behavioral/?cursor=yesterday').status_code == 400
+
+def test_batch_behavioral_stats():
+    """Test counts, category breakdowns and last N records for a whole class in one query"""
+    client = app.test_client()
+    today = date.today()
+    with app.app_context():
+        for student_id in ('RW-BS01', 'RW-BS02', 'RW-BS03'):
+            if not db.session.get(Student, student_id):
+                db.session.add(Student(student_id=student_id, full_name=f"Stats {student_id}", class_id=61))
+        db.session.flush()
+        for days_ago, behavior_type, category in ((1, 'positive', 'Helpfulness'), (2, 'negative', 'Lateness'),
+                                                  (3, 'negative', 'Lateness'), (90, 'positive', 'Helpfulness')):
+            db.session.add(Behavioral(student_id='RW-BS01', behavior_type=behavior_type, category=category,
+                                      date=today - timedelta(days=days_ago)))
+        db.session.add(Behavioral(student_id='RW-BS02', behavior_type='negative', category='Disruption',
+                                  date=today - timedelta(days=5)))
+        db.session.commit()
+
+    response, queries = count_queries(lambda: client.get('/api/behavioral/stats?class_id=61&recent=2'))
+    assert response.status_code == 200
+    assert queries == 1
+    stats = {s['student_id']: s for s in json.loads(response.data)}
+    assert set(stats) == {'RW-BS01', 'RW-BS02', 'RW-BS03'}
+    first = stats['RW-BS01']
+    assert first['total_records'] == 4
+    assert first['behavior_counts'] == {'positive': 2, 'negative': 2}
+    assert first['category_counts'] == {'Helpfulness': 2, 'Lateness': 2}
+    assert [r['date'] for r in first['recent_behaviors']] == [(today - timedelta(days=d)).isoformat() for d in (1, 2)]
+    assert stats['RW-BS03']['total_records'] == 0 and stats['RW-BS03']['recent_behaviors'] == []
+
+    response = client.post('/api/behavioral/stats/batch',
+                           json={'student_ids': ['RW-BS02', 'RW-BS01', 'unknown'], 'days': 30})
+    assert response.status_code == 200
+    batch = json.loads(response.data)
+    assert [s['student_id'] for s in batch] == ['RW-BS02', 'RW-BS01']
+    assert len(batch[1]['recent_behaviors']) == 3
+
+    single = json.loads(client.get('/api/behavioral/stats/RW-BS01').data)
+    assert single['total_records'] == 4 and len(single['recent_behaviors']) == 3
+    assert client.post('/api/behavioral/stats/batch', json={'student_ids': []}).status_code == 400
+    assert client.get('/api/behavioral/stats').status_code == 400
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+
+    test_behavioral_list_keyset_pages_and_search()
+    test_batch_behavioral_stats()
+
+    print("All tests passed!")
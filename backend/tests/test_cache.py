@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+import cache
+from cache import RedisBackend, TTLCache
+
+class FakeRedis:
+    """The subset of redis.Redis the cache uses, storing bytes like the real server"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b'0')) + 1).encode()
+        return int(self.data[key])
+
+def test_redis_backend_survives_invalidation():
+    """Test get -> invalidate -> get through the Redis backend, whose generation counter is not pickled"""
+    url = 'redis://fake-cache'
+    client = FakeRedis()
+    cache._backends[url] = RedisBackend(url, client=client)
+    namespace = TTLCache('redis_test')
+    app.config['CACHE_REDIS_URL'] = url
+    try:
+        with app.app_context():
+            assert namespace.get_or_set('answer', lambda: 41) == 41
+            assert namespace.get_or_set('answer', lambda: 0) == 41
+            namespace.invalidate()
+            assert client.data['redis_test:gen'] == b'1'
+            assert namespace.get('answer') is None
+            assert namespace.get_or_set('answer', lambda: 42) == 42
+            assert namespace.get('answer') == 42
+            assert namespace.stats()['invalidations'] == 1
+    finally:
+        app.config.pop('CACHE_REDIS_URL')
+        del cache._backends[url]
+
+if __name__ == '__main__':
+    test_redis_backend_survives_invalidation()
+
+    print("All tests passed!")
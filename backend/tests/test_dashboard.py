@@ -0,0 +1,99 @@
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, Class, Student, Assessment, Attendance, Behavioral
+from assessment_aggregates import rebuild_assessment_aggregates
+from subjects import get_or_create_subject
+from datetime import date
+
+def _seed_alert_class(class_id):
+    """Add a class with a risky, a borderline and a fine student; returns their IDs in that order"""
+    student_ids = [f'RW-T{class_id}{n}' for n in range(1, 4)]
+    with app.app_context():
+        if not Class.query.get(class_id):
+            db.session.add(Class(class_id=class_id, class_name=f'Alerts {class_id}'))
+        db.session.add_all([
+            Student(student_id=student_ids[0], full_name="Risky Student", class_id=class_id),
+            Student(student_id=student_ids[1], full_name="Borderline Student", class_id=class_id),
+            Student(student_id=student_ids[2], full_name="Fine Student", class_id=class_id),
+        ])
+        db.session.flush()
+        subject_id, _ = get_or_create_subject("Mathematics")
+        for student_id, score in zip(student_ids, (20, 45, 90)):
+            db.session.add(Assessment(
+                student_id=student_id, subject_id=subject_id, subject_name="Mathematics",
+                assessment_type="exam", score=score, max_score=100,
+                date_taken=date(2024, 1, 15), term="Term 1"
+            ))
+            db.session.add(Attendance(
+                student_id=student_id, class_id=class_id, date=date(2024, 1, 15), status='present'
+            ))
+        db.session.add(Behavioral(
+            student_id=student_ids[0], behavior_type='negative', category='lateness', date=date(2024, 1, 16)
+        ))
+        db.session.commit()
+        # Written outside the API, so the score aggregates need a rebuild
+        rebuild_assessment_aggregates()
+    return student_ids
+
+def test_alerts_sorted_by_risk():
+    """Test that alerts are computed per student and sorted by risk"""
+    client = app.test_client()
+    risky_id, borderline_id, fine_id = _seed_alert_class(21)
+
+    response = client.get('/api/dashboard/alerts?class_id=21&per_page=200')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    ids = [a['student_id'] for a in data['alerts']]
+    assert fine_id not in ids
+    assert ids.index(risky_id) < ids.index(borderline_id)
+
+    risky = data['alerts'][ids.index(risky_id)]
+    assert risky['flags'] == ['low_score', 'behavior']
+    assert risky['misconduct_issues'] == 1
+
+def test_alerts_threshold_override():
+    """Test that thresholds can be overridden per request"""
+    client = app.test_client()
+    _, _, fine_id = _seed_alert_class(22)
+    response = client.get('/api/dashboard/alerts?class_id=22&min_score=95&per_page=200')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert fine_id in [a['student_id'] for a in data['alerts']]
+
+def test_alerts_total_past_last_page():
+    """Test that a page past the end still reports the total number of alerts"""
+    client = app.test_client()
+    _seed_alert_class(23)
+    first = json.loads(client.get('/api/dashboard/alerts?class_id=23&per_page=1').data)
+    assert first['total'] == 2 and len(first['alerts']) == 1
+    beyond = json.loads(client.get('/api/dashboard/alerts?class_id=23&per_page=1&page=3').data)
+    assert beyond['alerts'] == [] and beyond['total'] == 2
+
+def test_summary_cache_invalidated_on_write():
+    """Test that the cached summary is refreshed after a student write"""
+    client = app.test_client()
+
+    first = json.loads(client.get('/api/dashboard/summary').data)
+    hits_before = json.loads(client.get('/api/dashboard/cache-stats').data)['hits']
+    assert json.loads(client.get('/api/dashboard/summary').data) == first
+    assert json.loads(client.get('/api/dashboard/cache-stats').data)['hits'] == hits_before + 1
+
+    response = client.post('/students/', json={"full_name": "Cache Student", "class_id": 1})
+    assert response.status_code == 201
+
+    second = json.loads(client.get('/api/dashboard/summary').data)
+    assert second['total_students'] == first['total_students'] + 1
+
+def test_summary_cache_bypass():
+    """Test that ?nocache=1 skips the cache"""
+    client = app.test_client()
+    before = json.loads(client.get('/api/dashboard/cache-stats').data)
+    response = client.get('/api/dashboard/summary?nocache=1')
+    assert response.status_code == 200
+    after = json.loads(client.get('/api/dashboard/cache-stats').data)
+    assert after['bypassed'] == before['bypassed'] + 1
+    assert after['hits'] == before['hits']
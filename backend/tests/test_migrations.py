@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import datetime
+from sqlalchemy import create_engine, func, insert, inspect, select
+
+from app import app
+from models import db, Attendance, AttendanceDailyRollup, AttendanceTermRollup
+from db_migrations import SCHEMA_FILE, apply_migrations, migration_status, render_schema, split_statements
+
+def _write(directory, filename, sql):
+    with open(os.path.join(directory, filename), 'w') as f:
+        f.write(sql)
+
+def test_schema_sql_matches_models():
+    """Test that schema.sql was regenerated after the last model change"""
+    with open(SCHEMA_FILE) as f:
+        assert f.read() == render_schema(), 'run `python migrate.py --dump-schema`'
+
+def test_split_statements():
+    """Test that migration files split into statements without comments"""
+    sql = "-- header\nCREATE INDEX a ON t (x);\n\nDELETE FROM t\nWHERE x = 1;\n"
+    assert split_statements(sql) == ["CREATE INDEX a ON t (x)", "DELETE FROM t\nWHERE x = 1"]
+
+    guarded = "CREATE INDEX a ON t (x);\n-- dialect: postgresql\nALTER TABLE t ALTER COLUMN x SET NOT NULL;\n"
+    assert split_statements(guarded, 'sqlite') == ["CREATE INDEX a ON t (x)"]
+    assert split_statements(guarded, 'postgresql') == ["CREATE INDEX a ON t (x)", "ALTER TABLE t ALTER COLUMN x SET NOT NULL"]
+
+    trigger = "CREATE TRIGGER tr AFTER INSERT ON t BEGIN\n    DELETE FROM u;\n    DELETE FROM v;\nEND;\nDELETE FROM t;\n"
+    assert split_statements(trigger) == [
+        "CREATE TRIGGER tr AFTER INSERT ON t BEGIN\n    DELETE FROM u;\n    DELETE FROM v;\nEND", "DELETE FROM t"]
+
+def test_fresh_database_is_stamped_and_existing_one_migrated():
+    """Test that a fresh database is created from the models and later migrations run once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        migrations = os.path.join(tmp, 'migrations')
+        os.mkdir(migrations)
+        _write(migrations, '0001_first.sql', "CREATE INDEX IF NOT EXISTS ix_a ON attendance (status);\n")
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'db.sqlite')}")
+
+        assert apply_migrations(engine, migrations) == []
+        assert 'attendance_daily_rollup' in inspect(engine).get_table_names()
+        assert [state for _, state in migration_status(engine, migrations)] == ['applied']
+
+        _write(migrations, '0002_second.sql', "CREATE INDEX IF NOT EXISTS ix_b ON behavior (category);\n")
+        assert [m.name for m in apply_migrations(engine, migrations)] == ['second']
+        assert apply_migrations(engine, migrations) == []
+        assert 'ix_b' in {i['name'] for i in inspect(engine).get_indexes('behavior')}
+
+        _write(migrations, '0001_first.sql', "-- edited\n")
+        assert [state for _, state in migration_status(engine, migrations)] == ['modified', 'applied']
+        engine.dispose()
+
+def test_python_migration_runs_app_code_in_its_transaction():
+    """Test that a .py migration's upgrade() runs against the migrated database through db.session"""
+    with tempfile.TemporaryDirectory() as tmp, app.app_context():
+        migrations = os.path.join(tmp, 'migrations')
+        os.mkdir(migrations)
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'db.sqlite')}")
+        apply_migrations(engine, migrations)
+        with engine.begin() as conn:
+            conn.execute(insert(Attendance.__table__), [
+                {'student_id': 'MIG1', 'class_id': 1, 'date': datetime.date(2024, 10, 1), 'status': 'present'},
+                {'student_id': 'MIG1', 'class_id': 1, 'date': datetime.date(2025, 2, 3), 'status': 'absent'},
+            ])
+
+        _write(migrations, '0001_backfill.py',
+               "from attendance_rollup import rebuild_attendance_rollups\n\n"
+               "def upgrade(conn):\n    rebuild_attendance_rollups()\n")
+        assert [m.name for m in apply_migrations(engine, migrations)] == ['backfill']
+        with engine.connect() as conn:
+            assert conn.scalar(select(func.count()).select_from(AttendanceDailyRollup.__table__)) == 2
+            terms = conn.execute(select(AttendanceTermRollup.term, AttendanceTermRollup.total)
+                                 .order_by(AttendanceTermRollup.start_date)).all()
+        assert [tuple(t) for t in terms] == [('Term 1', 1), ('Term 2', 1)]
+        # The app's own session is untouched
+        assert db.session.get_bind() is db.engine
+        engine.dispose()
@@ -0,0 +1,105 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, User, Parent, Student, StudentParentLink, Attendance, Assessment, Behavioral
+from assessment_aggregates import assessment_key, refresh_assessment_aggregates
+from attendance_rollup import refresh_attendance_rollups
+from subjects import get_or_create_subject
+from parent_dashboard import parent_dashboard
+from datetime import date, timedelta
+from tests.conftest import count_queries
+from werkzeug.security import generate_password_hash
+
+def test_parent_dashboard_children_summaries_and_recent_items():
+    """Test linked children, term summaries, per-category limits and since"""
+    term_day = date(2025, 2, 20)  # Term 2 of 2024-2025
+    with app.app_context():
+        parent = Parent(full_name="Dashboard Parent")
+        db.session.add(parent)
+        for student_id in ('RW-PD01', 'RW-PD02', 'RW-PD03'):
+            db.session.add(Student(student_id=student_id, full_name=f"Child {student_id}", class_id=91))
+        db.session.flush()
+        parent_id = parent.parent_id
+        for student_id in ('RW-PD01', 'RW-PD02', 'RW-PD02'):
+            db.session.add(StudentParentLink(student_id=student_id, parent_id=parent_id))
+
+        marks = [Attendance(student_id='RW-PD01', class_id=91, date=term_day - timedelta(days=d),
+                            status='absent' if d == 0 else 'present') for d in range(8)]
+        db.session.add_all(marks)
+        subject_id, subject = get_or_create_subject("Mathematics")
+        assessments = [Assessment(student_id='RW-PD01', subject_id=subject_id, subject_name=subject,
+                                  assessment_type='quiz', score=score, max_score=10, term='Term 2',
+                                  academic_year='2024-2025', date_taken=term_day - timedelta(days=d))
+                       for d, score in enumerate((6, 8))]
+        # Term 2 of the previous academic year stays out of the term average
+        assessments.append(Assessment(student_id='RW-PD01', subject_id=subject_id, subject_name=subject,
+                                      assessment_type='exam', score=0, max_score=10, term='Term 2',
+                                      academic_year='2023-2024', date_taken=date(2024, 2, 20)))
+        db.session.add_all(assessments)
+        for d, behavior_type in ((1, 'negative'), (3, 'positive'), (200, 'negative')):
+            db.session.add(Behavioral(student_id='RW-PD01', behavior_type=behavior_type, category='Conduct',
+                                      date=term_day - timedelta(days=d)))
+        db.session.flush()
+        refresh_attendance_rollups({(m.student_id, m.class_id, m.date) for m in marks})
+        refresh_assessment_aggregates({assessment_key(a) for a in assessments})
+        db.session.commit()
+
+    def load(**kwargs):
+        with app.app_context():
+            return parent_dashboard(parent_id, day=term_day, **kwargs)
+
+    data, queries = count_queries(lambda: load(recent=3))
+    assert queries == 3
+    assert data['term']['term'] == 'Term 2'
+    assert [c['student_id'] for c in data['children']] == ['RW-PD01', 'RW-PD02']
+    child = data['children'][0]
+    assert child['summary'] == {'term_average': 70.0, 'attendance_rate': 87.5,
+                                'incidents': {'positive': 1, 'negative': 1}}
+    assert [a['date'] for a in child['recent']['attendance']] == \
+        [(term_day - timedelta(days=d)).isoformat() for d in range(3)]
+    assert child['recent']['attendance'][0]['status'] == 'absent'
+    assert [a['score'] for a in child['recent']['assessments']] == [6, 8, 0]
+    assert len(child['recent']['behaviors']) == 3
+    assert data['children'][1]['recent'] == {'attendance': [], 'assessments': [], 'behaviors': []}
+
+    newer = load(recent=3, since=term_day - timedelta(days=1))
+    recent = newer['children'][0]['recent']
+    assert [len(recent[c]) for c in ('attendance', 'assessments', 'behaviors')] == [2, 2, 1]
+
+    with app.app_context():
+        assert parent_dashboard(999999) is None
+
+def test_parent_portal_login_and_dashboard():
+    """Test that the dashboard route needs a parent session and shows that parent's children"""
+    with app.app_context():
+        user = User(username='portal-parent', email='portal-parent@home.rw', role='parent',
+                    password_hash=generate_password_hash('secret'))
+        db.session.add(user)
+        db.session.flush()
+        parent = Parent(user_id=user.user_id, full_name="Portal Parent")
+        db.session.add_all([parent, Student(student_id='RW-PD04', full_name="Portal Child", class_id=91)])
+        db.session.flush()
+        db.session.add(StudentParentLink(student_id='RW-PD04', parent_id=parent.parent_id))
+        db.session.commit()
+        parent_id = parent.parent_id
+
+    client = app.test_client()
+    assert client.get('/api/parent/dashboard').status_code == 401
+    response = client.post('/api/parent/login', json={'email': 'portal-parent@home.rw', 'password': 'wrong'})
+    assert response.status_code == 401
+    response = client.post('/api/parent/login', json={'email': 'portal-parent@home.rw', 'password': 'secret'})
+    assert response.status_code == 200
+    data = client.get('/api/parent/dashboard').get_json()
+    assert data['parent']['parent_id'] == parent_id
+    assert [c['student_id'] for c in data['children']] == ['RW-PD04']
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+
+    test_parent_dashboard_children_summaries_and_recent_items()
+    test_parent_portal_login_and_dashboard()
+
+    print("All tests passed!")
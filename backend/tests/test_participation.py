@@ -0,0 +1,54 @@
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, Student, Participation
+from datetime import date
+
+def test_average_rating_breakdowns():
+    """Test the stored rating and the per-student/class/event/month averages"""
+    client = app.test_client()
+    with app.app_context():
+        for student_id, class_id in (('RW-PR01', 71), ('RW-PR02', 71)):
+            if not db.session.get(Student, student_id):
+                db.session.add(Student(student_id=student_id, full_name=f"Rated {student_id}", class_id=class_id))
+        db.session.flush()
+        for student_id, event_name, day, status in (('RW-PR01', 'Debate', date(2024, 3, 4), ' excellent'),
+                                                    ('RW-PR01', 'Choir', date(2024, 4, 2), 'Poor'),
+                                                    ('RW-PR02', 'Debate', date(2024, 3, 9), 'GOOD'),
+                                                    ('RW-PR02', 'Choir', date(2024, 4, 5), 'absent')):
+            db.session.add(Participation(student_id=student_id, class_id=71, event_name=event_name,
+                                        date=day, status=status))
+        db.session.commit()
+        record = Participation.query.filter_by(student_id='RW-PR02', event_name='Debate').one()
+        assert record.rating == 4
+        record.status = 'average'
+        db.session.commit()
+        assert record.rating == 3
+
+    response = client.get('/api/participation/average-rating?class_id=71&by=student,class,event,month')
+    assert response.status_code == 200
+    summary = json.loads(response.data)
+    assert summary['records'] == 4 and summary['rated_records'] == 3
+    assert summary['average_rating'] == round(10 / 3, 2)
+    assert summary['by_student'] == [
+        {'student_id': 'RW-PR01', 'records': 2, 'rated_records': 2, 'average_rating': 3.5},
+        {'student_id': 'RW-PR02', 'records': 2, 'rated_records': 1, 'average_rating': 3.0},
+    ]
+    assert summary['by_class'] == [{'class_id': 71, 'records': 4, 'rated_records': 3, 'average_rating': round(10 / 3, 2)}]
+    assert {e['event_name']: e['average_rating'] for e in summary['by_event']} == {'Choir': 2.0, 'Debate': 4.0}
+    assert {m['month']: m['average_rating'] for m in summary['by_month']} == {'2024-03': 4.0, '2024-04': 2.0}
+
+    empty = json.loads(client.get('/api/participation/average-rating?class_id=71&start_date=2030-01-01').data)
+    assert empty['average_rating'] == 0 and empty['message'] == 'No participation records found'
+    assert client.get('/api/participation/average-rating?by=teacher').status_code == 400
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+
+    test_average_rating_breakdowns()
+
+    print("All tests passed!")
@@ -0,0 +1,59 @@
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from concurrent.futures import ThreadPoolExecutor
+from app import app
+from models import db, Student
+from student_ids import reserve_student_ids, next_student_id
+
+THREADS = 8
+STUDENTS_PER_THREAD = 250
+
+def _enroll(worker):
+    client = app.test_client()
+    ids = []
+    for i in range(STUDENTS_PER_THREAD):
+        response = client.post('/students/', json={
+            "full_name": f"Concurrent Student {worker}-{i}",
+            "class_id": 1
+        })
+        assert response.status_code == 201
+        ids.append(json.loads(response.data)['id'])
+    return ids
+
+def test_concurrent_enrollment_has_no_collisions():
+    """Test enrolling thousands of students from parallel threads"""
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(_enroll, range(THREADS)))
+
+    ids = [student_id for batch in results for student_id in batch]
+    assert len(ids) == THREADS * STUDENTS_PER_THREAD
+    assert len(set(ids)) == len(ids)
+
+    with app.app_context():
+        stored = db.session.query(Student.student_id).filter(Student.student_id.in_(ids)).count()
+    assert stored == len(ids)
+
+def test_reserved_blocks_do_not_overlap():
+    """Test that concurrent block reservations never hand out the same ID"""
+    def reserve(_):
+        with app.app_context():
+            return reserve_student_ids(100)
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        blocks = list(pool.map(reserve, range(20)))
+
+    ids = [student_id for block in blocks for student_id in block]
+    assert len(set(ids)) == 2000
+    assert all(student_id.startswith('RW-') for student_id in ids)
+
+def test_ids_continue_past_999():
+    """Test that numbering is numeric, not a string sort (RW-999 < RW-1000)"""
+    with app.app_context():
+        block = reserve_student_ids(1000)
+        last = int(block[-1].split('-')[1])
+        following = next_student_id()
+    number = following.split('-')[1]
+    assert len(number) >= 4 and int(number) > last
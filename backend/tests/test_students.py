@@ -0,0 +1,94 @@
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, Student, Guardian, EmergencyContact
+from tests.conftest import count_queries
+
+def test_list_students_keyset_pagination():
+    """Test paging through the roster with limit/cursor"""
+    client = app.test_client()
+
+    with app.app_context():
+        for i in range(5):
+            student = Student(student_id=f'RW-P{i:03d}', full_name=f"Paged Student {i}", class_id=7)
+            student.guardians.append(Guardian(first_name="G", last_name=str(i), relationship="Mother"))
+            student.emergency_contacts.append(EmergencyContact(first_name="E", last_name=str(i)))
+            db.session.add(student)
+        db.session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        url = '/students/?class_id=7&limit=2' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200
+        page = json.loads(response.data)
+        assert len(page) <= 2
+        seen.extend(s['id'] for s in page)
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+
+    assert seen == [f'RW-P{i:03d}' for i in range(5)]
+
+def test_list_students_constant_query_count():
+    """Test that guardians/contacts are eager loaded instead of per row"""
+    client = app.test_client()
+
+    response, queries = count_queries(lambda: client.get('/students/?class_id=7'))
+    data = json.loads(response.data)
+    assert len(data) == 5
+    assert data[0]['guardians'][0]['relationship'] == "Mother"
+    assert queries <= 3
+
+    response, queries = count_queries(lambda: client.get('/students/?class_id=7&fields=id,name'))
+    data = json.loads(response.data)
+    assert set(data[0]) == {'id', 'name'}
+    assert queries == 1
+
+def test_list_students_name_filter():
+    """Test the name filter and unknown field handling"""
+    client = app.test_client()
+    data = json.loads(client.get('/students/?name=paged student 3&fields=id').data)
+    assert data == [{'id': 'RW-P003'}]
+    assert client.get('/students/?fields=password').status_code == 400
+
+def test_bulk_import_csv_reports_row_errors():
+    """Test importing a CSV file with one invalid row"""
+    client = app.test_client()
+    csv_data = (
+        "full_name,class_id,gender,dateOfBirth,guardian1_first_name,guardian1_relationship,emergency1_first_name\n"
+        "Imported One,41,F,2012-03-15,Mary,Mother,Aunt Jo\n"
+        "Imported Two,41,M,15/03/2012,,,\n"
+        ",41,M,,,,\n"
+        "Imported Three,42,M,,,,\n"
+    )
+    response = client.post('/students/import?format=csv', data=csv_data, content_type='text/csv')
+    assert response.status_code == 201
+    report = json.loads(response.data)
+    assert report['total_rows'] == 4
+    assert report['imported'] == 2
+    assert [e['row'] for e in report['errors']] == [3, 4]
+
+    data = json.loads(client.get('/students/?class_id=41').data)
+    assert [s['name'] for s in data] == ["Imported One"]
+    assert data[0]['guardians'][0]['relationship'] == "Mother"
+    assert data[0]['emergencyContacts'][0]['firstName'] == "Aunt Jo"
+
+def test_bulk_import_ndjson():
+    """Test importing an NDJSON file with nested guardians"""
+    client = app.test_client()
+    lines = [
+        json.dumps({"full_name": f"Ndjson Student {i}", "class_id": 43,
+                    "guardians": [{"firstName": "G", "lastName": str(i), "relationship": "Father"}]})
+        for i in range(25)
+    ]
+    response = client.post('/students/import?format=ndjson&chunk_size=10',
+                           data='\n'.join(lines + ['not json']), content_type='application/x-ndjson')
+    report = json.loads(response.data)
+    assert report['imported'] == 25
+    assert report['errors'][0]['row'] == 26
+    assert len(json.loads(client.get('/students/?class_id=43&fields=id').data)) == 25
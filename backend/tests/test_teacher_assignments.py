@@ -0,0 +1,66 @@
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, User, Teacher, Class
+from tests.conftest import count_queries
+
+def _admin_client():
+    client = app.test_client()
+    with app.app_context():
+        admin = User.query.filter_by(username='assignments-admin').first()
+        if not admin:
+            admin = User(username='assignments-admin', password_hash='x', role='admin')
+            db.session.add(admin)
+            db.session.commit()
+        with client.session_transaction() as session:
+            session['user_id'] = admin.user_id
+    return client
+
+def test_assignment_listing_filters_cache_and_uniqueness():
+    """Test eager-loaded, filtered and cached listings and duplicate assignments"""
+    client = _admin_client()
+    assert app.test_client().get('/api/teacher-assignments/').status_code == 401
+    with app.app_context():
+        teachers = [Teacher(full_name=f"Assigned Teacher {i}") for i in range(3)]
+        db.session.add_all(teachers)
+        for c in range(3):
+            db.session.add(Class(class_id=101 + c, class_name=f"TA-{c}"))
+        db.session.commit()
+        teacher_ids = [t.teacher_id for t in teachers]
+
+    for i, teacher_id in enumerate(teacher_ids):
+        response = client.post('/api/teacher-assignments/', json={
+            'teacher_id': teacher_id, 'class_id': 101 + i, 'subject': 'Geography' if i else 'History'})
+        assert response.status_code == 201
+    duplicate = client.post('/api/teacher-assignments/', json={
+        'teacher_id': teacher_ids[0], 'class_id': 101, 'subject': ' history '})
+    assert duplicate.status_code == 409
+
+    response, queries = count_queries(lambda: client.get('/api/teacher-assignments/?subject=geography'))
+    listing = json.loads(response.data)
+    assert [(a['teacher_name'], a['class_name'], a['subject']) for a in listing] == [
+        ("Assigned Teacher 1", "TA-1", "Geography"), ("Assigned Teacher 2", "TA-2", "Geography")]
+    assert queries <= 2
+
+    _, cached_queries = count_queries(lambda: client.get('/api/teacher-assignments/?subject=geography'))
+    assert cached_queries == 0
+
+    by_class = json.loads(client.get('/api/teacher-assignments/?class_id=101').data)
+    assert len(by_class) == 1 and by_class[0]['subject'] == 'History'
+    assert json.loads(client.get(f'/api/teacher-assignments/?teacher_id={teacher_ids[2]}').data)[0]['class_id'] == 103
+    assert json.loads(client.get('/api/teacher-assignments/?subject=Astronomy').data) == []
+
+    assert client.delete(f"/api/teacher-assignments/{listing[0]['id']}").status_code == 200
+    after = json.loads(client.get('/api/teacher-assignments/?subject=geography').data)
+    assert [a['class_name'] for a in after] == ["TA-2"]
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+
+    test_assignment_listing_filters_cache_and_uniqueness()
+
+    print("All tests passed!")
@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from models import db, User, Teacher, Class, Student, Attendance, Assessment, Behavioral
+from assessment_aggregates import assessment_key, refresh_assessment_aggregates
+from subjects import get_or_create_subject
+from teacher_dashboard import teacher_dashboard
+from datetime import date, timedelta
+from tests.conftest import count_queries
+from werkzeug.security import generate_password_hash
+
+def _dashboard(teacher_id):
+    with app.app_context():
+        return teacher_dashboard(teacher_id, days=30)
+
+def test_teacher_dashboard_constant_queries():
+    """Test the teacher dashboard summaries and that its query count does not grow with classes"""
+    today = date.today()
+    with app.app_context():
+        teacher = Teacher(full_name="Dashboard Teacher")
+        db.session.add(teacher)
+        db.session.flush()
+        teacher_id = teacher.teacher_id
+        subject_id, subject = get_or_create_subject("Mathematics")
+        for c in range(2):
+            db.session.add(Class(class_id=81 + c, class_name=f"TD-{c}", teacher_id=teacher_id))
+        db.session.flush()
+        for c in range(2):
+            for s in range(3):
+                db.session.add(Student(student_id=f'RW-TD{c}{s}', full_name=f"Pupil {c}{s}", class_id=81 + c))
+        db.session.flush()
+        for days_ago, status in ((1, 'present'), (2, 'absent'), (3, 'present'), (4, 'present'), (60, 'absent')):
+            db.session.add(Attendance(student_id='RW-TD00', class_id=81, date=today - timedelta(days=days_ago),
+                                      status=status))
+        assessments = [Assessment(student_id='RW-TD00', subject_id=subject_id, subject_name=subject,
+                                  assessment_type='quiz', score=score, max_score=20, date_taken=today, term='Term 1')
+                       for score in (12, 18)]
+        db.session.add_all(assessments)
+        for days_ago, behavior_type in ((1, 'negative'), (2, 'positive'), (90, 'negative')):
+            db.session.add(Behavioral(student_id='RW-TD00', behavior_type=behavior_type, category='Conduct',
+                                      date=today - timedelta(days=days_ago)))
+        db.session.flush()
+        refresh_assessment_aggregates({assessment_key(a) for a in assessments})
+        db.session.commit()
+
+    data, queries = count_queries(lambda: _dashboard(teacher_id))
+    assert queries == 4
+    assert [c['class_name'] for c in data['classes']] == ['TD-0', 'TD-1']
+    assert [len(c['students']) for c in data['classes']] == [3, 3]
+    pupil = data['classes'][0]['students'][0]
+    assert pupil['student_id'] == 'RW-TD00'
+    assert pupil['attendance_rate'] == 75.0
+    assert pupil['average_score'] == 75.0
+    assert pupil['incidents'] == 1
+    assert [b['behavior_type'] for b in pupil['recent_behaviors']] == ['negative', 'positive']
+    quiet = data['classes'][1]['students'][0]
+    assert quiet['attendance_rate'] is None and quiet['incidents'] == 0 and quiet['recent_behaviors'] == []
+
+    with app.app_context():
+        db.session.add(Class(class_id=83, class_name="TD-2", teacher_id=teacher_id))
+        db.session.add(Student(student_id='RW-TD20', full_name="Pupil 20", class_id=83))
+        db.session.commit()
+    data, more_queries = count_queries(lambda: _dashboard(teacher_id))
+    assert len(data['classes']) == 3 and more_queries == queries
+
+    assert _dashboard(999999) is None
+
+def test_teacher_portal_login_and_dashboard():
+    """Test that the dashboard route needs a teacher session and shows that teacher's classes"""
+    with app.app_context():
+        user = User(username='portal-teacher', email='portal-teacher@school.rw', role='teacher',
+                    password_hash=generate_password_hash('secret'))
+        db.session.add(user)
+        db.session.flush()
+        teacher = Teacher(user_id=user.user_id, full_name="Portal Teacher")
+        db.session.add(teacher)
+        db.session.flush()
+        db.session.add(Class(class_id=84, class_name="TD-portal", teacher_id=teacher.teacher_id))
+        db.session.commit()
+        teacher_id = teacher.teacher_id
+
+    client = app.test_client()
+    assert client.get('/api/teacher/dashboard').status_code == 401
+    response = client.post('/api/teacher/login', json={'email': 'portal-teacher@school.rw', 'password': 'secret'})
+    assert response.status_code == 200
+    data = client.get('/api/teacher/dashboard?days=7').get_json()
+    assert data['teacher']['teacher_id'] == teacher_id and data['window_days'] == 7
+    assert [c['class_id'] for c in data['classes']] == [84]
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
+
+    test_teacher_dashboard_constant_queries()
+    test_teacher_portal_login_and_dashboard()
+
+    print("All tests passed!")